@@ -0,0 +1,105 @@
+"""
+Login Hashing Benchmark
+Measures login throughput and the latency of an unrelated endpoint while a
+burst of logins is in progress, with bcrypt called inline on the event loop
+(legacy) versus on the auth thread pool.
+
+A minimal FastAPI app is driven in-process through httpx's ASGI transport:
+``/login`` verifies a bcrypt hash and ``/ping`` stands in for every other
+endpoint; ``/ping`` is probed on a fixed 10 ms schedule during the burst.
+
+Usage: python benchmark_auth.py [--logins 32] [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-only")
+
+import httpx
+from fastapi import FastAPI
+
+import database
+from executors import shutdown_executors, start_executors
+
+PASSWORD = "correct horse battery staple"
+PING_INTERVAL_SECONDS = 0.01
+
+
+def build_app(mode: str, hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login():
+        if mode == "inline":
+            ok = database.verify_password(PASSWORD, hashed)
+        else:
+            ok = await database.verify_password_async(PASSWORD, hashed)
+        return {"ok": ok}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run_mode(mode: str, hashed: str, logins: int) -> dict:
+    transport = httpx.ASGITransport(app=build_app(mode, hashed))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+        ping_ms = []
+
+        async def probe():
+            # Fixed request schedule: latency counts from when a ping was due,
+            # so time the loop spent blocked is not hidden (coordinated omission)
+            due = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/ping")
+                ping_ms.append((time.perf_counter() - due) * 1000)
+                due += PING_INTERVAL_SECONDS
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await asyncio.gather(*(client.post("/login") for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    ping_ms.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "ping_p50_ms": statistics.median(ping_ms),
+        "ping_p99_ms": ping_ms[min(len(ping_ms) - 1, int(len(ping_ms) * 0.99))],
+        "ping_max_ms": ping_ms[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=database.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    database.BCRYPT_ROUNDS = args.rounds
+    hashed = database.get_password_hash(PASSWORD)
+    start_executors()
+    try:
+        for mode in ("inline", "pooled"):
+            result = asyncio.run(run_mode(mode, hashed, args.logins))
+            print(
+                f"{mode:6}: {result['logins_per_second']:6.1f} logins/s   "
+                f"/ping p50 {result['ping_p50_ms']:7.1f} ms   p99 {result['ping_p99_ms']:7.1f} ms   "
+                f"max {result['ping_max_ms']:7.1f} ms"
+            )
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-Request Memory Benchmark
+Compares the per-stage flow, where the perceptual hash and the detectors
+each work from their own full-resolution RGB decode, with the shared
+AnalysisContext flow (one reduced-resolution decode for both). ELA and
+metadata read the raw bytes in both flows.
+
+Each flow runs in its own subprocess so peak RSS is measured in isolation.
+
+Usage: python benchmark_context.py [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_decode import SIZES, make_upload, peak_rss_kb
+from context import AnalysisContext
+from forensics import analyze_forensics
+from phash import compute_phash
+from preprocessing import decode_full, normalize_batch, to_model_batch
+
+MEAN = np.array([0.5, 0.5, 0.5], dtype=np.float32) * 255
+STD = np.array([0.5, 0.5, 0.5], dtype=np.float32) * 255
+
+
+def per_stage(contents: bytes):
+    compute_phash(decode_full(contents))
+    normalize_batch(to_model_batch([decode_full(contents)], 224), MEAN, STD)
+    analyze_forensics(contents, return_map=True)
+
+
+def shared_context(contents: bytes):
+    ctx = AnalysisContext(contents)
+    ctx.artifacts["phash"] = compute_phash(ctx.model_image())
+    normalize_batch(to_model_batch([ctx.model_image()], 224), MEAN, STD)
+    ctx.artifacts["forensics"] = analyze_forensics(ctx.contents, return_map=True)
+
+
+FLOWS = {"per_stage": per_stage, "context": shared_context}
+
+
+def run_flow(flow: str, path: str, repeat: int) -> dict:
+    with open(path, "rb") as upload:
+        contents = upload.read()
+    baseline = peak_rss_kb()
+    fn = FLOWS[flow]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(contents)
+        samples.append((time.perf_counter() - started) * 1000)
+    peak = peak_rss_kb()
+    return {"ms": round(statistics.median(samples), 1), "peak_rss_delta_mb": round((peak - baseline) / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--single", nargs=2, help=argparse.SUPPRESS)  # internal: flow upload-path
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_flow(*args.single, repeat=args.repeat)))
+        return
+
+    for fmt in ("JPEG", "PNG"):
+        for label in SIZES:
+            results = {}
+            with tempfile.NamedTemporaryFile(suffix=f".{fmt.lower()}") as upload:
+                upload.write(make_upload(*SIZES[label], fmt))
+                upload.flush()
+                for flow in FLOWS:
+                    proc = subprocess.run(
+                        [sys.executable, __file__, "--single", flow, upload.name, "--repeat", str(args.repeat)],
+                        capture_output=True, text=True, check=True
+                    )
+                    results[flow] = json.loads(proc.stdout)
+            old, new = results["per_stage"], results["context"]
+            print(
+                f"{fmt:4} {label:>4}: per-stage {old['ms']:7.1f} ms / +{old['peak_rss_delta_mb']:6.1f} MB peak   "
+                f"context {new['ms']:7.1f} ms / +{new['peak_rss_delta_mb']:6.1f} MB peak"
+            )
+
+
+if __name__ == "__main__":
+    main()
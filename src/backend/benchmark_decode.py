@@ -0,0 +1,112 @@
+"""
+Model-Branch Decode Benchmark
+Compares the legacy preprocessing (full-resolution decode + convert("RGB"),
+then resize / float conversion / normalize / transpose) with the reduced
+path in preprocessing.py (JPEG draft or box-reduce decode + direct NCHW
+normalization) on 4 MP and 12 MP JPEG and PNG uploads.
+
+Each mode runs in its own subprocess (reading the upload from a temp file)
+so peak RSS is measured in isolation.
+
+Usage: python benchmark_decode.py [--repeat 10]
+"""
+
+import argparse
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from preprocessing import decode_full, decode_reduced, normalize_batch, to_model_batch
+
+MEAN = np.array([0.5, 0.5, 0.5], dtype=np.float32) * 255
+STD = np.array([0.5, 0.5, 0.5], dtype=np.float32) * 255
+SIZES = {"4MP": (2448, 1632), "12MP": (4032, 3024)}
+
+
+def make_upload(width: int, height: int, fmt: str) -> bytes:
+    """Smooth synthetic photo encoded like a camera upload."""
+    rng = np.random.default_rng(7)
+    small = (rng.random((height // 32, width // 32, 3)) * 255).astype(np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **({"quality": 90} if fmt == "JPEG" else {"compress_level": 1}))
+    return buffer.getvalue()
+
+
+def legacy(contents: bytes) -> np.ndarray:
+    image = decode_full(contents)
+    resized = image.resize((224, 224), Image.BILINEAR)
+    pixels = np.asarray(resized, dtype=np.float32)[None]
+    return np.ascontiguousarray(((pixels - MEAN) / STD).transpose(0, 3, 1, 2))
+
+
+def reduced(contents: bytes) -> np.ndarray:
+    image = decode_reduced(contents)
+    return normalize_batch(to_model_batch([image], 224), MEAN, STD)
+
+
+MODES = {"legacy": legacy, "reduced": reduced}
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process (VmHWM; ru_maxrss survives exec)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode: str, path: str, repeat: int) -> dict:
+    with open(path, "rb") as upload:
+        contents = upload.read()
+    baseline = peak_rss_kb()
+    fn = MODES[mode]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(contents)
+        samples.append((time.perf_counter() - started) * 1000)
+    peak = peak_rss_kb()
+    return {"ms": round(statistics.median(samples), 1), "peak_rss_delta_mb": round((peak - baseline) / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--single", nargs=2, help=argparse.SUPPRESS)  # internal: mode upload-path
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_mode(*args.single, repeat=args.repeat)))
+        return
+
+    for fmt in ("JPEG", "PNG"):
+        for label in SIZES:
+            results = {}
+            with tempfile.NamedTemporaryFile(suffix=f".{fmt.lower()}") as upload:
+                upload.write(make_upload(*SIZES[label], fmt))
+                upload.flush()
+                for mode in MODES:
+                    proc = subprocess.run(
+                        [sys.executable, __file__, "--single", mode, upload.name, "--repeat", str(args.repeat)],
+                        capture_output=True, text=True, check=True
+                    )
+                    results[mode] = json.loads(proc.stdout)
+            old, new = results["legacy"], results["reduced"]
+            print(
+                f"{fmt:4} {label:>4}: legacy {old['ms']:7.1f} ms / +{old['peak_rss_delta_mb']:6.1f} MB peak   "
+                f"reduced {new['ms']:7.1f} ms / +{new['peak_rss_delta_mb']:6.1f} MB peak   "
+                f"({old['ms'] / max(new['ms'], 0.01):.1f}x faster)"
+            )
+
+
+if __name__ == "__main__":
+    main()
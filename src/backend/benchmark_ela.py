@@ -0,0 +1,75 @@
+"""
+ELA Benchmark
+Compares the legacy single-quality ImageChops ELA with the NumPy
+multi-quality engine in forensics.py on 4 MP and 12 MP synthetic photos.
+
+Usage: python benchmark_ela.py [--repeat 5]
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image, ImageChops, ImageFilter
+
+from forensics import compute_ela, ELA_QUALITIES
+
+
+def legacy_perform_ela(image: Image.Image, quality: int = 90) -> float:
+    """The original perform_ela implementation (baseline)."""
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    compressed_image = Image.open(buffer)
+    ela_image = ImageChops.difference(image.convert("RGB"), compressed_image)
+    extrema = ela_image.getextrema()
+    max_diff = max([ex[1] for ex in extrema])
+    return min((max_diff / 20.0) * 100, 100)
+
+
+def make_photo(width: int, height: int) -> Image.Image:
+    """Smooth noise + a pasted sharp patch, round-tripped through JPEG like a real upload."""
+    rng = np.random.default_rng(42)
+    small = (rng.random((height // 16, width // 16, 3)) * 255).astype(np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    patch = Image.fromarray((rng.random((height // 6, width // 6, 3)) * 255).astype(np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    image = Image.open(io.BytesIO(buffer.getvalue())).convert("RGB")
+    image.paste(patch, (width // 3, height // 3))
+    return image
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, (width, height) in {"4MP": (2448, 1632), "12MP": (4032, 3024)}.items():
+        image = make_photo(width, height)
+        legacy_ms = timed(lambda: legacy_perform_ela(image), args.repeat)
+        single_ms = timed(lambda: compute_ela(image, (90,)), args.repeat)
+        multi_ms = timed(lambda: compute_ela(image, ELA_QUALITIES), args.repeat)
+        map_ms = timed(lambda: compute_ela(image, ELA_QUALITIES, return_map=True), args.repeat)
+        result = compute_ela(image, ELA_QUALITIES)
+        print(f"{label} ({width}x{height})")
+        print(f"  legacy perform_ela (q=90)        {legacy_ms:8.1f} ms   score={legacy_perform_ela(image):.1f}")
+        print(f"  compute_ela (q=90)               {single_ms:8.1f} ms   score={compute_ela(image, (90,))['score']:.1f}")
+        print(f"  compute_ela {ELA_QUALITIES!s:<20} {multi_ms:8.1f} ms   score={result['score']:.1f}")
+        print(f"  compute_ela + map                {map_ms:8.1f} ms")
+        print(f"  stats: {result['stats']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+ONNX Backend Benchmark
+Compares the PyTorch image-classification pipeline with the ONNX Runtime
+fp32 and dynamic-int8 backends from onnx_backend.py: load time, resident
+memory, per-batch latency and score parity against PyTorch.
+
+Each backend runs in its own subprocess so memory numbers are not polluted
+by the other backends.
+
+Usage: python benchmark_onnx.py [--backends torch,onnx,onnx-int8] [--batch-sizes 1,8] [--repeat 10]
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from onnx_backend import (
+    ONNX_PARITY_TOLERANCE,
+    check_parity,
+    load_onnx_classifier,
+    synthetic_images,
+)
+
+MODEL_ID = "dima806/deepfake_vs_real_image_detection"
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(backend: str):
+    if backend == "torch":
+        from transformers import pipeline
+        return pipeline("image-classification", model=MODEL_ID)
+    return load_onnx_classifier(MODEL_ID, backend)
+
+
+def run_backend(backend: str, batch_sizes, repeat: int) -> dict:
+    """Measure one backend in the current process."""
+    baseline = rss_mb()
+    started = time.perf_counter()
+    classifier = load(backend)
+    load_seconds = time.perf_counter() - started
+    loaded_rss = rss_mb()
+
+    latency = {}
+    for batch_size in batch_sizes:
+        images = synthetic_images(batch_size, seed=batch_size)
+        classifier(images, batch_size=batch_size)  # warm-up
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            classifier(images, batch_size=batch_size)
+            samples.append((time.perf_counter() - started) * 1000)
+        latency[str(batch_size)] = {
+            "p50_ms": round(statistics.median(samples), 2),
+            "per_image_ms": round(statistics.median(samples) / batch_size, 2),
+        }
+
+    result = {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "model_rss_mb": round(loaded_rss - baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "latency": latency,
+    }
+
+    if backend != "torch":
+        from transformers import pipeline
+        reference = pipeline("image-classification", model=MODEL_ID)
+        result["parity"] = check_parity(classifier, reference, synthetic_images(16, seed=1), ONNX_PARITY_TOLERANCE[backend])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # internal: run one backend, print JSON
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    if args.single:
+        print(json.dumps(run_backend(args.single, batch_sizes, args.repeat)))
+        return
+
+    results = []
+    for backend in args.backends.split(","):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--single", backend, "--batch-sizes", args.batch_sizes, "--repeat", str(args.repeat)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip()[-2000:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    baseline = next((r for r in results if r["backend"] == "torch"), None)
+    for r in results:
+        print(f"\n{r['backend']}: load {r['load_seconds']}s, model RSS {r['model_rss_mb']} MB, peak RSS {r['peak_rss_mb']} MB")
+        for batch_size, stats in r["latency"].items():
+            line = f"  batch {batch_size:>2}: {stats['p50_ms']:8.1f} ms  ({stats['per_image_ms']:.1f} ms/image)"
+            if baseline and r is not baseline:
+                line += f"  {baseline['latency'][batch_size]['p50_ms'] / stats['p50_ms']:.2f}x vs torch"
+            print(line)
+        if "parity" in r:
+            parity = r["parity"]
+            print(
+                f"  parity: max_abs_diff={parity['max_abs_diff']} "
+                f"top_label_agreement={parity['top_label_agreement']} "
+                f"({'PASS' if parity['passed'] else 'FAIL'}, tolerance {parity['tolerance']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Result Caching for DeFraudAI
+Content-addressed cache for analysis results: an in-process LRU tier with
+size-based eviction and TTL, plus an optional shared tier in MongoDB.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# ============================================
+# Configuration
+# ============================================
+
+RESULT_CACHE_MAX_BYTES = int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+RESULT_CACHE_SHARED = os.getenv("RESULT_CACHE_SHARED", "false").lower() in ("1", "true", "yes")
+RESULT_CACHE_COLLECTION = "analysis_cache"
+
+
+def content_digest(contents: bytes) -> str:
+    """SHA-256 hex digest identifying uploaded content."""
+    return hashlib.sha256(contents).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory footprint of a JSON-like value, in bytes."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+# ============================================
+# In-Process LRU Tier
+# ============================================
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by total entry size and entry count,
+    with a per-entry time-to-live. Not thread-safe; use from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        max_entries: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None, size: Optional[int] = None):
+        size = self.sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.current_bytes += size
+
+        while self._entries and (
+            self.current_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# ============================================
+# Two-Tier Result Cache
+# ============================================
+
+class ResultCache:
+    """
+    Analysis results keyed by ``namespace:version:sha256(content)``.
+
+    ``version`` identifies the models/pipeline that produced a result so a
+    model upgrade never serves stale verdicts. The shared MongoDB tier is
+    used only when enabled and ``db_getter()`` returns a connected database.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        db_getter: Optional[Callable[[], Any]] = None,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        ttl_seconds: int = RESULT_CACHE_TTL_SECONDS,
+        shared: bool = RESULT_CACHE_SHARED,
+    ):
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self.db_getter = db_getter if shared else None
+
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    def make_key(self, namespace: str, digest: str) -> str:
+        """Cache key for content identified by ``content_digest(contents)``."""
+        return f"{namespace}:{self.version}:{digest}"
+
+    def _collection(self):
+        db = self.db_getter() if self.db_getter else None
+        return db[RESULT_CACHE_COLLECTION] if db is not None else None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            doc = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Result cache read error: {e}")
+            return None
+        if doc is None:
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+        self.memory.set(key, doc["value"], ttl_seconds=max(1.0, remaining))
+        return doc["value"]
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self.memory.set(key, value)
+
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            # Expired documents are removed by the TTL index (see indexes.py)
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)},
+                upsert=True,
+            )
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Result cache write error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "memory": self.memory.stats(),
+            "shared": {
+                "enabled": self.db_getter is not None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "errors": self.shared_errors,
+            },
+        }
@@ -0,0 +1,87 @@
+"""
+Per-Request Analysis Context for DeFraudAI
+One object per upload holding the raw bytes and everything derived from
+them, so each stage reads shared state instead of decoding or converting
+the image again.
+"""
+
+import io
+import threading
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from cache import content_digest
+from preprocessing import MODEL_DECODE_SIZE, decode_reduced
+
+
+class AnalysisContext:
+    """
+    Raw upload bytes plus lazily computed views of them:
+
+    - ``digest``: SHA-256 of the bytes (cache / artifact key)
+    - ``header``: the opened but undecoded image (size, format)
+    - ``model_image()``: RGB decoded once at reduced resolution and shared
+      by the detectors and the perceptual hash (see preprocessing.py)
+    - ``artifacts``: stage outputs (phash, model output, forensics)
+
+    Full-resolution pixels are never held here: ELA and EXIF read
+    ``contents`` in the forensics pool. Decoding is guarded by a lock, so
+    concurrent branches of one request share a single decode.
+    """
+
+    __slots__ = (
+        "contents", "mime_type", "filename", "artifacts",
+        "_digest", "_header", "_model_image", "_model_min_size", "_lock",
+    )
+
+    def __init__(self, contents: bytes, mime_type: Optional[str] = None, filename: Optional[str] = None):
+        self.contents = contents
+        self.mime_type = mime_type
+        self.filename = filename
+        self.artifacts: Dict[str, Any] = {}
+        self._digest: Optional[str] = None
+        self._header: Optional[Image.Image] = None
+        self._model_image: Optional[Image.Image] = None
+        # min_size the cached model image was decoded for
+        self._model_min_size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            self._digest = content_digest(self.contents)
+        return self._digest
+
+    @property
+    def header(self) -> Image.Image:
+        """Image opened from the bytes; reads the header only, no pixel decode."""
+        if self._header is None:
+            self._header = Image.open(io.BytesIO(self.contents))
+        return self._header
+
+    @property
+    def size(self):
+        return self.header.size
+
+    @property
+    def decoded(self) -> bool:
+        return self.is_decoded()
+
+    def is_decoded(self, min_size: int = MODEL_DECODE_SIZE) -> bool:
+        """Whether ``model_image(min_size)`` can be served without decoding."""
+        return self._model_image is not None and self._model_min_size >= min_size
+
+    def model_image(self, min_size: int = MODEL_DECODE_SIZE) -> Image.Image:
+        """
+        Reduced-resolution RGB image with both sides at least ``min_size``
+        (or the original size), decoded on first use (blocking; call from a
+        pool). A request for a larger ``min_size`` than the cached image was
+        decoded for re-decodes and keeps the larger image, which still
+        serves smaller requests.
+        """
+        with self._lock:
+            if self._model_image is None or self._model_min_size < min_size:
+                self._model_image = decode_reduced(self.contents, min_size)
+                self._model_min_size = min_size
+            return self._model_image
@@ -3,16 +3,24 @@ MongoDB Database Module for DeFraudAI
 Handles user authentication and analysis history storage
 """
 
+import base64
 import os
+import time
 from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from bson import ObjectId
-from typing import Optional, List, Dict, Any
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import Optional, List, Dict, Any, Tuple
 from jose import JWTError, jwt
 import bcrypt
 
+from cache import LRUCache
+from executors import run_in_auth_pool
+from mongo_monitoring import event_listeners
+
 # Load .env from project root (2 directories up from this file)
 project_root = Path(__file__).resolve().parent.parent.parent
 env_path = project_root / ".env"
@@ -23,6 +31,18 @@ load_dotenv(dotenv_path=env_path)
 # ============================================
 MONGODB_URI = os.getenv("MONGODB_URI", "")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "defraudai")
+
+# Connection pool / wire settings; unset values keep the driver defaults
+# (maxPoolSize=100, minPoolSize=0, no idle timeout, no compression).
+# Options given in MONGODB_URI's query string apply as well.
+MONGODB_MAX_POOL_SIZE = os.getenv("MONGODB_MAX_POOL_SIZE")
+MONGODB_MIN_POOL_SIZE = os.getenv("MONGODB_MIN_POOL_SIZE")
+MONGODB_MAX_IDLE_TIME_MS = os.getenv("MONGODB_MAX_IDLE_TIME_MS")
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS")
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS")
+# Comma-separated, in preference order: zstd (needs zstandard), snappy
+# (needs python-snappy), zlib (built in)
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "")
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 if not SECRET_KEY:
     raise RuntimeError(
@@ -33,10 +53,45 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# bcrypt work factor (each +1 doubles hashing time); hashes made with a
+# different cost are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Dashboard stats: "counters" (incrementally maintained per-user documents)
+# or "aggregate" (one aggregation over the user's history per read)
+USER_STATS_MODE = os.getenv("USER_STATS_MODE", "counters").lower()
+USER_STATS_COLLECTION = "user_stats"
+# Daily buckets cover the month window plus the partial current day
+USER_STATS_BUCKET_DAYS = 31
+
+# Per-worker caches for authenticated requests. Profile edits in another
+# worker become visible here after at most USER_CACHE_TTL_SECONDS.
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
 # MongoDB client
 client: Optional[AsyncIOMotorClient] = None
 db = None
 
+def mongo_client_options() -> Dict[str, Any]:
+    """Keyword options for the Motor client from the MONGODB_* settings."""
+    options: Dict[str, Any] = {"event_listeners": event_listeners()}
+    numeric = {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    options.update({name: int(value) for name, value in numeric.items() if value})
+    if MONGODB_COMPRESSORS:
+        options["compressors"] = MONGODB_COMPRESSORS
+    return options
+
+
 async def connect_to_mongodb():
     """Connect to MongoDB"""
     global client, db
@@ -46,11 +101,13 @@ async def connect_to_mongodb():
     
     if client is None:
         try:
-            client = AsyncIOMotorClient(MONGODB_URI)
+            options = mongo_client_options()
+            client = AsyncIOMotorClient(MONGODB_URI, **options)
             db = client[MONGODB_DB_NAME]
             # Test connection
             await client.admin.command('ping')
-            print(f"✅ Connected to MongoDB: {MONGODB_DB_NAME}")
+            pool = {name: value for name, value in options.items() if name != "event_listeners"}
+            print(f"✅ Connected to MongoDB: {MONGODB_DB_NAME} {pool or ''}")
         except Exception as e:
             print(f"❌ MongoDB connection failed: {e}")
             return None
@@ -70,12 +127,13 @@ def get_database():
     return db
 
 
-import bcrypt
-
 # ============================================
 # Password Utilities
 # ============================================
 
+# The bcrypt calls block for the whole work factor: from async code use the
+# *_async wrappers, which run them on the auth thread pool.
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
@@ -87,10 +145,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a hash ("$2b$<cost>$...") was made with another work factor."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_in_auth_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_in_auth_pool(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -101,12 +175,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token"""
+    """
+    Decode and verify a JWT token.
+    
+    Verified payloads are memoized per token, never beyond the token's own
+    expiry, so repeat requests skip the signature check.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    ttl = min(TOKEN_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        token_cache.set(token, payload, ttl_seconds=ttl)
+    return payload
+
+
+# ============================================
+# Auth Caches
+# ============================================
+
+# Entry-count bound; the byte bound only guards against pathological documents
+user_cache = LRUCache(
+    max_bytes=64 * 1024 * 1024,
+    ttl_seconds=USER_CACHE_TTL_SECONDS,
+    max_entries=USER_CACHE_MAX_ENTRIES
+)
+token_cache = LRUCache(
+    max_bytes=64 * 1024 * 1024,
+    ttl_seconds=TOKEN_CACHE_TTL_SECONDS,
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    sizeof=lambda payload: 512
+)
+
+# Cached in place of a user document for ids that do not exist
+_USER_NOT_FOUND = {"_not_found": True}
+negative_user_hits = 0
+
+
+def invalidate_user(user_id: str):
+    """Drop a cached user record after it changes."""
+    user_cache.delete(user_id)
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    """Hit rates of the user-record and JWT-payload caches."""
+    return {
+        "users": {**user_cache.stats(), "negative_hits": negative_user_hits},
+        "tokens": token_cache.stats(),
+    }
 
 
 # ============================================
@@ -127,7 +247,7 @@ async def create_user(email: str, password: str, name: str) -> Optional[Dict]:
     
     user_doc = {
         "email": email.lower(),
-        "password_hash": get_password_hash(password),
+        "password_hash": await get_password_hash_async(password),
         "name": name,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
@@ -138,7 +258,11 @@ async def create_user(email: str, password: str, name: str) -> Optional[Dict]:
         }
     }
     
-    result = await collection.insert_one(user_doc)
+    try:
+        result = await collection.insert_one(user_doc)
+    except DuplicateKeyError:
+        # A concurrent registration won the unique email index
+        return None
     user_doc["_id"] = str(result.inserted_id)
     del user_doc["password_hash"]  # Don't return password hash
     return user_doc
@@ -155,9 +279,19 @@ async def authenticate_user(email: str, password: str) -> Optional[Dict]:
     if not user:
         return None
     
-    if not verify_password(password, user["password_hash"]):
+    if not await verify_password_async(password, user["password_hash"]):
         return None
     
+    # Upgrade the stored hash while the plaintext is at hand
+    if password_needs_rehash(user["password_hash"]):
+        try:
+            await collection.update_one(
+                {"_id": user["_id"]},
+                {"$set": {"password_hash": await get_password_hash_async(password)}}
+            )
+        except Exception as e:
+            print(f"Password rehash failed for user {user['_id']}: {e}")
+    
     # Return user without password hash
     user["_id"] = str(user["_id"])
     del user["password_hash"]
@@ -165,17 +299,32 @@ async def authenticate_user(email: str, password: str) -> Optional[Dict]:
 
 
 async def get_user_by_id(user_id: str) -> Optional[Dict]:
-    """Get user by ID"""
+    """
+    Get user by ID.
+    
+    Served from the per-worker user cache when possible; unknown ids are
+    cached briefly too, so a deleted account's token cannot force a
+    database round trip on every request.
+    """
+    global negative_user_hits
     if db is None:
         return None
     
+    cached = user_cache.get(user_id)
+    if cached is _USER_NOT_FOUND:
+        negative_user_hits += 1
+        return None
+    if cached is not None:
+        return dict(cached)
+    
     collection = db["users"]
     try:
-        user = await collection.find_one({"_id": ObjectId(user_id)})
+        user = await collection.find_one({"_id": ObjectId(user_id)}, {"password_hash": 0})
         if user:
             user["_id"] = str(user["_id"])
-            del user["password_hash"]
-            return user
+            user_cache.set(user_id, user)
+            return dict(user)
+        user_cache.set(user_id, _USER_NOT_FOUND, ttl_seconds=USER_CACHE_NEGATIVE_TTL_SECONDS)
     except Exception as e:
         # Log error for debugging (invalid ObjectId, DB errors, etc.)
         print(f"Error getting user by ID {user_id}: {e}")
@@ -232,6 +381,7 @@ async def update_user(user_id: str, update_data: Dict) -> bool:
         {"_id": ObjectId(user_id)},
         {"$set": sanitized_data}
     )
+    invalidate_user(user_id)
     return result.modified_count > 0
 
 
@@ -239,38 +389,108 @@ async def update_user(user_id: str, update_data: Dict) -> bool:
 # Analysis History Collection
 # ============================================
 
-async def save_analysis(user_id: str, analysis_data: Dict[str, Any]) -> Optional[str]:
-    """Save an analysis to the database"""
-    if db is None:
-        return None
-    
-    collection = db["analysis_history"]
-    
-    document = {
+def build_analysis_document(user_id: str, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    History document for an analysis. The _id is assigned here, so the
+    document can be written later (see history_writer.py) and retried
+    without creating duplicates.
+    """
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
         "user_id": user_id,
-        "timestamp": datetime.utcnow(),
+        "timestamp": now,
         "type": analysis_data.get("type", "unknown"),
         "content_preview": analysis_data.get("contentPreview", ""),
         "result": analysis_data.get("result", {}),
         "metadata": {
-            "created_at": datetime.utcnow(),
+            "created_at": now,
         }
     }
+
+
+async def save_analysis(user_id: str, analysis_data: Dict[str, Any]) -> Optional[str]:
+    """Save an analysis to the database"""
+    if db is None:
+        return None
+    
+    collection = db["analysis_history"]
+    document = build_analysis_document(user_id, analysis_data)
     
     result = await collection.insert_one(document)
+    await _apply_stats_deltas([document], 1)
     return str(result.inserted_id)
 
 
-async def get_user_analyses(user_id: str, limit: int = 50, skip: int = 0) -> List[Dict]:
-    """Get analysis history for a user"""
+async def insert_analyses(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Write history documents from build_analysis_document in one unordered
+    insert_many and update the stats counters for those written.
+    
+    Returns the documents that failed with a retryable error. Any other
+    exception propagates (nothing is counted) and the whole batch should be
+    retried. Retry only documents this call did not report as written: a
+    duplicate-key failure then means an earlier attempt wrote the document
+    but raised before counting it (e.g. a network error mid-insert), so it
+    is counted now.
+    """
+    if db is None:
+        return list(documents)
+    
+    try:
+        await db["analysis_history"].insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        retryable = {
+            error["index"] for error in e.details.get("writeErrors", [])
+            if error.get("code") != 11000
+        }
+        await _apply_stats_deltas([doc for i, doc in enumerate(documents) if i not in retryable], 1)
+        return [doc for i, doc in enumerate(documents) if i in retryable]
+    
+    await _apply_stats_deltas(documents, 1)
+    return []
+
+
+# What the history list renders; the full document comes from get_analysis_by_id
+HISTORY_SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "timestamp": 1,
+    "type": 1,
+    "content_preview": 1,
+    "result.is_fake": 1,
+    "result.isOriginal": 1,
+    "result.trustScore": 1,
+    "result.confidence": 1,
+}
+
+
+def encode_history_cursor(doc: Dict) -> str:
+    """Opaque page token for the position after ``doc`` (newest-first order)."""
+    raw = f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_history_cursor; raises ValueError for malformed tokens."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        timestamp, object_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except Exception as e:
+        raise ValueError("Invalid history cursor") from e
+
+
+async def get_user_analyses(user_id: str, limit: int = 50, skip: int = 0, summary: bool = False) -> List[Dict]:
+    """Get analysis history for a user (offset pagination; see get_user_history_page)"""
     if db is None:
         return []
     
     collection = db["analysis_history"]
     
     cursor = collection.find(
-        {"user_id": user_id}
-    ).sort("timestamp", -1).skip(skip).limit(limit)
+        {"user_id": user_id},
+        HISTORY_SUMMARY_PROJECTION if summary else None
+    ).sort([("timestamp", -1), ("_id", -1)]).skip(skip).limit(limit)
     
     analyses = []
     async for doc in cursor:
@@ -281,6 +501,51 @@ async def get_user_analyses(user_id: str, limit: int = 50, skip: int = 0) -> Lis
     return analyses
 
 
+async def get_user_history_page(
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    summary: bool = True
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of a user's history, newest first, with keyset pagination.
+    
+    ``cursor`` is the token returned with the previous page; the query
+    seeks straight to it on the (user_id, timestamp, _id) index, so every
+    page costs the same regardless of depth. Returns ``(analyses,
+    next_cursor)``; ``next_cursor`` is None on the last page. Raises
+    ValueError for a malformed cursor.
+    """
+    if db is None:
+        return [], None
+    
+    query: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        timestamp, object_id = decode_history_cursor(cursor)
+        query["$or"] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": object_id}},
+        ]
+    
+    # One extra row tells whether another page exists
+    rows = db["analysis_history"].find(
+        query,
+        HISTORY_SUMMARY_PROJECTION if summary else None
+    ).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1)
+    
+    analyses = []
+    async for doc in rows:
+        doc["_id"] = str(doc["_id"])
+        doc["id"] = doc["_id"]
+        analyses.append(doc)
+    
+    next_cursor = None
+    if len(analyses) > limit:
+        analyses = analyses[:limit]
+        next_cursor = encode_history_cursor(analyses[-1])
+    return analyses, next_cursor
+
+
 async def get_analysis_by_id(analysis_id: str, user_id: str) -> Optional[Dict]:
     """Get a specific analysis by ID"""
     if db is None:
@@ -311,14 +576,18 @@ async def delete_analysis(analysis_id: str, user_id: str) -> bool:
     collection = db["analysis_history"]
     
     try:
-        result = await collection.delete_one({
-            "_id": ObjectId(analysis_id),
-            "user_id": user_id
-        })
-        return result.deleted_count > 0
+        # The deleted document tells which counters to decrement
+        deleted = await collection.find_one_and_delete(
+            {"_id": ObjectId(analysis_id), "user_id": user_id},
+            projection={"timestamp": 1, "type": 1, "result": 1}
+        )
     except Exception as e:
         print(f"Error deleting analysis {analysis_id}: {e}")
         return False
+    if deleted is None:
+        return False
+    await _apply_stats_deltas([{**deleted, "user_id": user_id}], -1)
+    return True
 
 
 async def clear_user_history(user_id: str) -> int:
@@ -326,64 +595,250 @@ async def clear_user_history(user_id: str) -> int:
     if db is None:
         return 0
     
+    cleared_at = datetime.utcnow()
     collection = db["analysis_history"]
     result = await collection.delete_many({"user_id": user_id})
+    if USER_STATS_MODE == "counters":
+        # Reset in one write: saves still in flight are counted by the next
+        # stats read if their document survived the delete, never twice
+        await db[USER_STATS_COLLECTION].replace_one(
+            {"_id": user_id},
+            {"counted_from": cleared_at},
+            upsert=True
+        )
     return result.deleted_count
 
 
-async def get_user_stats(user_id: str) -> Dict:
-    """Get analysis statistics for a user"""
-    if db is None:
-        return {
-            "totalAnalyses": 0,
-            "mediaAnalyses": 0,
-            "textAnalyses": 0,
-            "deepfakesDetected": 0,
-            "suspiciousContent": 0,
-            "thisWeek": 0,
-            "thisMonth": 0
-        }
-    
-    collection = db["analysis_history"]
-    
-    # Get counts
-    total = await collection.count_documents({"user_id": user_id})
-    media = await collection.count_documents({"user_id": user_id, "type": "media"})
-    text = await collection.count_documents({"user_id": user_id, "type": "text"})
-    
-    # Time-based queries
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    month_ago = datetime.utcnow() - timedelta(days=30)
-    
-    this_week = await collection.count_documents({
-        "user_id": user_id,
-        "timestamp": {"$gte": week_ago}
-    })
-    this_month = await collection.count_documents({
-        "user_id": user_id,
-        "timestamp": {"$gte": month_ago}
-    })
-    
-    # Count deepfakes and suspicious content
-    deepfakes = await collection.count_documents({
-        "user_id": user_id,
-        "$or": [
-            {"result.is_fake": True},
-            {"result.isOriginal": False}
-        ]
-    })
-    
-    suspicious = await collection.count_documents({
-        "user_id": user_id,
-        "result.trustScore": {"$lt": 50}
-    })
-    
+# ============================================
+# User Stats
+# ============================================
+
+EMPTY_USER_STATS = {
+    "totalAnalyses": 0,
+    "mediaAnalyses": 0,
+    "textAnalyses": 0,
+    "deepfakesDetected": 0,
+    "suspiciousContent": 0,
+    "thisWeek": 0,
+    "thisMonth": 0
+}
+
+# Counter-document field -> response key
+_COUNTER_FIELDS = {
+    "total": "totalAnalyses",
+    "media": "mediaAnalyses",
+    "text": "textAnalyses",
+    "deepfakes": "deepfakesDetected",
+    "suspicious": "suspiciousContent",
+}
+
+
+def _day_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _stats_counts(document: Dict) -> Dict[str, int]:
+    """Counter increments contributed by one history document."""
+    result = document.get("result") or {}
+    trust_score = result.get("trustScore")
     return {
-        "totalAnalyses": total,
-        "mediaAnalyses": media,
-        "textAnalyses": text,
-        "deepfakesDetected": deepfakes,
-        "suspiciousContent": suspicious,
-        "thisWeek": this_week,
-        "thisMonth": this_month
+        "total": 1,
+        "media": int(document.get("type") == "media"),
+        "text": int(document.get("type") == "text"),
+        "deepfakes": int(result.get("is_fake") is True or result.get("isOriginal") is False),
+        "suspicious": int(isinstance(trust_score, (int, float)) and not isinstance(trust_score, bool) and trust_score < 50),
     }
+
+
+def _day_key(moment: datetime) -> str:
+    return f"{moment:%Y-%m-%d}"
+
+
+async def _apply_stats_deltas(documents: List[Dict], sign: int):
+    """
+    Add (``sign=1``) newly written or remove (``sign=-1``) deleted history
+    documents from their users' counters with one unordered bulk write.
+
+    Each counter document covers the history from its ``counted_from``
+    timestamp on; older documents are left to the seeding aggregation
+    (``_seed_user_stats``), so a document is counted by exactly one of
+    the two. Each history document is one conditional ``$inc`` of the
+    totals and its day's bucket; the first addition for a user creates
+    the counter document, and an addition that falls before
+    ``counted_from`` fails the filter (as a duplicate key) and is skipped.
+    """
+    if USER_STATS_MODE != "counters" or not documents:
+        return
+    oldest_bucket = _day_start(datetime.utcnow()) - timedelta(days=USER_STATS_BUCKET_DAYS)
+    updates = []
+    for document in documents:
+        timestamp = document.get("timestamp") or datetime.utcnow()
+        increments = {field: sign * value for field, value in _stats_counts(document).items()}
+        if _day_start(timestamp) >= oldest_bucket:
+            increments[f"days.{_day_key(timestamp)}"] = sign
+        if sign > 0:
+            updates.append(UpdateOne(
+                {"_id": document["user_id"], "counted_from": {"$not": {"$gt": timestamp}}},
+                {"$inc": increments, "$setOnInsert": {"counted_from": timestamp}},
+                upsert=True
+            ))
+        else:
+            # Only documents already counted: seeded, or saved since counted_from
+            updates.append(UpdateOne(
+                {"_id": document["user_id"], "$or": [
+                    {"seeded_at": {"$exists": True}},
+                    {"counted_from": {"$lte": timestamp}},
+                ]},
+                {"$inc": increments}
+            ))
+
+    try:
+        await db[USER_STATS_COLLECTION].bulk_write(updates, ordered=False)
+    except BulkWriteError as e:
+        uncounted = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+        if uncounted:
+            print(f"Failed to update stats counters: {uncounted[0].get('errmsg')}")
+    except Exception as e:
+        # Stats are advisory; never fail the write that triggered them
+        print(f"Failed to update stats counters: {e}")
+
+
+async def _aggregate_user_stats(user_id: str, now: datetime) -> Dict:
+    """All dashboard counts in one pass over the user's history ($group)."""
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+
+    def count_if(condition):
+        return {"$sum": {"$cond": [condition, 1, 0]}}
+
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": None,
+            "totalAnalyses": {"$sum": 1},
+            "mediaAnalyses": count_if({"$eq": ["$type", "media"]}),
+            "textAnalyses": count_if({"$eq": ["$type", "text"]}),
+            "deepfakesDetected": count_if({"$or": [
+                {"$eq": ["$result.is_fake", True]},
+                {"$eq": ["$result.isOriginal", False]},
+            ]}),
+            # Missing/null sorts below numbers in aggregation comparisons
+            "suspiciousContent": count_if({"$and": [
+                {"$gt": ["$result.trustScore", None]},
+                {"$lt": ["$result.trustScore", 50]},
+            ]}),
+            "thisWeek": count_if({"$gte": ["$timestamp", week_ago]}),
+            "thisMonth": count_if({"$gte": ["$timestamp", month_ago]}),
+        }},
+    ]
+    async for row in db["analysis_history"].aggregate(pipeline):
+        row.pop("_id", None)
+        return {**EMPTY_USER_STATS, **row}
+    return dict(EMPTY_USER_STATS)
+
+
+async def _seed_user_stats(user_id: str, now: datetime) -> Dict:
+    """
+    Count the history older than the user's counters (documents written
+    before counters existed, or before the last clear): fix the cutoff
+    (``counted_from``, creating the counter document if needed), aggregate
+    the older documents into totals and daily buckets with one $facet and
+    add them with $inc, so saves landing meanwhile keep their increments.
+    A document timestamped before the cutoff but written only after the
+    aggregation (still in the write-behind queue) is not counted. Returns
+    the counter document.
+    """
+    collection = db[USER_STATS_COLLECTION]
+    counters = await collection.find_one_and_update(
+        {"_id": user_id},
+        {"$setOnInsert": {"counted_from": now}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    cutoff = counters.get("counted_from", now)
+    first_day = _day_start(now) - timedelta(days=USER_STATS_BUCKET_DAYS)
+    pipeline = [
+        {"$match": {"user_id": user_id, "timestamp": {"$lt": cutoff}}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "media": {"$sum": {"$cond": [{"$eq": ["$type", "media"]}, 1, 0]}},
+                    "text": {"$sum": {"$cond": [{"$eq": ["$type", "text"]}, 1, 0]}},
+                    "deepfakes": {"$sum": {"$cond": [{"$or": [
+                        {"$eq": ["$result.is_fake", True]},
+                        {"$eq": ["$result.isOriginal", False]},
+                    ]}, 1, 0]}},
+                    "suspicious": {"$sum": {"$cond": [{"$and": [
+                        {"$gt": ["$result.trustScore", None]},
+                        {"$lt": ["$result.trustScore", 50]},
+                    ]}, 1, 0]}},
+                }},
+            ],
+            "daily": [
+                {"$match": {"timestamp": {"$gte": first_day}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "count": {"$sum": 1},
+                }},
+            ],
+        }},
+    ]
+    facets = {"totals": [], "daily": []}
+    async for row in db["analysis_history"].aggregate(pipeline):
+        facets = row
+
+    totals = facets["totals"][0] if facets["totals"] else {}
+    increments = {field: totals.get(field, 0) for field in _COUNTER_FIELDS}
+    for bucket in facets["daily"]:
+        increments[f"days.{bucket['_id']}"] = bucket["count"]
+    # A concurrent first read may have seeded already; its counts stand
+    seeded = await collection.find_one_and_update(
+        {"_id": user_id, "seeded_at": {"$exists": False}},
+        {"$inc": increments, "$set": {"seeded_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    return seeded or await collection.find_one({"_id": user_id})
+
+
+async def get_user_stats(user_id: str) -> Dict:
+    """
+    Get analysis statistics for a user.
+    
+    In "counters" mode this reads the user's counter document, whose daily
+    buckets cover a month, independent of history size. The week and month
+    windows are whole UTC days (today plus the previous 6 / 29 days).
+    """
+    if db is None:
+        return dict(EMPTY_USER_STATS)
+    
+    now = datetime.utcnow()
+    if USER_STATS_MODE != "counters":
+        return await _aggregate_user_stats(user_id, now)
+    
+    counters = await db[USER_STATS_COLLECTION].find_one({"_id": user_id})
+    if counters is None or "seeded_at" not in counters:
+        counters = await _seed_user_stats(user_id, now)
+    
+    today = _day_start(now)
+    week_start = _day_key(today - timedelta(days=6))
+    month_start = _day_key(today - timedelta(days=29))
+    oldest_bucket = _day_key(today - timedelta(days=USER_STATS_BUCKET_DAYS))
+    this_week = this_month = 0
+    expired = []
+    for day, count in (counters.get("days") or {}).items():
+        if day < oldest_bucket:
+            expired.append(day)
+        elif day >= month_start:
+            this_month += count
+            if day >= week_start:
+                this_week += count
+    if expired:
+        await db[USER_STATS_COLLECTION].update_one(
+            {"_id": user_id},
+            {"$unset": {f"days.{day}": "" for day in expired}}
+        )
+    
+    stats = {key: max(0, counters.get(field, 0)) for field, key in _COUNTER_FIELDS.items()}
+    return {**stats, "thisWeek": this_week, "thisMonth": this_month}
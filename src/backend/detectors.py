@@ -0,0 +1,246 @@
+"""
+Detector Registry for DeFraudAI
+Loads any configured set of deepfake detectors once per worker and runs them
+as a single batched ensemble over one shared decode/resize pass.
+
+Built-in detectors:
+- vit:       Hugging Face ViT (dima806/deepfake_vs_real_image_detection),
+             on PyTorch or ONNX Runtime (see onnx_backend.py)
+- keras_cnn: the Keras CNN from deepfake_detection.py
+             (models/deepfake_detector_model.h5, needs tensorflow)
+"""
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+import numpy as np
+from PIL import Image
+
+from onnx_backend import INFERENCE_BACKEND, ONNX_BACKENDS, onnx_available, load_onnx_classifier
+from preprocessing import normalize_batch, to_model_batch
+
+# ============================================
+# Configuration
+# ============================================
+
+# Comma-separated detector names, in registry order
+DETECTORS = [name.strip() for name in os.getenv("DETECTORS", "vit").split(",") if name.strip()]
+
+# Optional per-detector ensemble weights, e.g. "vit=0.7,keras_cnn=0.3"
+DETECTOR_WEIGHTS = {
+    name.strip(): float(weight)
+    for name, weight in (
+        item.split("=", 1) for item in os.getenv("DETECTOR_WEIGHTS", "").split(",") if "=" in item
+    )
+}
+
+VIT_MODEL_ID = "dima806/deepfake_vs_real_image_detection"
+KERAS_MODEL_PATH = os.getenv(
+    "KERAS_MODEL_PATH",
+    str(Path(__file__).resolve().parent / "models" / "deepfake_detector_model.h5")
+)
+
+
+# ============================================
+# Detector Interface & Registry
+# ============================================
+
+class Detector(ABC):
+    """
+    A deepfake detector operating on a shared preprocessed batch.
+
+    Subclasses set ``input_size`` and implement ``load()`` and
+    ``predict(pixels)``, where ``pixels`` is a uint8 NHWC array already
+    resized to ``input_size``; ``predict`` returns P(fake) per image.
+    """
+
+    name = ""
+    input_size = 224
+
+    def __init__(self, weight: float = 1.0):
+        self.weight = weight
+
+    @property
+    def version(self) -> str:
+        """Identifies the weights/backend in result-cache keys."""
+        return self.name
+
+    @abstractmethod
+    def load(self):
+        """Load weights (runs once per worker, in the inference pool)."""
+
+    @abstractmethod
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        """P(fake) per image of a uint8 NHWC batch at ``input_size``."""
+
+
+DETECTOR_REGISTRY: Dict[str, Type[Detector]] = {}
+
+
+def register_detector(name: str) -> Callable[[Type[Detector]], Type[Detector]]:
+    """Class decorator adding a detector to the registry under ``name``."""
+    def decorator(cls: Type[Detector]) -> Type[Detector]:
+        cls.name = name
+        DETECTOR_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+@register_detector("vit")
+class ViTDetector(Detector):
+    """HF ViT classifier fed directly with normalized tensors (no HF image processor at runtime)."""
+
+    def __init__(self, weight: float = 1.0, model_id: str = VIT_MODEL_ID, backend: str = INFERENCE_BACKEND):
+        super().__init__(weight)
+        self.model_id = model_id
+        self.backend = backend
+        self._model = None
+        self._onnx = None
+        self.fake_index = 0
+        self.mean = np.zeros(3, dtype=np.float32)
+        self.std = np.ones(3, dtype=np.float32)
+
+    @property
+    def version(self) -> str:
+        # int8 scores differ slightly from fp32, so each backend is versioned
+        return self.model_id if self.backend == "torch" else f"{self.model_id}@{self.backend}"
+
+    def load(self):
+        from transformers import AutoConfig, AutoImageProcessor
+
+        config = AutoConfig.from_pretrained(self.model_id)
+        processor = AutoImageProcessor.from_pretrained(self.model_id)
+        self.input_size = config.image_size
+        self.fake_index = next(i for i, label in config.id2label.items() if "fake" in label.lower())
+        # Only the processor's constants are used; 1/255 rescaling is folded in
+        self.mean = np.asarray(processor.image_mean, dtype=np.float32) * 255.0
+        self.std = np.asarray(processor.image_std, dtype=np.float32) * 255.0
+
+        if self.backend in ONNX_BACKENDS:
+            if not onnx_available():
+                print(f"⚠️  INFERENCE_BACKEND={self.backend} but onnx/onnxruntime are not installed; using torch")
+            else:
+                try:
+                    self._onnx = load_onnx_classifier(self.model_id, self.backend)
+                    return
+                except Exception as e:
+                    print(f"⚠️  ONNX backend unavailable ({e}); using torch")
+        self.backend = "torch"
+
+        from transformers import AutoModelForImageClassification
+        self._model = AutoModelForImageClassification.from_pretrained(self.model_id)
+        self._model.eval()
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        pixel_values = normalize_batch(pixels, self.mean, self.std)
+
+        if self._onnx is not None:
+            return self._onnx.predict_pixels(pixel_values)[:, self.fake_index]
+
+        import torch
+        with torch.inference_mode():
+            logits = self._model(pixel_values=torch.from_numpy(pixel_values)).logits
+            return torch.softmax(logits, dim=-1)[:, self.fake_index].numpy()
+
+
+@register_detector("keras_cnn")
+class KerasCNNDetector(Detector):
+    """Sigmoid CNN trained by train_model.py (1 = fake), inputs scaled to [0, 1]."""
+
+    def __init__(self, weight: float = 1.0, model_path: str = KERAS_MODEL_PATH):
+        super().__init__(weight)
+        self.model_path = model_path
+        self._model = None
+
+    @property
+    def version(self) -> str:
+        try:
+            return f"{self.name}@{int(os.path.getmtime(self.model_path))}"
+        except OSError:
+            return self.name
+
+    def load(self):
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Keras model not found at {self.model_path}")
+        from tensorflow.keras.models import load_model
+
+        self._model = load_model(self.model_path, compile=False)
+        self.input_size = int(self._model.input_shape[1])
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        # Direct call skips model.predict()'s per-call dataset/callback setup
+        output = self._model(pixels.astype(np.float32) / 255.0, training=False)
+        return np.asarray(output).reshape(-1)
+
+
+# ============================================
+# Batched Ensemble
+# ============================================
+
+class DetectorEnsemble:
+    """
+    Runs every loaded detector over one preprocessing pass per input size.
+
+    ``predict(images)`` returns, per image::
+
+        {"fake_probability": <weighted mean P(fake)>, "detectors": {name: P(fake)}}
+    """
+
+    def __init__(self, names: Sequence[str] = DETECTORS, weights: Optional[Dict[str, float]] = None):
+        weights = DETECTOR_WEIGHTS if weights is None else weights
+        unknown = [name for name in names if name not in DETECTOR_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown detectors: {', '.join(unknown)} (available: {', '.join(DETECTOR_REGISTRY)})")
+        self.detectors: List[Detector] = [DETECTOR_REGISTRY[name](weight=weights.get(name, 1.0)) for name in names]
+        self.failed: Dict[str, str] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return [detector.name for detector in self.detectors]
+
+    @property
+    def version(self) -> str:
+        return "+".join(detector.version for detector in self.detectors)
+
+    def load(self) -> "DetectorEnsemble":
+        """Load every detector; ones that fail are dropped, but at least one must load."""
+        loaded = []
+        for detector in self.detectors:
+            try:
+                detector.load()
+                loaded.append(detector)
+                print(f"🧠 Detector '{detector.name}' loaded ({detector.version})")
+            except Exception as e:
+                self.failed[detector.name] = str(e)
+                print(f"⚠️  Detector '{detector.name}' failed to load: {e}")
+        if not loaded:
+            raise RuntimeError(f"No detectors could be loaded: {self.failed}")
+        self.detectors = loaded
+        return self
+
+    def predict(self, images: Sequence[Image.Image]) -> List[Dict[str, Any]]:
+        scores: Dict[str, np.ndarray] = {}
+        shared: Dict[int, np.ndarray] = {}
+        for detector in self.detectors:
+            # One decode/resize per distinct input size, shared by all detectors
+            if detector.input_size not in shared:
+                shared[detector.input_size] = to_model_batch(images, detector.input_size)
+            scores[detector.name] = np.asarray(detector.predict(shared[detector.input_size]), dtype=np.float64)
+
+        total_weight = sum(detector.weight for detector in self.detectors) or 1.0
+        combined = sum(scores[detector.name] * detector.weight for detector in self.detectors) / total_weight
+        return [
+            {
+                "fake_probability": float(combined[i]),
+                "detectors": {name: round(float(values[i]), 6) for name, values in scores.items()},
+            }
+            for i in range(len(images))
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "detectors": {detector.name: {"version": detector.version, "weight": detector.weight} for detector in self.detectors},
+            "failed": self.failed,
+        }
@@ -0,0 +1,151 @@
+"""
+Execution Layer for DeFraudAI
+Managed executors that keep CPU-bound analysis off the asyncio event loop.
+
+- Inference pool (threads): torch forward passes and PIL decoding, both of
+  which release the GIL while they work.
+- Forensics pool (processes by default): pure-Python/PIL stages such as ELA
+  and metadata inspection, which would otherwise hold the GIL.
+- Auth pool (threads): bcrypt hashing for register/login. It is kept apart
+  and small so a login burst can neither stall the event loop nor occupy
+  the inference threads.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+def _available_cores() -> int:
+    """CPU cores usable by this process (respects container CPU affinity)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+# ============================================
+# Configuration
+# ============================================
+
+CPU_CORES = _available_cores()
+
+# 0 / unset means "derive from core count"
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or max(2, min(4, CPU_CORES))
+FORENSICS_WORKERS = int(os.getenv("FORENSICS_WORKERS", "0")) or max(1, CPU_CORES - 1)
+
+# "process" (default) or "thread" - threads avoid process start-up on tiny instances
+FORENSICS_EXECUTOR = os.getenv("FORENSICS_EXECUTOR", "process").lower()
+
+# "spawn" keeps worker processes free of the parent's torch/OpenMP state
+FORENSICS_MP_CONTEXT = os.getenv("FORENSICS_MP_CONTEXT", "spawn")
+
+# bcrypt releases the GIL; more threads than this only queue on the CPU
+AUTH_THREADS = int(os.getenv("AUTH_THREADS", "0")) or max(1, min(2, CPU_CORES))
+
+_inference_executor: Optional[ThreadPoolExecutor] = None
+_forensics_executor: Optional[Executor] = None
+_auth_executor: Optional[ThreadPoolExecutor] = None
+
+
+# ============================================
+# Lifecycle
+# ============================================
+
+def _create_forensics_executor() -> Executor:
+    if FORENSICS_EXECUTOR == "thread":
+        return ThreadPoolExecutor(max_workers=FORENSICS_WORKERS, thread_name_prefix="forensics")
+    context = multiprocessing.get_context(FORENSICS_MP_CONTEXT)
+    return ProcessPoolExecutor(max_workers=FORENSICS_WORKERS, mp_context=context)
+
+
+def start_executors():
+    """Create the executor pools (called from the FastAPI lifespan handler)."""
+    global _inference_executor, _forensics_executor, _auth_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+    if _forensics_executor is None:
+        _forensics_executor = _create_forensics_executor()
+    if _auth_executor is None:
+        _auth_executor = ThreadPoolExecutor(max_workers=AUTH_THREADS, thread_name_prefix="auth")
+    print(
+        f"⚙️  Executors started: inference={INFERENCE_THREADS} threads, "
+        f"forensics={FORENSICS_WORKERS} {FORENSICS_EXECUTOR} workers, auth={AUTH_THREADS} threads"
+    )
+
+
+def shutdown_executors():
+    """Shut down the executor pools, cancelling work that has not started."""
+    global _inference_executor, _forensics_executor, _auth_executor
+    if _inference_executor is not None:
+        _inference_executor.shutdown(wait=True, cancel_futures=True)
+        _inference_executor = None
+    if _forensics_executor is not None:
+        _forensics_executor.shutdown(wait=True, cancel_futures=True)
+        _forensics_executor = None
+    if _auth_executor is not None:
+        _auth_executor.shutdown(wait=True, cancel_futures=True)
+        _auth_executor = None
+    print("⚙️  Executors shut down")
+
+
+def get_inference_executor() -> Optional[ThreadPoolExecutor]:
+    """Thread pool for model inference and decoding (None before startup)."""
+    return _inference_executor
+
+
+def get_forensics_executor() -> Optional[Executor]:
+    """Pool for ELA/metadata forensics (None before startup)."""
+    return _forensics_executor
+
+
+# ============================================
+# Async Helpers
+# ============================================
+
+async def run_in_inference_pool(fn: Callable, *args, **kwargs) -> Any:
+    """Run ``fn`` on the inference thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_inference_executor, partial(fn, *args, **kwargs))
+
+
+async def run_in_forensics_pool(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run ``fn`` on the forensics pool. ``fn`` and its arguments must be
+    picklable when the pool uses processes (module-level functions, bytes).
+    """
+    global _forensics_executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_forensics_executor, partial(fn, *args, **kwargs))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge image) - replace the pool for later requests
+        print("⚠️  Forensics process pool broken; recreating")
+        _forensics_executor = _create_forensics_executor()
+        raise
+
+
+async def run_in_auth_pool(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run a password hashing call on the auth thread pool. Before startup
+    (scripts, tests) this falls back to the loop's default executor, which
+    still keeps bcrypt off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_auth_executor, partial(fn, *args, **kwargs))
+
+
+def executor_stats() -> Dict[str, Any]:
+    """Pool configuration for the internal stats endpoint."""
+    return {
+        "cpu_cores": CPU_CORES,
+        "inference_threads": INFERENCE_THREADS,
+        "forensics_workers": FORENSICS_WORKERS,
+        "forensics_executor": FORENSICS_EXECUTOR,
+        "auth_threads": AUTH_THREADS,
+        "running": _inference_executor is not None,
+    }
@@ -0,0 +1,247 @@
+"""
+Image Forensics for DeFraudAI
+Error Level Analysis and metadata inspection.
+
+Kept free of torch/transformers/FastAPI imports so the functions can run in
+lightweight worker processes (see executors.py).
+"""
+
+import io
+import os
+import time
+from functools import reduce
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageChops, ExifTags, features
+
+
+# ============================================
+# Error Level Analysis
+# ============================================
+
+DEFAULT_ELA_QUALITIES = (90, 75)
+
+
+def _parse_qualities(raw: str) -> Tuple[int, ...]:
+    """JPEG qualities (1-100) from a comma-separated list; the defaults if none are valid."""
+    try:
+        qualities = tuple(int(q) for q in raw.split(",") if q.strip())
+    except ValueError:
+        qualities = ()
+    if not qualities or not all(1 <= q <= 100 for q in qualities):
+        print(f"⚠️  Invalid ELA_QUALITIES={raw!r}; using {','.join(map(str, DEFAULT_ELA_QUALITIES))}")
+        return DEFAULT_ELA_QUALITIES
+    return qualities
+
+
+# JPEG qualities re-encoded per image; the per-pixel peak error is kept
+ELA_QUALITIES = _parse_qualities(os.getenv("ELA_QUALITIES", "90,75"))
+ELA_BLOCK_SIZE = 16
+ELA_MAP_MAX_DIM = 512
+
+# Score calibration: a per-pixel error of ELA_TAIL_SCALE at the 99.9th
+# percentile maps to 100 (the legacy scorer used the same scale on the max)
+ELA_TAIL_SCALE = 20.0
+
+
+def _jpeg_error(rgb: Image.Image, quality: int) -> Image.Image:
+    """Per-pixel error level max(|rgb - JPEG(rgb, quality)|) over R, G, B as an 8-bit image."""
+    buffer = io.BytesIO()
+    # 4:4:4 so chroma is re-quantized but not subsampled (subsampling noise
+    # along colour edges would otherwise swamp chroma-only edits)
+    rgb.save(buffer, "JPEG", quality=quality, subsampling=0)
+    buffer.seek(0)
+    return reduce(ImageChops.lighter, ImageChops.difference(rgb, Image.open(buffer)).split())
+
+
+def _percentiles_from_histogram(histogram: List[int], percentiles: Tuple[float, ...]) -> List[float]:
+    """Exact percentiles of 8-bit values from a 256-bin histogram."""
+    cumulative = np.cumsum(histogram)
+    total = cumulative[-1]
+    return [float(np.searchsorted(cumulative, total * p / 100.0)) for p in percentiles]
+
+
+def compute_ela(
+    image: Image.Image,
+    qualities: Tuple[int, ...] = ELA_QUALITIES,
+    return_map: bool = False,
+    map_max_dim: int = ELA_MAP_MAX_DIM,
+) -> Dict[str, Any]:
+    """
+    Multi-quality Error Level Analysis on a single RGB buffer.
+    
+    The image is converted to RGB once and re-encoded at every quality in
+    ``qualities``; the error level of a pixel is its largest channel error,
+    peaked across qualities, so chroma-only edits still register. The score
+    (0-100) combines:
+    - the 99.9th percentile error (robust to a single hot pixel),
+    - block-level inconsistency (coefficient of variation of 16x16 block means),
+    - spatial clustering of high-error blocks (localized edits cluster).
+    
+    With ``return_map=True`` the result includes ``map``: the error map
+    downsampled to at most ``map_max_dim`` pixels per side (uint8 array).
+    """
+    rgb = image.convert("RGB")
+
+    # Peak error level across qualities (stays exact 8-bit, computed in C)
+    error = _jpeg_error(rgb, qualities[0])
+    for quality in qualities[1:]:
+        error = ImageChops.lighter(error, _jpeg_error(rgb, quality))
+    del rgb
+
+    histogram = error.histogram()
+    p50, p95, p99, p999 = _percentiles_from_histogram(histogram, (50, 95, 99, 99.9))
+    max_error = float(np.flatnonzero(histogram)[-1])
+
+    # Block statistics - Image.reduce computes the 16x16 box means in C
+    block_means = np.asarray(error.reduce(ELA_BLOCK_SIZE), dtype=np.float32)
+    block_mean = float(block_means.mean())
+    block_std = float(block_means.std())
+    block_cv = block_std / (block_mean + 1e-6)
+
+    # High-error blocks: well above the image's own error level
+    high = block_means > max(block_mean + 2 * block_std, 2.0)
+    high_count = int(high.sum())
+    neighbours = np.zeros_like(high)
+    neighbours[1:, :] |= high[:-1, :]
+    neighbours[:-1, :] |= high[1:, :]
+    neighbours[:, 1:] |= high[:, :-1]
+    neighbours[:, :-1] |= high[:, 1:]
+    clustered = int((high & neighbours).sum())
+    high_fraction = high_count / high.size
+    clustered_fraction = clustered / high_count if high_count else 0.0
+
+    tail_score = min(p999 / ELA_TAIL_SCALE, 1.0) * 100
+    variance_score = min(block_cv / 1.5, 1.0) * 100
+    cluster_score = clustered_fraction * 100 if high_count >= 4 else 0.0
+    score = 0.5 * tail_score + 0.3 * cluster_score + 0.2 * variance_score
+
+    result = {
+        "score": round(score, 2),
+        "qualities": list(qualities),
+        "stats": {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "p99_9": p999,
+            "max": max_error,
+            "block_cv": round(block_cv, 4),
+            "high_block_fraction": round(high_fraction, 4),
+            "clustered_fraction": round(clustered_fraction, 4),
+        },
+        "map": None,
+    }
+
+    if return_map:
+        # Box-downsample first so scaling only touches the small map
+        factor = max(1, -(-max(error.size) // map_max_dim))
+        reduced = np.asarray(error.reduce(factor), dtype=np.float32)
+        # Stretch so the 99.9th percentile error is near full brightness
+        reduced *= 255.0 / max(p999, 1.0)
+        result["map"] = np.minimum(reduced, 255).astype(np.uint8)
+
+    return result
+
+
+# ============================================
+# ELA Heatmap Rendering
+# ============================================
+
+HEATMAP_FORMATS = {"png": ("PNG", "image/png")}
+if features.check("webp"):
+    HEATMAP_FORMATS["webp"] = ("WEBP", "image/webp")
+
+
+def _build_heatmap_lut() -> np.ndarray:
+    """256-entry black -> purple -> orange -> yellow colormap (uint8 RGB)."""
+    anchors = np.array([0, 64, 160, 255])
+    colors = np.array([
+        [0, 0, 4],
+        [120, 28, 109],
+        [237, 105, 37],
+        [252, 255, 164],
+    ], dtype=np.float32)
+    levels = np.arange(256)
+    lut = np.stack([np.interp(levels, anchors, colors[:, channel]) for channel in range(3)], axis=1)
+    return lut.astype(np.uint8)
+
+
+_HEATMAP_LUT = _build_heatmap_lut()
+
+
+def render_ela_heatmap(ela_map: np.ndarray, max_dim: int, fmt: str = "png") -> bytes:
+    """Colorize an ELA map, downscale to ``max_dim`` and encode it as PNG or WebP."""
+    pil_format, _ = HEATMAP_FORMATS[fmt]
+    heatmap = Image.fromarray(_HEATMAP_LUT[ela_map], mode="RGB")
+    if max(heatmap.size) > max_dim:
+        heatmap.thumbnail((max_dim, max_dim), Image.BILINEAR)
+    buffer = io.BytesIO()
+    if pil_format == "WEBP":
+        heatmap.save(buffer, pil_format, quality=80, method=4)
+    else:
+        heatmap.save(buffer, pil_format, compress_level=6)
+    return buffer.getvalue()
+
+
+# ============================================
+# Metadata Forensics
+# ============================================
+
+def clean_metadata(image: Image.Image) -> dict:
+    """Extract and analyze metadata for editing traces."""
+    meta_score = 0
+    traces = []
+
+    try:
+        exif = image.getexif()
+        if exif:
+            for tag_id, value in exif.items():
+                tag = ExifTags.TAGS.get(tag_id, tag_id)
+                value_str = str(value).lower()
+
+                # Look for editing software
+                if "software" in str(tag).lower():
+                    if any(x in value_str for x in ["adobe", "photoshop", "gimp", "paint", "canvas", "edit"]):
+                        meta_score = 80
+                        traces.append(f"Editing software detected: {value}")
+    except Exception:
+        pass
+
+    return {"score": meta_score, "traces": traces}
+
+
+def ela_map_from_bytes(contents: bytes, map_max_dim: int = ELA_MAP_MAX_DIM):
+    """Full-resolution ELA map (uint8 array) for raw upload bytes."""
+    image = Image.open(io.BytesIO(contents))
+    return compute_ela(image, return_map=True, map_max_dim=map_max_dim)["map"]
+
+
+def analyze_forensics(contents: bytes, return_map: bool = False) -> dict:
+    """
+    Run the non-model forensics stages (ELA + metadata) on raw upload bytes.
+
+    Decodes the image itself so it can be shipped to a worker process as
+    plain bytes; metadata is read from the original (unconverted) image.
+    With ``return_map`` the downsampled ELA map is included (``ela_map``).
+    ``timings`` holds the seconds spent in each stage inside the worker.
+    """
+    timings = {}
+    try:
+        started = time.perf_counter()
+        image = Image.open(io.BytesIO(contents))
+        metadata = clean_metadata(image)
+        timings["metadata"] = time.perf_counter() - started
+        started = time.perf_counter()
+        ela = compute_ela(image, return_map=return_map)
+        timings["ela"] = time.perf_counter() - started
+    except Exception as e:
+        print(f"Forensics Error: {e}")
+        return {"ela_score": 0, "ela_stats": {}, "ela_map": None, "metadata": {"score": 0, "traces": []}, "timings": timings}
+    return {
+        "ela_score": ela["score"],
+        "ela_stats": ela["stats"],
+        "ela_map": ela["map"],
+        "metadata": metadata,
+        "timings": timings,
+    }
@@ -0,0 +1,98 @@
+"""
+Gemini HTTP Client for DeFraudAI
+Shared async client with keep-alive connection pooling, HTTP/2 (when the
+h2 package is installed) and bounded request concurrency.
+"""
+
+import asyncio
+import importlib.util
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+# ============================================
+# Configuration
+# ============================================
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "60"))
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class GeminiClient:
+    """
+    Pooled async client for the Gemini ``generateContent`` API.
+
+    Call ``start()`` / ``close()`` from the application lifespan. Requests
+    beyond ``max_concurrency`` wait for a free slot instead of opening
+    unbounded connections.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: int = GEMINI_MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    async def start(self):
+        """Create the shared connection pool."""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=GEMINI_API_BASE,
+            http2=HTTP2_AVAILABLE,
+            headers={
+                "Content-Type": "application/json",
+                # Keep the key out of request URLs (and therefore out of access logs)
+                "x-goog-api-key": self.api_key,
+            },
+            limits=httpx.Limits(
+                max_connections=GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=GEMINI_MAX_CONNECTIONS,
+                keepalive_expiry=GEMINI_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(60.0, connect=GEMINI_CONNECT_TIMEOUT),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        print(f"🌐 Gemini client started (http2={'on' if HTTP2_AVAILABLE else 'off'}, max_concurrency={self.max_concurrency})")
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            print("🌐 Gemini client closed")
+
+    async def generate_content(self, model: str, payload: Dict[str, Any], timeout: float = 60.0) -> httpx.Response:
+        """
+        POST ``payload`` to ``{model}:generateContent``.
+
+        Raises httpx.TimeoutException / httpx.RequestError on transport
+        failures; HTTP error statuses are returned to the caller as-is.
+        """
+        if self._client is None:
+            raise RuntimeError("Gemini client is not started")
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await self._client.post(f"/{model}:generateContent", json=payload, timeout=timeout)
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "http2": HTTP2_AVAILABLE,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
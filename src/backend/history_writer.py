@@ -0,0 +1,202 @@
+"""
+Write-Behind Analysis History for DeFraudAI
+Takes history records off the request path: analyses are queued in-process
+and written to MongoDB in batches with ``insert_many``, flushed when a batch
+fills up or the oldest queued record has waited ``flush_interval_ms``.
+
+The queue is bounded: when MongoDB falls behind, ``submit`` waits for room
+(backpressure) instead of buffering without limit. Queued records are
+flushed on shutdown.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from database import build_analysis_document, insert_analyses, save_analysis
+from metrics import observe_stage
+
+# ============================================
+# Configuration
+# ============================================
+
+# "false" writes each record inline with insert_one (previous behaviour)
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "1000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200"))
+# Attempts per batch before its records are dropped (and logged)
+HISTORY_MAX_ATTEMPTS = 3
+HISTORY_SHUTDOWN_TIMEOUT_SECONDS = 10
+
+LATENCY_WINDOW = 1024
+
+
+class HistoryWriter:
+    """
+    Bounded write-behind queue in front of ``database.insert_analyses``.
+
+    ``submit(user_id, analysis_data)`` builds the document (timestamp and
+    _id are fixed at submit time), queues it and returns its id; a single
+    background task writes the queue in batches.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HISTORY_WRITE_BEHIND,
+        queue_size: int = HISTORY_QUEUE_SIZE,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval_ms: float = HISTORY_FLUSH_INTERVAL_MS,
+    ):
+        self.enabled = enabled
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_ms = max(0.0, flush_interval_ms)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.submitted_total = 0
+        self.written_total = 0
+        self.dropped_total = 0
+        self.retries_total = 0
+        self.flushes_total = 0
+        self.backpressure_waits = 0
+        self.flush_latency_max_ms = 0.0
+        self._recent_flush_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the background flush loop (no-op when write-behind is disabled)."""
+        if not self.enabled or self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run(), name="history-writer")
+        print(f"📝 History writer started (batch_size={self.batch_size}, flush_interval_ms={self.flush_interval_ms})")
+
+    async def stop(self, timeout: float = HISTORY_SHUTDOWN_TIMEOUT_SECONDS):
+        """Flush everything queued (within ``timeout``), then stop the loop."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  History writer: {self.queue_depth} records not flushed before shutdown")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print(f"📝 History writer stopped ({self.written_total} records written)")
+
+    async def submit(self, user_id: str, analysis_data: Dict[str, Any]) -> Optional[str]:
+        """Queue an analysis for the user's history; returns its id."""
+        started = time.perf_counter()
+        try:
+            if not self.running:
+                return await save_analysis(user_id, analysis_data)
+            document = build_analysis_document(user_id, analysis_data)
+            if self._queue.full():
+                self.backpressure_waits += 1
+            await self._queue.put(document)
+            self.submitted_total += 1
+            return str(document["_id"])
+        finally:
+            # What the request path pays: enqueue (or inline insert) time
+            observe_stage("save_analysis", time.perf_counter() - started)
+
+    async def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first record, then gather more until full or the interval expires."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval_ms / 1000.0
+
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        pending = batch
+        for attempt in range(1, HISTORY_MAX_ATTEMPTS + 1):
+            started = time.perf_counter()
+            try:
+                failed = await insert_analyses(pending)
+            except Exception as e:
+                print(f"History flush error (attempt {attempt}): {e}")
+                failed = pending
+            self._record_flush(len(pending) - len(failed), (time.perf_counter() - started) * 1000.0)
+            if not failed:
+                return
+            pending = failed
+            if attempt < HISTORY_MAX_ATTEMPTS:
+                self.retries_total += 1
+                await asyncio.sleep(0.5 * attempt)
+        self.dropped_total += len(pending)
+        print(f"❌ History writer dropped {len(pending)} records after {HISTORY_MAX_ATTEMPTS} attempts")
+
+    def _record_flush(self, written: int, latency_ms: float):
+        observe_stage("history_flush", latency_ms / 1000.0)
+        self.flushes_total += 1
+        self.written_total += written
+        self.flush_latency_max_ms = max(self.flush_latency_max_ms, latency_ms)
+        self._recent_flush_ms.append(latency_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and flush latency summary."""
+        recent = sorted(self._recent_flush_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            index = min(len(recent) - 1, int(round(p / 100.0 * (len(recent) - 1))))
+            return round(recent[index], 2)
+
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval_ms,
+            "submitted_total": self.submitted_total,
+            "written_total": self.written_total,
+            "dropped_total": self.dropped_total,
+            "retries_total": self.retries_total,
+            "backpressure_waits": self.backpressure_waits,
+            "flushes_total": self.flushes_total,
+            "avg_batch_size": round(self.written_total / self.flushes_total, 2) if self.flushes_total else None,
+            "flush_latency_ms": {
+                "max": round(self.flush_latency_max_ms, 2),
+                "p50": percentile(50),
+                "p99": percentile(99),
+            },
+        }
@@ -0,0 +1,175 @@
+"""
+MongoDB Index Management for DeFraudAI
+Creates every index the application's queries rely on at startup
+(idempotently) and verifies with ``explain()`` that none of the hot queries
+falls back to a collection scan.
+
+Run directly to check a deployment (exits non-zero on a COLLSCAN):
+
+    python indexes.py
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from cache import RESULT_CACHE_COLLECTION
+from jobs import JOB_COLLECTION
+
+# ============================================
+# Configuration
+# ============================================
+
+# Query-plan check at startup: "warn" (log only), "strict" (refuse to start
+# on a COLLSCAN or a failed index build) or "off". Index creation itself
+# always runs.
+MONGODB_INDEX_CHECK = os.getenv("MONGODB_INDEX_CHECK", "warn").lower()
+
+# Documents are removed by MongoDB's TTL monitor once expires_at has passed
+_TTL = IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+# Default index names are kept so existing deployments match exactly
+INDEXES: Dict[str, List[IndexModel]] = {
+    # Register / login / lookup by email (emails are stored lower-cased)
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    # History pages (newest first, _id breaks timestamp ties), stats
+    # aggregation, clear-history and per-user delete all lead with user_id
+    "analysis_history": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    RESULT_CACHE_COLLECTION: [_TTL],
+    JOB_COLLECTION: [_TTL],
+}
+
+
+# ============================================
+# Index Creation
+# ============================================
+
+async def ensure_indexes(db) -> Dict[str, Any]:
+    """
+    Create all indexes in ``INDEXES``. Existing identical indexes are a
+    no-op; a conflicting one (e.g. duplicate emails blocking the unique
+    index) is reported per collection without stopping the others.
+    """
+    created, errors = {}, {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            errors[collection_name] = str(e)
+            print(f"❌ Index creation failed on {collection_name}: {e}")
+    if not errors:
+        print(f"🗂️  MongoDB indexes ensured on {len(created)} collections")
+    return {"created": created, "errors": errors}
+
+
+# ============================================
+# Query-Plan Verification
+# ============================================
+
+def hot_queries() -> List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]]:
+    """``(name, collection, filter, sort)`` shaped like the queries in database.py."""
+    user_id = str(ObjectId())
+    now = datetime.utcnow()
+    return [
+        ("user_by_email", "users", {"email": "probe@example.com"}, []),
+        ("user_history_page", "analysis_history", {"user_id": user_id}, [("timestamp", DESCENDING)]),
+        (
+            "user_history_keyset", "analysis_history",
+            {"user_id": user_id, "$or": [
+                {"timestamp": {"$lt": now}},
+                {"timestamp": now, "_id": {"$lt": ObjectId()}},
+            ]},
+            [("timestamp", DESCENDING), ("_id", DESCENDING)],
+        ),
+        ("user_history_item", "analysis_history", {"_id": ObjectId(), "user_id": user_id}, []),
+        (
+            "user_stats_window", "analysis_history",
+            {"user_id": user_id, "timestamp": {"$gte": now - timedelta(days=30)}}, [],
+        ),
+    ]
+
+
+def _plan_stages(plan: Any) -> Iterator[str]:
+    """Every stage name in an explain() plan tree (classic and SBE layouts)."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for key, value in plan.items():
+            if key in ("inputStage", "inputStages", "queryPlan", "shards", "winningPlan"):
+                yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def verify_query_plans(db) -> Dict[str, List[str]]:
+    """Winning-plan stages per hot query; ``collscans`` lists the offenders."""
+    plans, collscans = {}, []
+    for name, collection_name, query, sort in hot_queries():
+        cursor = db[collection_name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = list(_plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        plans[name] = stages
+        if "COLLSCAN" in stages:
+            collscans.append(name)
+    return {"plans": plans, "collscans": collscans}
+
+
+async def bootstrap_indexes(db, check: str = MONGODB_INDEX_CHECK):
+    """
+    Startup hook: ensure indexes, then explain the hot queries. With
+    ``check="strict"`` a COLLSCAN (or a failed index build) raises
+    RuntimeError so the worker refuses to start.
+    """
+    if db is None:
+        return
+    try:
+        result = await ensure_indexes(db)
+        if check == "off":
+            return
+        verification = await verify_query_plans(db)
+    except Exception as e:
+        if check == "strict":
+            raise RuntimeError(f"MongoDB index bootstrap failed: {e}") from e
+        print(f"❌ MongoDB index bootstrap failed: {e}")
+        return
+
+    problems = list(result["errors"]) + verification["collscans"]
+    if not verification["collscans"]:
+        print(f"🗂️  Query plans verified: {len(verification['plans'])} hot queries use indexes")
+    for name in verification["collscans"]:
+        print(f"❌ Hot query '{name}' uses a COLLSCAN: {verification['plans'][name]}")
+    if problems and check == "strict":
+        raise RuntimeError(f"MongoDB index check failed: {', '.join(problems)}")
+
+
+async def _main() -> int:
+    from database import close_mongodb_connection, connect_to_mongodb
+
+    db = await connect_to_mongodb()
+    if db is None:
+        return 2
+    try:
+        await bootstrap_indexes(db, check="strict")
+    except RuntimeError as e:
+        print(e)
+        return 1
+    finally:
+        await close_mongodb_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,305 @@
+"""
+Inference Scheduling for DeFraudAI
+Collects concurrent model requests into micro-batches so the ViT detector
+runs one batched forward pass instead of one call per uploaded image.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# ============================================
+# Configuration
+# ============================================
+
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+# Number of recent batch latencies kept for percentile reporting
+LATENCY_WINDOW = 1024
+
+
+# ============================================
+# Batch Scheduler
+# ============================================
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching front-end for a batch prediction function.
+
+    Callers ``await submit(item)``; a single background task drains the queue,
+    waiting at most ``max_wait_ms`` after the first item for more work (or
+    until ``max_batch_size`` items are collected), runs ``predict_fn`` once on
+    the whole batch in ``executor`` and resolves every caller's future with
+    its own output.
+
+    ``predict_fn`` must accept a list of inputs and return a list of outputs
+    in the same order.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Items taken off the queue for the batch being collected or run
+        self._batch: List[Tuple[Any, asyncio.Future]] = []
+
+        # Metrics
+        self.batch_size_histogram: Counter = Counter()
+        self.batches_total = 0
+        self.items_total = 0
+        self.errors_total = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+        self._recent_latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the background batching loop on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="inference-batch-scheduler")
+        print(f"🧮 Inference scheduler started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})")
+
+    async def stop(self):
+        """
+        Stop the batching loop and fail every request still waiting: queued,
+        being collected into a batch or in a forward pass that is abandoned.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        pending = self._batch
+        self._batch = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Inference scheduler stopped"))
+        print("🧮 Inference scheduler stopped")
+
+    async def submit(self, item: Any) -> Any:
+        """Queue a single input and wait for its prediction."""
+        if not self.running:
+            raise RuntimeError("Inference scheduler is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Block for the first item, then gather more until full or the wait expires."""
+        loop = asyncio.get_running_loop()
+        batch = self._batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            # Take anything already queued without yielding to the timer
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that gave up (e.g. request cancelled) don't need a forward pass
+        batch[:] = [(item, future) for item, future in batch if not future.done()]
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+
+            inputs = [item for item, _ in batch]
+            started = time.perf_counter()
+            try:
+                outputs = await loop.run_in_executor(self.executor, self.predict_fn, inputs)
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(f"Batch prediction returned {len(outputs)} results for {len(inputs)} inputs")
+            except asyncio.CancelledError:
+                # stop() fails this batch's futures
+                raise
+            except Exception as e:
+                print(f"Batch inference error: {e}")
+                self.errors_total += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    if not future.done():
+                        future.set_result(output)
+            finally:
+                self._record_batch(len(inputs), (time.perf_counter() - started) * 1000.0)
+            self._batch = []
+
+    def _record_batch(self, size: int, latency_ms: float):
+        self.batch_size_histogram[size] += 1
+        self.batches_total += 1
+        self.items_total += size
+        self.latency_total_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        self._recent_latencies_ms.append(latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue depth, batch-size histogram and batch latency summary."""
+        recent = sorted(self._recent_latencies_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            index = min(len(recent) - 1, int(round(p / 100.0 * (len(recent) - 1))))
+            return round(recent[index], 2)
+
+        return {
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "errors_total": self.errors_total,
+            "avg_batch_size": round(self.items_total / self.batches_total, 2) if self.batches_total else None,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+            "batch_latency_ms": {
+                "avg": round(self.latency_total_ms / self.batches_total, 2) if self.batches_total else None,
+                "max": round(self.latency_max_ms, 2),
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+            },
+        }
+
+
+# ============================================
+# Background Model Loading & Readiness
+# ============================================
+
+class ModelLoader:
+    """
+    Loads a model off the request path and tracks its readiness.
+
+    ``start()`` schedules a background task that runs ``load_fn()`` in
+    ``executor`` and then ``warmup_fn(model)`` (e.g. synthetic batches so
+    lazy initialisation is paid before real traffic). ``state`` moves
+    through loading -> warming -> ready, or to failed.
+    """
+
+    LOADING = "loading"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        name: str,
+        load_fn: Callable[[], Any],
+        warmup_fn: Optional[Callable[[Any], None]] = None,
+    ):
+        self.name = name
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+
+        self.model: Any = None
+        self.state = self.LOADING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def start(self, executor: Optional[Executor] = None):
+        """Begin loading in the background; returns immediately."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(executor), name=f"load-{self.name}")
+
+    async def stop(self):
+        """Cancel loading if it is still in progress."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def wait_ready(self):
+        """Wait for loading and warm-up to finish (whatever the outcome)."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _run(self, executor: Optional[Executor]):
+        loop = asyncio.get_running_loop()
+
+        print(f"Loading {self.name}... (this may take a moment)")
+        self.state = self.LOADING
+        started = time.perf_counter()
+        try:
+            model = await loop.run_in_executor(executor, self.load_fn)
+        except Exception as e:
+            self.state = self.FAILED
+            self.error = str(e)
+            print(f"Failed to load model: {e}")
+            return
+        self.load_seconds = round(time.perf_counter() - started, 2)
+        self.model = model
+        print(f"Model loaded successfully in {self.load_seconds}s")
+
+        if self.warmup_fn is not None:
+            self.state = self.WARMING
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(executor, self.warmup_fn, model)
+            except Exception as e:
+                # A failed warm-up only costs latency later; the model still works
+                print(f"Model warm-up failed: {e}")
+            self.warmup_seconds = round(time.perf_counter() - started, 2)
+            print(f"Model warmed up in {self.warmup_seconds}s")
+
+        self.state = self.READY
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
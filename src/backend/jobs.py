@@ -0,0 +1,269 @@
+"""
+Background Analysis Jobs for DeFraudAI
+Bounded in-process job queue with worker coroutines, and pluggable job-state
+stores (in-memory, or MongoDB so any worker can answer status polls).
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# ============================================
+# Configuration
+# ============================================
+
+JOB_STORE = os.getenv("JOB_STORE", "memory").lower()  # memory | mongo
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(60 * 60)))
+JOB_COLLECTION = "analysis_jobs"
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+# ============================================
+# Job Stores
+# ============================================
+
+class MemoryJobStore:
+    """
+    Job state in a dict, expired after ``ttl_seconds``.
+
+    Only the worker that accepted a job can answer polls for it; use
+    MongoJobStore when running several uvicorn workers.
+    """
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _prune(self):
+        now = datetime.utcnow()
+        while self._jobs:
+            oldest = next(iter(self._jobs.values()))
+            if oldest["expires_at"] > now:
+                break
+            self._jobs.popitem(last=False)
+
+    async def create(self, job: Dict[str, Any]):
+        self._prune()
+        self._jobs[job["_id"]] = dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id: str, fields: Dict[str, Any]):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "jobs": len(self._jobs)}
+
+
+class MongoJobStore:
+    """Job state in MongoDB (shared by all workers), removed by a TTL index."""
+
+    def __init__(self, db_getter: Callable[[], Any], ttl_seconds: int = JOB_TTL_SECONDS):
+        self.db_getter = db_getter
+        self.ttl_seconds = ttl_seconds
+        self.errors = 0
+
+    def _collection(self):
+        db = self.db_getter()
+        if db is None:
+            raise RuntimeError("Database not connected")
+        return db[JOB_COLLECTION]
+
+    async def create(self, job: Dict[str, Any]):
+        await self._collection().insert_one(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._collection().find_one({"_id": job_id})
+
+    async def update(self, job_id: str, fields: Dict[str, Any]):
+        try:
+            await self._collection().update_one({"_id": job_id}, {"$set": fields})
+        except Exception as e:
+            self.errors += 1
+            print(f"Job store update error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "mongo", "errors": self.errors}
+
+
+def create_job_store(db_getter: Optional[Callable[[], Any]] = None, backend: str = JOB_STORE):
+    """Store selected by JOB_STORE; mongo requires ``db_getter``."""
+    if backend == "mongo":
+        if db_getter is None:
+            raise ValueError("JOB_STORE=mongo requires a database getter")
+        return MongoJobStore(db_getter)
+    return MemoryJobStore()
+
+
+# ============================================
+# Job Manager
+# ============================================
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """
+    Accepts jobs into a bounded queue and runs them on worker coroutines.
+
+    ``handlers`` maps a job kind to ``async handler(payload) -> result``.
+    Payloads (e.g. image bytes) stay in this process's queue; only job
+    state and results are written to the store.
+    """
+
+    def __init__(
+        self,
+        store,
+        handlers: Dict[str, JobHandler],
+        queue_size: int = JOB_QUEUE_SIZE,
+        workers: int = JOB_WORKERS,
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+        self.running_jobs = 0
+        self.submitted_total = 0
+        self.succeeded_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the worker coroutines on the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        print(f"📋 Job queue started ({self.workers} workers, capacity {self.queue_size}, store={self.store.stats()['backend']})")
+
+    async def stop(self):
+        """Cancel workers and fail jobs that never started."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                job_id, _, _ = self._queue.get_nowait()
+                await self.store.update(job_id, {
+                    "status": FAILED,
+                    "error": "Server shut down before the job started",
+                    "finished_at": datetime.utcnow(),
+                })
+        print("📋 Job queue stopped")
+
+    async def submit(self, kind: str, payload: Dict[str, Any], owner: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Record a queued job and enqueue it; raises JobQueueFull at capacity."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self._queue.full():
+            self.rejected_total += 1
+            raise JobQueueFull()
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": QUEUED,
+            "owner": owner,
+            "filename": filename,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "expires_at": now + timedelta(seconds=self.store.ttl_seconds),
+        }
+        await self.store.create(job)
+        self._queue.put_nowait((job["_id"], kind, payload))
+        self.submitted_total += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id, kind, payload = await self._queue.get()
+            self.running_jobs += 1
+            started = time.perf_counter()
+            try:
+                await self.store.update(job_id, {"status": RUNNING, "started_at": datetime.utcnow()})
+                result = await self.handlers[kind](payload)
+            except asyncio.CancelledError:
+                await self.store.update(job_id, {
+                    "status": FAILED,
+                    "error": "Server shut down while the job was running",
+                    "finished_at": datetime.utcnow(),
+                })
+                raise
+            except Exception as e:
+                self.failed_total += 1
+                print(f"Job {job_id} failed: {e}")
+                await self.store.update(job_id, {
+                    "status": FAILED,
+                    "error": getattr(e, "detail", None) or "Analysis failed",
+                    "finished_at": datetime.utcnow(),
+                })
+            else:
+                self.succeeded_total += 1
+                await self.store.update(job_id, {
+                    "status": SUCCEEDED,
+                    "result": result,
+                    "finished_at": datetime.utcnow(),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                })
+            finally:
+                self.running_jobs -= 1
+                # Drop the reference to the payload (image bytes) right away
+                payload = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": self.store.stats(),
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "queue_capacity": self.queue_size,
+            "running": self.running_jobs,
+            "submitted_total": self.submitted_total,
+            "succeeded_total": self.succeeded_total,
+            "failed_total": self.failed_total,
+            "rejected_total": self.rejected_total,
+        }
@@ -3,9 +3,9 @@ DeFraudAI Backend - Security Hardened
 Implements secure authentication, rate limiting, input validation, and API proxying
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Response, status, APIRouter
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request, Response, status, APIRouter
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, Field
@@ -16,6 +16,7 @@ import torch
 import torch.nn as nn
 from torchvision import models, transforms
 from PIL import Image, ImageChops, ImageEnhance, ExifTags
+import asyncio
 import io
 import numpy as np
 import os
@@ -23,12 +24,15 @@ from pathlib import Path
 from typing import List, Optional, Union
 import os
 import base64
-import requests
+import httpx
 import json
 import re
+import time
+from collections import Counter
+import zipfile
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 # Import database functions
 from database import (
@@ -39,9 +43,57 @@ from database import (
     get_user_by_id,
     decode_access_token,
     create_access_token,
-    save_analysis,
     get_user_analyses,
+    get_user_history_page,
+    get_analysis_by_id,
     get_user_stats,
+    get_database,
+    auth_cache_stats,
+)
+from inference import BatchScheduler, ModelLoader, INFERENCE_MAX_BATCH_SIZE
+from gemini_client import GeminiClient
+from onnx_backend import synthetic_images
+from detectors import DetectorEnsemble
+from preprocessing import image_size
+from context import AnalysisContext
+from video import (
+    PYAV_AVAILABLE,
+    VIDEO_MAX_BYTES,
+    VIDEO_MIME_TYPES,
+    VIDEO_DEADLINE_SECONDS,
+    ConfidenceTracker,
+    iter_sampled_frames,
+    probe_video,
+    take_frames
+)
+from jobs import JobManager, JobQueueFull, create_job_store, QUEUED, RUNNING
+from cache import ResultCache, LRUCache, content_digest
+from phash import PerceptualHashIndex, compute_phash
+from forensics import (
+    analyze_forensics,
+    ela_map_from_bytes,
+    render_ela_heatmap,
+    HEATMAP_FORMATS,
+    ELA_MAP_MAX_DIM,
+)
+from indexes import bootstrap_indexes
+from history_writer import HistoryWriter
+from mongo_monitoring import mongo_stats
+from metrics import (
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    histogram_from_ms_snapshot,
+    metrics,
+    observe_stage,
+    stage_timer,
+)
+from executors import (
+    start_executors,
+    shutdown_executors,
+    get_inference_executor,
+    run_in_inference_pool,
+    run_in_forensics_pool,
+    executor_stats,
 )
 
 # Load .env from project root (two levels up from src/backend/)
@@ -58,12 +110,36 @@ print(f"VITE_GEMINI_API_KEY loaded: {'Yes' if os.environ.get('VITE_GEMINI_API_KE
 # GEMINI API - Server-side only (never exposed to client)
 GEMINI_API_KEY = os.environ.get("VITE_GEMINI_API_KEY", "")
 print(f"GEMINI_API_KEY value: '{GEMINI_API_KEY[:10]}...' (len={len(GEMINI_API_KEY)})" if GEMINI_API_KEY else "GEMINI_API_KEY is EMPTY!")
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Shared pooled HTTP client for Gemini (opened/closed in lifespan)
+gemini_client = GeminiClient(GEMINI_API_KEY)
 
 # CORS Configuration - Restrictive origins
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 ALLOWED_ORIGINS = [origin.strip() for origin in FRONTEND_URL.split(",") if origin.strip()]
 
+# Decoded-image / ELA-map cache backing the heatmap endpoints (per worker)
+ARTIFACT_CACHE_MAX_BYTES = int(float(os.environ.get("ARTIFACT_CACHE_MAX_MB", "128")) * 1024 * 1024)
+ARTIFACT_CACHE_TTL_SECONDS = int(os.environ.get("ARTIFACT_CACHE_TTL_SECONDS", "600"))
+HEATMAP_MAX_DIM = int(os.environ.get("HEATMAP_MAX_DIM", "1024"))
+
+# Overall latency budget for /analyze-ensemble (local model and Gemini run concurrently)
+ENSEMBLE_DEADLINE_SECONDS = float(os.environ.get("ENSEMBLE_DEADLINE_SECONDS", "20"))
+
+# Cascade mode: run the local model first and call Gemini only when the local
+# fake probability (0-100) falls between the two thresholds
+ENSEMBLE_CASCADE = os.environ.get("ENSEMBLE_CASCADE", "false").lower() in ("1", "true", "yes")
+CASCADE_FAKE_THRESHOLD = float(os.environ.get("CASCADE_FAKE_THRESHOLD", "90"))
+CASCADE_REAL_THRESHOLD = float(os.environ.get("CASCADE_REAL_THRESHOLD", "10"))
+
+# A near-duplicate's Gemini verdict is reused by /analyze-ensemble only when
+# this upload's fresh local fake probability is within this many points of
+# the original's (and on the same side of 50)
+NEAR_DUPLICATE_MAX_DRIFT = float(os.environ.get("NEAR_DUPLICATE_MAX_DRIFT", "10"))
+# Per-reason length kept with a remembered Gemini verdict (bounds index entries)
+NEAR_DUPLICATE_REASON_CHARS = 300
+
 # File upload limits
 MAX_FILE_SIZE_BYTES = 5 * 1024 * 1024  # 5MB
 ALLOWED_MIME_TYPES = {
@@ -95,6 +171,9 @@ COOKIE_SAMESITE = "lax"  # "lax" allows cross-site navigation, blocks cross-site
 COOKIE_HTTPONLY = True  # Always true - prevents XSS token theft
 COOKIE_PATH = "/"  # Available on all routes
 
+# Internal stats endpoint - optional shared token (leave empty to disable the check)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 # ============================================
 # Rate Limiting Setup
 # ============================================
@@ -163,10 +242,32 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Modern lifespan handler for startup/shutdown."""
-    # Startup: Initialize database connection
-    await connect_to_mongodb()
+    # Startup: Initialize database connection (and indexes), executors and inference batching
+    await bootstrap_indexes(await connect_to_mongodb())
+    start_executors()
+    inference_scheduler.executor = get_inference_executor()
+    await inference_scheduler.start()
+    # Load + warm the model in the background so the server accepts
+    # connections immediately; /ready reports when it can take traffic
+    model_loader.start(get_inference_executor())
+    await gemini_client.start()
+    await run_in_inference_pool(phash_index.load)
+    await job_manager.start()
+    await history_writer.start()
+    await metrics.start()
     yield
-    # Shutdown: Close database connection
+    # Shutdown: Stop batching and executors, flush history, close HTTP pool and database connection
+    await job_manager.stop()
+    await history_writer.stop()
+    await metrics.stop()
+    await model_loader.stop()
+    await inference_scheduler.stop()
+    try:
+        phash_index.save()
+    except Exception as e:
+        print(f"Failed to save perceptual hash index: {e}")
+    shutdown_executors()
+    await gemini_client.close()
     await close_mongodb_connection()
 
 # ============================================
@@ -191,14 +292,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "Accept"],
+    # Lets browser clients read the history page token
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Debug Middleware: Log every request to help diagnose 404/405 issues
+# Request metrics: per-route request counts and latency for /metrics
+# (replaces the per-request stdout log; unmatched routes show up as route="unmatched").
+# call_next hands back the body as a stream (NDJSON batches, heatmaps), so
+# latency is observed when the body finishes, not when the headers are ready
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    # Print to stdout so it shows up in Railway logs
-    print(f"HIT: {request.method} {request.url.path}")
-    response = await call_next(request)
+    started = time.perf_counter()
+    
+    def record(status_code: int):
+        # Route templates (not raw paths) keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.inc(HTTP_REQUESTS, route=route, method=request.method, status=status_code)
+        metrics.observe(HTTP_DURATION, time.perf_counter() - started, route=route, method=request.method)
+    
+    try:
+        response = await call_next(request)
+    except BaseException:
+        record(500)
+        raise
+    
+    body = response.body_iterator
+    
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            record(response.status_code)
+    
+    response.body_iterator = observed_body()
     return response
 
 # ============================================
@@ -342,21 +469,88 @@ def validate_mime_type(content_type: Optional[str], filename: Optional[str] = No
 # Load ML Model
 # ============================================
 
-from transformers import pipeline
+# Detectors named in DETECTORS (default: the ViT), loaded in the background
+local_detectors = DetectorEnsemble()
+
+# Run synthetic batches after loading so lazy init is not paid by real requests
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
 
-print("Loading Deepfake Detection Model... (this may take a moment)")
-try:
-    pipe = pipeline("image-classification", model="dima806/deepfake_vs_real_image_detection")
-    print("Model loaded successfully!")
-except Exception as e:
-    print(f"Failed to load model: {e}")
-    pipe = None
+def load_model() -> DetectorEnsemble:
+    """
+    Load every configured detector (runs in the inference pool), then key
+    cached verdicts to what actually loaded: a detector that failed is
+    dropped and the ViT may fall back from ONNX to torch.
+    """
+    ensemble = local_detectors.load()
+    result_cache.version = analysis_version()
+    print(f"🔖 Analysis version: {result_cache.version}")
+    return ensemble
+
+def warm_up_model(ensemble: DetectorEnsemble):
+    """
+    Push synthetic images through every batch size the scheduler will use,
+    so weight paging, allocator growth and kernel selection happen before
+    the worker reports ready.
+    """
+    sample = synthetic_images(1)[0]
+    for batch_size in sorted({1, INFERENCE_MAX_BATCH_SIZE}):
+        ensemble.predict([sample] * batch_size)
+
+model_loader = ModelLoader(
+    f"detectors ({', '.join(local_detectors.names)})",
+    load_model,
+    warmup_fn=warm_up_model if MODEL_WARMUP_ENABLED else None
+)
+
+def predict_batch(images: List[Image.Image]) -> List[dict]:
+    """Run one batched pass of every detector; returns the ensemble output per image."""
+    if not model_loader.ready:
+        raise RuntimeError("Local model not loaded")
+    return model_loader.model.predict(images)
+
+# Groups concurrent requests into batches (started/stopped in lifespan)
+inference_scheduler = BatchScheduler(predict_batch)
+
+# Writes history records in batches off the request path (drained in lifespan)
+history_writer = HistoryWriter()
+
+# ============================================
+# Result Cache
+# ============================================
+
+# Bump the suffix whenever scoring logic changes so cached verdicts are not reused
+ANALYSIS_VERSION_SUFFIX = "v6"
+
+def analysis_version() -> str:
+    """Version of cached verdicts: detector weights/backends + Gemini model + scoring."""
+    return f"{local_detectors.version}+{GEMINI_MODEL}+{ANALYSIS_VERSION_SUFFIX}"
+
+# Content-addressed cache of analysis responses (memory tier + optional MongoDB
+# tier); re-versioned by load_model once the detectors have loaded
+result_cache = ResultCache(analysis_version(), db_getter=get_database)
+
+# Upload bytes and ELA maps of recent uploads, keyed by content digest, so a
+# heatmap request after an analysis does not need the upload or run ELA again
+# (compressed bytes are kept rather than a decoded full-resolution image).
+# "owners" lists who uploaded the content; only they can fetch its heatmap
+artifact_cache = LRUCache(
+    max_bytes=ARTIFACT_CACHE_MAX_BYTES,
+    ttl_seconds=ARTIFACT_CACHE_TTL_SECONDS,
+    sizeof=lambda artifacts: sum(
+        len(item) if isinstance(item, bytes) else item.nbytes
+        for key, item in artifacts.items() if key != "owners" and item is not None
+    )
+)
+
+# Near-duplicate index: perceptual hash -> {"version", "local_fake", "gemini"}
+# (loaded at startup, saved on shutdown)
+phash_index = PerceptualHashIndex()
 
 # ============================================
 # Gemini API Functions (Server-side only)
 # ============================================
 
-def analyze_with_gemini(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
+async def analyze_with_gemini(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
     """Analyze image using Gemini Vision API (server-side only)"""
     if not GEMINI_API_KEY:
         return {"status": "error", "message": "Gemini API key not configured on server"}
@@ -387,12 +581,8 @@ def analyze_with_gemini(image_bytes: bytes, mime_type: str = "image/jpeg") -> di
     }
     
     try:
-        response = requests.post(
-            f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=30
-        )
+        with stage_timer("gemini"):
+            response = await gemini_client.generate_content(GEMINI_MODEL, payload, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -403,90 +593,35 @@ def analyze_with_gemini(image_bytes: bytes, mime_type: str = "image/jpeg") -> di
             return {"status": "error", "message": "Failed to parse Gemini response"}
         else:
             return {"status": "error", "message": f"Gemini API error: {response.status_code}"}
+    except httpx.TimeoutException:
+        return {"status": "timeout", "message": "Gemini API request timed out"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def perform_ela(image: Image.Image, quality: int = 90) -> float:
-    """
-    Perform Error Level Analysis (ELA) to detect manipulation.
-    Returns a score from 0-100 indicating likelihood of manipulation.
+def analyze_with_local_model(model_results: dict, forensics: dict) -> dict:
     """
-    try:
-        # Save compressed version to memory
-        buffer = io.BytesIO()
-        image.convert("RGB").save(buffer, "JPEG", quality=quality)
-        buffer.seek(0)
-        
-        # Open compressed version
-        compressed_image = Image.open(buffer)
-        
-        # Calculate difference
-        ela_image = ImageChops.difference(image.convert("RGB"), compressed_image)
-        
-        # Get extrema (max difference)
-        extrema = ela_image.getextrema()
-        max_diff = max([ex[1] for ex in extrema])
-        
-        # Scale to 0-100 (higher diff = higher likelihood of manipulation)
-        # Threshold: diff > 10-15 usually indicates editing
-        score = min((max_diff / 20.0) * 100, 100)
-        return score
-    except Exception as e:
-        print(f"ELA Error: {e}")
-        return 0
-
-def clean_metadata(image: Image.Image) -> dict:
-    """Extract and analyze metadata for editing traces."""
-    meta_score = 0
-    traces = []
-    
-    try:
-        exif = image.getexif()
-        if exif:
-            for tag_id, value in exif.items():
-                tag = ExifTags.TAGS.get(tag_id, tag_id)
-                value_str = str(value).lower()
-                
-                # Look for editing software
-                if "software" in str(tag).lower():
-                    if any(x in value_str for x in ["adobe", "photoshop", "gimp", "paint", "canvas", "edit"]):
-                        meta_score = 80
-                        traces.append(f"Editing software detected: {value}")
-    except Exception:
-        pass
-        
-    return {"score": meta_score, "traces": traces}
-
-def analyze_with_local_model(image: Image.Image) -> dict:
-    """
-    Comprehensive Local Analysis (Ensemble of One)
+    Comprehensive Local Analysis
     Combines:
-    1. ViT Deepfake Model (Visual)
+    1. Detector Ensemble (Visual - ViT and any other configured detectors)
     2. ELA Analysis (Digital Artifacts)
     3. Metadata Forensics (File History)
+    
+    Only scores stage outputs: the detectors run through the batching
+    scheduler and ELA / metadata in the forensics pool (see
+    ``run_local_analysis``), never on the event loop.
     """
-    if not pipe:
+    if not model_loader.ready:
         return {"status": "error", "message": "Local model not loaded"}
     
     try:
         # 1. VSION MODEL ANALYSIS
-        results = pipe(image)
-        deepfake_score = 0
-        real_score = 0
-        
-        for r in results:
-            label = r['label'].lower()
-            score = r['score'] * 100
-            if 'fake' in label:
-                deepfake_score = score
-            elif 'real' in label or 'true' in label:
-                real_score = score
+        deepfake_score = model_results["fake_probability"] * 100
         
         # 2. ELA ANALYSIS
-        ela_score = perform_ela(image)
+        ela_score = forensics["ela_score"]
         
         # 3. METADATA ANALYSIS
-        metadata = clean_metadata(image)
+        metadata = forensics["metadata"]
         
         # --- ENSEMBLE LOGIC ---
         
@@ -519,6 +654,7 @@ def analyze_with_local_model(image: Image.Image) -> dict:
             "reasons": reasons,
             "factors": {
                 "model_score": round(deepfake_score, 2),
+                "detector_scores": {name: round(p * 100, 2) for name, p in model_results["detectors"].items()},
                 "ela_score": round(ela_score, 2),
                 "metadata_traces": len(metadata["traces"])
             }
@@ -527,6 +663,142 @@ def analyze_with_local_model(image: Image.Image) -> dict:
         print(f"Analysis Error: {e}")
         return {"status": "error", "message": str(e)}
 
+def artifact_owner(request: Request, user: Optional[dict]) -> str:
+    """Owner key for uploaded artifacts: the signed-in user, else the client IP."""
+    return f"user:{user['_id']}" if user else f"ip:{get_real_client_ip(request)}"
+
+def remember_artifacts(digest: str, owner: Optional[str] = None, **artifacts):
+    """Merge upload bytes / ELA map for ``digest`` (and its uploader) into the artifact cache."""
+    current = artifact_cache.get(digest) or {}
+    owners = current.get("owners", frozenset())
+    if owner is not None:
+        owners = owners | {owner}
+    artifact_cache.set(digest, {**current, **artifacts, "owners": owners})
+
+async def run_local_analysis(ctx: AnalysisContext) -> dict:
+    """
+    Run the local analysis without blocking the event loop.
+    
+    The detectors get the context's shared reduced-resolution decode through
+    the batching scheduler (inference threads) while ELA and metadata run
+    concurrently on the raw bytes in the forensics pool. Stage outputs are
+    kept in ``ctx.artifacts``; the downsampled ELA map also goes to the
+    artifact cache for the heatmap endpoints.
+    """
+    if not model_loader.ready:
+        return {"status": "error", "message": "Local model not loaded"}
+    
+    image = ctx.model_image() if ctx.decoded else await timed_stage("decode", run_in_inference_pool(ctx.model_image))
+    model_results, forensics = await asyncio.gather(
+        timed_stage("inference", inference_scheduler.submit(image)),
+        run_in_forensics_pool(analyze_forensics, ctx.contents, return_map=True)
+    )
+    # ELA / metadata are timed inside the forensics worker
+    for stage, seconds in forensics.get("timings", {}).items():
+        observe_stage(stage, seconds)
+    ctx.artifacts.update(model_results=model_results, forensics=forensics)
+    if forensics.get("ela_map") is not None:
+        remember_artifacts(ctx.digest, ela_map=forensics["ela_map"])
+    return analyze_with_local_model(model_results, forensics)
+
+def _context_phash(ctx: AnalysisContext) -> Tuple[int, Optional[float], float]:
+    """(phash, decode seconds or None if already decoded, hash seconds); runs in the pool."""
+    decode_seconds = None
+    if not ctx.decoded:
+        started = time.perf_counter()
+        ctx.model_image()
+        decode_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    phash = compute_phash(ctx.model_image())
+    return phash, decode_seconds, time.perf_counter() - started
+
+async def timed_stage(stage: str, awaitable):
+    """Await ``awaitable`` and record its wall time as an analysis stage."""
+    with stage_timer(stage):
+        return await awaitable
+
+async def find_near_duplicate(ctx: AnalysisContext) -> Tuple[int, dict]:
+    """
+    Hash the context's image and look up verdicts for visually identical
+    reposts (recompressed, resized, EXIF-stripped).
+    
+    Decoding and hashing share one inference-pool hop; the decoded image
+    stays on ``ctx`` for the detectors. Returns ``(phash, cached)`` where
+    ``cached`` may hold a previous analysis's local fake probability and
+    Gemini verdict under the current version (see remember_near_duplicate).
+    They are a hint only: a locally edited copy can hash within range, so
+    see ``reusable_gemini_verdict``.
+    """
+    phash, decode_seconds, hash_seconds = await run_in_inference_pool(_context_phash, ctx)
+    if decode_seconds is not None:
+        observe_stage("decode", decode_seconds)
+    observe_stage("phash", hash_seconds)
+    ctx.artifacts["phash"] = phash
+    match = phash_index.lookup(phash)
+    if match is None:
+        return phash, {}
+    payload, distance = match
+    if payload.get("version") != result_cache.version:
+        return phash, {}
+    return phash, payload
+
+def reusable_gemini_verdict(near_duplicate: dict, local_result: dict) -> Optional[dict]:
+    """
+    The near-duplicate's Gemini verdict, if this upload's fresh local score
+    still agrees with the one recorded alongside it (within
+    NEAR_DUPLICATE_MAX_DRIFT points, same verdict); otherwise None.
+    """
+    gemini = near_duplicate.get("gemini")
+    then = near_duplicate.get("local_fake")
+    now = (local_result.get("probabilities") or {}).get("fake")
+    if gemini is None or then is None or now is None:
+        return None
+    if abs(now - then) > NEAR_DUPLICATE_MAX_DRIFT or (now > 50) != (then > 50):
+        return None
+    return gemini
+
+def remember_near_duplicate(phash: int, local_result: dict, gemini_result: dict):
+    """
+    Record what a future near-duplicate needs to reuse this Gemini verdict:
+    the local fake probability it was paired with and the verdict itself
+    (is_fake, confidence and the first reasons). Full results are not kept,
+    so an index entry stays a few hundred bytes.
+    """
+    local_fake = (local_result.get("probabilities") or {}).get("fake")
+    gemini_ok = gemini_result.get("status") not in ("error", "timeout", "skipped")
+    if local_fake is None or not gemini_ok or gemini_result.get("confidence") is None:
+        return
+    gemini = {
+        "is_fake": bool(gemini_result.get("is_fake")),
+        "confidence": gemini_result["confidence"],
+        "reasons": [str(reason)[:NEAR_DUPLICATE_REASON_CHARS] for reason in (gemini_result.get("reasons") or [])[:5]],
+    }
+    phash_index.add(phash, {"version": result_cache.version, "local_fake": local_fake, "gemini": gemini}, merge=False)
+
+async def run_with_deadline(*branches, timeout: float) -> List[dict]:
+    """
+    Run analysis coroutines concurrently and collect their results.
+    
+    A branch still running after ``timeout`` seconds is cancelled and
+    reported as ``{"status": "timeout"}``; a branch that raised becomes
+    ``{"status": "error"}``. Results keep the order of ``branches``.
+    """
+    tasks = [asyncio.ensure_future(branch) for branch in branches]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    
+    results = []
+    for task in tasks:
+        if task in pending:
+            results.append({"status": "timeout", "message": f"Exceeded {timeout}s analysis budget"})
+        elif task.exception() is not None:
+            print(f"Analysis branch error: {task.exception()}")
+            results.append({"status": "error", "message": str(task.exception())})
+        else:
+            results.append(task.result())
+    return results
+
 # (Lifespan events are handled by the lifespan context manager above)
 
 # ============================================
@@ -564,11 +836,138 @@ async def health_check():
         "status": "healthy" if is_healthy else "degraded",
         "checks": {
             "database": "connected" if db_healthy else "disconnected",
-            "model": "loaded" if pipe is not None else "not_loaded",
+            "model": model_loader.state,
             "gemini": "configured" if GEMINI_API_KEY else "not_configured"
         }
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe for load balancers / orchestrators.
+    
+    Returns 200 only once the model has loaded and warmed up, 503 while it
+    is loading or warming (or failed), so traffic is routed to warm workers
+    only. Use /health for liveness.
+    """
+    body = model_loader.snapshot()
+    if not model_loader.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+    return body
+
+@app.get("/internal/stats", include_in_schema=False)
+async def internal_stats(request: Request):
+    """
+    Runtime statistics for capacity tuning.
+    
+    - model: loading / warm-up state and timings
+    - inference: scheduler queue depth, batch-size histogram, batch latency
+    - executors: thread/process pool sizing
+    - gemini: HTTP client pool state and in-flight requests
+    - cache: result cache hit/miss counters per tier
+    - near_duplicates: perceptual-hash index size and hit rate
+    - artifacts: decoded image / ELA map cache used by heatmaps
+    - jobs: background job queue depth and outcomes
+    - history: write-behind queue depth and flush latency
+    - mongo: per-command / per-collection latency, slow commands, pool checkout waits
+    - auth: user-record / JWT-payload cache hit rates
+    - cascade: how often each tier (local / gemini / ensemble) decided
+    
+    SECURITY: If METRICS_TOKEN is set, the X-Metrics-Token header must match.
+    """
+    if METRICS_TOKEN and request.headers.get("X-Metrics-Token") != METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    
+    return {
+        "model": {**model_loader.snapshot(), **local_detectors.snapshot()},
+        "inference": inference_scheduler.snapshot(),
+        "executors": executor_stats(),
+        "gemini": gemini_client.stats(),
+        "cache": result_cache.stats(),
+        "near_duplicates": phash_index.stats(),
+        "artifacts": artifact_cache.stats(),
+        "jobs": job_manager.stats(),
+        "history": history_writer.stats(),
+        "mongo": mongo_stats(),
+        "auth": auth_cache_stats(),
+        "cascade": {
+            "enabled": ENSEMBLE_CASCADE,
+            "fake_threshold": CASCADE_FAKE_THRESHOLD,
+            "real_threshold": CASCADE_REAL_THRESHOLD,
+            # ensemble / local (short-circuit) / gemini_timeout, gemini_error,
+            # local_timeout, local_error (fallbacks) / gemini_skipped
+            "decided_by": dict(cascade_counters)
+        }
+    }
+
+def collect_runtime_metrics() -> list:
+    """Bridge the runtime stats above into /metrics samples (see metrics.py)."""
+    inference = inference_scheduler.snapshot()
+    jobs = job_manager.stats()
+    history = history_writer.stats()
+    auth = auth_cache_stats()
+    mongo = mongo_stats()
+    samples = [
+        ("gauge", "model_ready", {}, int(model_loader.ready)),
+        ("gauge", "inference_queue_depth", {}, inference["queue_depth"]),
+        ("counter", "inference_batches_total", {}, inference["batches_total"]),
+        ("counter", "inference_items_total", {}, inference["items_total"]),
+        ("counter", "inference_errors_total", {}, inference["errors_total"]),
+        ("gauge", "job_queue_depth", {}, jobs["queue_depth"]),
+        ("gauge", "jobs_running", {}, jobs["running"]),
+        ("gauge", "history_queue_depth", {}, history["queue_depth"]),
+        ("counter", "history_records_written_total", {}, history["written_total"]),
+        ("counter", "history_records_dropped_total", {}, history["dropped_total"]),
+        ("gauge", "mongodb_connections_open", {}, mongo["pool"]["connections_open"]),
+        ("gauge", "mongodb_connections_checked_out", {}, mongo["pool"]["checked_out"]),
+        ("counter", "mongodb_slow_commands_total", {}, mongo["commands"]["slow_total"]),
+        ("histogram", "mongodb_pool_checkout_wait_seconds", {}, histogram_from_ms_snapshot(mongo["pool"]["checkout_wait"])),
+    ]
+    for name, snapshot in mongo["commands"]["commands"].items():
+        samples.append(("histogram", "mongodb_command_duration_seconds", {"command": name}, histogram_from_ms_snapshot(snapshot)))
+    for name, snapshot in mongo["commands"]["collections"].items():
+        samples.append(("histogram", "mongodb_collection_duration_seconds", {"collection": name}, histogram_from_ms_snapshot(snapshot)))
+    
+    # Hits and misses rather than hit rates, so workers can be summed
+    result_shared = result_cache.stats()["shared"]
+    caches = {
+        "result_memory": result_cache.memory.stats(),
+        "result_shared": result_shared,
+        "near_duplicate": phash_index.stats(),
+        "artifacts": artifact_cache.stats(),
+        "auth_users": auth["users"],
+        "auth_tokens": auth["tokens"],
+    }
+    for cache_name, stats in caches.items():
+        samples.append(("counter", "cache_hits_total", {"cache": cache_name}, stats["hits"]))
+        samples.append(("counter", "cache_misses_total", {"cache": cache_name}, stats["misses"]))
+    for outcome, count in cascade_counters.items():
+        if outcome == "gemini_skipped":
+            samples.append(("counter", "ensemble_gemini_skipped_total", {}, count))
+        else:
+            samples.append(("counter", "ensemble_decisions_total", {"outcome": outcome}, count))
+    return samples
+
+metrics.add_collector(collect_runtime_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus scrape endpoint (text exposition format), merged across
+    workers when METRICS_DIR is set.
+    
+    SECURITY: If METRICS_TOKEN is set, it must be sent as the X-Metrics-Token
+    header or as "Authorization: Bearer <token>".
+    """
+    if METRICS_TOKEN and METRICS_TOKEN not in (
+        request.headers.get("X-Metrics-Token"),
+        request.headers.get("Authorization", "").removeprefix("Bearer ").strip() or None,
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    
+    # Rendered on the event loop: the registry is only ever touched from it
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ============================================
 # Authentication Endpoints
 # ============================================
@@ -696,17 +1095,54 @@ async def get_user_statistics(user: dict = Depends(get_current_user)):
     stats = await get_user_stats(user["_id"])
     return stats
 
+HISTORY_MAX_PAGE_SIZE = 100
+
 @api_router.get("/user/history")
 async def get_analysis_history_endpoint(
+    response: Response,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    view: str = "summary",
     skip: int = 0,
     user: dict = Depends(get_current_user)
 ):
-    """Get user analysis history"""
-    analyses = await get_user_analyses(user["_id"], limit=limit, skip=skip)
+    """
+    Get user analysis history, newest first.
+    
+    Pages are requested with ``cursor``, the X-Next-Cursor header of the
+    previous page (absent on the last page). ``view=summary`` (default)
+    returns only the fields the history list shows; fetch a full analysis
+    from /user/history/{analysis_id} or pass ``view=full``. ``skip`` is the
+    legacy offset pagination, used only when no cursor is given.
+    """
+    if view not in ("summary", "full"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="view must be 'summary' or 'full'")
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    summary = view == "summary"
+    
+    if skip and not cursor:
+        return await get_user_analyses(user["_id"], limit=limit, skip=skip, summary=summary)
+    
+    try:
+        analyses, next_cursor = await get_user_history_page(user["_id"], limit=limit, cursor=cursor, summary=summary)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     # Return as array for frontend compatibility
     return analyses
 
+@api_router.get("/user/history/{analysis_id}")
+async def get_analysis_endpoint(
+    analysis_id: str,
+    user: dict = Depends(get_current_user)
+):
+    """Get one analysis from history with its full result"""
+    analysis = await get_analysis_by_id(analysis_id, user["_id"])
+    if analysis is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Analysis not found")
+    return analysis
+
 @api_router.delete("/user/history/{analysis_id}")
 async def delete_analysis_endpoint(
     analysis_id: str,
@@ -752,10 +1188,14 @@ async def gemini_proxy(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Gemini API is not configured on the server"
         )
+    if not gemini_client.started:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gemini client is not running, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
     
-    # Build the API URL with model
-    model = gemini_request.model or "gemini-2.5-flash"
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    model = gemini_request.model or GEMINI_MODEL
     
     # Build request body
     payload = {"contents": gemini_request.contents}
@@ -767,12 +1207,7 @@ async def gemini_proxy(
         payload["systemInstruction"] = gemini_request.systemInstruction
     
     try:
-        response = requests.post(
-            f"{api_url}?key={GEMINI_API_KEY}",
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=60
-        )
+        response = await gemini_client.generate_content(model, payload, timeout=60)
         
         if response.status_code == 200:
             return response.json()
@@ -783,12 +1218,12 @@ async def gemini_proxy(
                 status_code=response.status_code,
                 detail=error_data.get("error", {}).get("message", "Gemini API request failed")
             )
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="Gemini API request timed out"
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Failed to connect to Gemini API"
@@ -798,6 +1233,7 @@ async def gemini_proxy(
 @limiter.limit("10/minute")
 async def gemini_analyze_image(
     request: Request,
+    response: Response,
     analysis_request: GeminiImageAnalysisRequest,
     user: dict = Depends(get_optional_user)
 ):
@@ -810,6 +1246,12 @@ async def gemini_analyze_image(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Gemini API is not configured on the server"
         )
+    if not gemini_client.started:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gemini client is not running, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
     
     # Validate base64 size (prevent DoS)
     if len(analysis_request.image_base64) > 10_000_000:  # ~7.5MB actual
@@ -825,20 +1267,56 @@ async def gemini_analyze_image(
             detail=f"Unsupported image type: {analysis_request.mime_type}"
         )
     
+    # Only undecodable input is the client's fault (400); Gemini failures
+    # are upstream errors (502 / 504)
     try:
-        # Decode base64 to validate it's a real image
         image_bytes = base64.b64decode(analysis_request.image_base64)
-        
-        # Use server-side Gemini analysis
-        result = analyze_with_gemini(image_bytes, analysis_request.mime_type)
-        
-        return result
-        
-    except Exception as e:
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid image data"
         )
+    
+    # Identical images are served from the result cache
+    ctx = AnalysisContext(image_bytes, mime_type=analysis_request.mime_type)
+    digest = ctx.digest
+    owner = artifact_owner(request, user)
+    cache_key = result_cache.make_key("gemini", digest)
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        remember_artifacts(digest, owner)
+        response.headers["X-Cache"] = "HIT"
+        return cached
+    
+    # Reject data that is not an image (reads the header only). Near-duplicate
+    # verdicts are not reused here: without a local score there is nothing to
+    # tell a repost from a locally edited copy
+    try:
+        ctx.header
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid image data"
+        )
+    remember_artifacts(digest, owner, contents=image_bytes)
+    
+    # Use server-side Gemini analysis
+    result = await analyze_with_gemini(image_bytes, analysis_request.mime_type)
+    
+    if result.get("status") == "timeout":
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=result["message"]
+        )
+    if result.get("status") == "error":
+        print(f"Gemini analysis failed: {result.get('message')}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Gemini API request failed"
+        )
+    
+    await result_cache.set(cache_key, result)
+    return result
 
 
 # Include the API Router
@@ -848,10 +1326,53 @@ app.include_router(api_router, prefix="/api")
 # Image Analysis Endpoints (Protected & Rate Limited)
 # ============================================
 
+async def analyze_local_contents(contents: bytes, owner: Optional[str] = None) -> Tuple[dict, str]:
+    """
+    Local (detectors + ELA + metadata) verdict for raw image bytes.
+    
+    ``owner`` (see ``artifact_owner``) may fetch the heatmap for the
+    returned ``content_id``. Returns ``(response_data, cache_status)`` where
+    cache_status is MISS or HIT. Raises HTTPException(500) if the analysis
+    fails.
+    """
+    # Repeat uploads of the same bytes are served from the result cache
+    ctx = AnalysisContext(contents)
+    digest = ctx.digest
+    cache_key = result_cache.make_key("local", digest)
+    response_data = await result_cache.get(cache_key)
+    if response_data is not None:
+        remember_artifacts(digest, owner)
+        return response_data, "HIT"
+    
+    cache_status = "MISS"
+    remember_artifacts(digest, owner, contents=contents)
+    
+    # USE NEW ENHANCED ANALYSIS FUNCTION (batched ViT + pooled forensics).
+    # Always run on this upload's pixels: a near-duplicate's verdict could
+    # belong to the unedited original
+    result = await run_local_analysis(ctx)
+    
+    if result.get("status") == "error":
+        raise HTTPException(status_code=500, detail=result.get("message"))
+    
+    # Add metadata to response
+    response_data = {
+        "is_fake": result["is_fake"],
+        "confidence": result["confidence"],
+        "probabilities": result["probabilities"],
+        "reasons": result["reasons"],
+        "factors": result["factors"],
+        "method": "ensemble_local_v2",
+        "content_id": digest
+    }
+    await result_cache.set(cache_key, response_data)
+    return response_data, cache_status
+
 @app.post("/analyze-image")
 @limiter.limit("30/minute")
 async def analyze_image(
     request: Request,
+    response: Response,
     file: UploadFile = File(...),
     user: dict = Depends(get_optional_user)
 ):
@@ -860,8 +1381,12 @@ async def analyze_image(
     Combines ViT, ELA, and Metadata analysis.
     Saves result if user is authenticated.
     """
-    if not pipe:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model is not loaded.")
+    if not model_loader.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model is not ready ({model_loader.state}).",
+            headers={"Retry-After": "10"}
+        )
     
     # SECURITY: Validate MIME type BEFORE reading file
     validated_mime = validate_mime_type(file.content_type, file.filename)
@@ -877,35 +1402,19 @@ async def analyze_image(
     contents = first_chunk
     
     try:
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        # USE NEW ENHANCED ANALYSIS FUNCTION
-        result = analyze_with_local_model(image)
-        
-        if result.get("status") == "error":
-            raise HTTPException(status_code=500, detail=result.get("message"))
-            
-        # Add metadata to response
-        response_data = {
-            "is_fake": result["is_fake"],
-            "confidence": result["confidence"],
-            "probabilities": result["probabilities"],
-            "reasons": result["reasons"],
-            "factors": result["factors"],
-            "method": "ensemble_local_v2"
-        }
+        response_data, cache_status = await analyze_local_contents(contents, artifact_owner(request, user))
+        if cache_status != "MISS":
+            response.headers["X-Cache"] = cache_status
         
         # Save to history if user is logged in
         if user:
             try:
-                # Convert image to base64 for storage (optional, or just store metadata)
-                # For now we won't store the image itself to save DB space, just the result
-                await save_analysis(
-                    user_id=user["_id"],
-                    file_name=file.filename,
-                    file_type="image",
-                    result=response_data
-                )
+                # Only the result is stored, not the image itself
+                await history_writer.submit(user["_id"], {
+                    "type": "media",
+                    "contentPreview": file.filename,
+                    "result": response_data
+                })
             except Exception as e:
                 print(f"Failed to save analysis history: {e}")
         
@@ -918,20 +1427,410 @@ async def analyze_image(
         raise HTTPException(status_code=500, detail="Internal analysis error")
 
 
+# ============================================
+# Batch Analysis (streamed NDJSON)
+# ============================================
+
+# Max images per /analyze-batch request (multipart files or zip entries)
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "50"))
+# Images decoded/analyzed at once per batch request; the inference scheduler
+# still groups them (and other requests) into model batches
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", str(2 * INFERENCE_MAX_BATCH_SIZE)))
+BATCH_ZIP_MAX_BYTES = int(float(os.environ.get("BATCH_ZIP_MAX_MB", "100")) * 1024 * 1024)
+# Entries compressed better than this are rejected as likely zip bombs
+ZIP_MAX_COMPRESSION_RATIO = 100
+
+ZIP_MIME_TYPES = {"application/zip", "application/x-zip-compressed"}
+EXTENSION_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp"
+}
+
+def is_zip_upload(upload: UploadFile) -> bool:
+    mime = (upload.content_type or "").split(";")[0].strip().lower()
+    return mime in ZIP_MIME_TYPES or Path(upload.filename or "").suffix.lower() == ".zip"
+
+def read_zip_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """Read one archive member, never inflating more than the upload limit."""
+    with archive.open(info) as entry:
+        contents = entry.read(MAX_FILE_SIZE_BYTES + 1)
+    if len(contents) > MAX_FILE_SIZE_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+    return contents
+
+def collect_batch_sources(files: List[UploadFile]) -> Tuple[list, list]:
+    """
+    Expand the uploads into per-image sources without reading image data.
+    
+    Each source is ``(filename, loader)`` where ``await loader()`` returns
+    the validated bytes. Zip archives are listed from their central
+    directory only. Returns ``(sources, archives)``; close the archives when
+    the batch is done.
+    """
+    sources = []
+    archives = []
+    
+    def add(filename, loader):
+        if len(sources) >= BATCH_MAX_FILES:
+            for archive in archives:
+                archive.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Too many images. Maximum is {BATCH_MAX_FILES} per batch"
+            )
+        sources.append((filename, loader))
+    
+    for upload in files:
+        if not is_zip_upload(upload):
+            async def load_upload(upload=upload):
+                validate_mime_type(upload.content_type, upload.filename)
+                contents = await upload.read(MAX_FILE_SIZE_BYTES + 1)
+                if len(contents) > MAX_FILE_SIZE_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                return contents
+            add(upload.filename, load_upload)
+            continue
+        
+        if upload.size is not None and upload.size > BATCH_ZIP_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Archive too large. Maximum size is {BATCH_ZIP_MAX_BYTES // (1024*1024)}MB"
+            )
+        try:
+            archive = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid zip archive: {upload.filename}")
+        archives.append(archive)
+        
+        for info in archive.infolist():
+            name = info.filename
+            basename = Path(name).name
+            # Skip folders and OS metadata (__MACOSX/, .DS_Store, ._resource forks)
+            if info.is_dir() or name.startswith("__MACOSX/") or basename.startswith("."):
+                continue
+            
+            async def load_entry(archive=archive, info=info):
+                mime = EXTENSION_MIME_TYPES.get(Path(info.filename).suffix.lower())
+                if mime is None:
+                    raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Unsupported file type")
+                if info.file_size > MAX_FILE_SIZE_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                if info.compress_size and info.file_size / info.compress_size > ZIP_MAX_COMPRESSION_RATIO:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Suspicious compression ratio")
+                return await run_in_inference_pool(read_zip_entry, archive, info)
+            add(name, load_entry)
+    
+    return sources, archives
+
+async def analyze_batch_item(index: int, filename: str, loader, user: Optional[dict], owner: str) -> dict:
+    """Analyze one batch source; failures become an error line instead of aborting the batch."""
+    try:
+        contents = await loader()
+        response_data, cache_status = await analyze_local_contents(contents, owner)
+    except HTTPException as e:
+        return {"index": index, "filename": filename, "status": "error", "error": e.detail}
+    except Exception as e:
+        print(f"Batch item error ({filename}): {e}")
+        return {"index": index, "filename": filename, "status": "error", "error": "Internal analysis error"}
+    
+    if user:
+        try:
+            await history_writer.submit(user["_id"], {
+                "type": "media",
+                "contentPreview": filename,
+                "result": response_data
+            })
+        except Exception as e:
+            print(f"Failed to save analysis history: {e}")
+    
+    return {"index": index, "filename": filename, "status": "ok", "cache": cache_status, "result": response_data}
+
+async def stream_batch_results(sources: list, archives: list, user: Optional[dict], owner: str):
+    """
+    Yield one NDJSON line per image as soon as it finishes, then a summary.
+    
+    At most BATCH_MAX_IN_FLIGHT images are read/analyzed at once, so memory
+    stays bounded regardless of batch size; lines arrive in completion
+    order and carry the source ``index``.
+    """
+    started = time.perf_counter()
+    pending = set()
+    next_index = 0
+    succeeded = 0
+    try:
+        while pending or next_index < len(sources):
+            while next_index < len(sources) and len(pending) < BATCH_MAX_IN_FLIGHT:
+                filename, loader = sources[next_index]
+                pending.add(asyncio.create_task(analyze_batch_item(next_index, filename, loader, user, owner)))
+                next_index += 1
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line = task.result()
+                succeeded += line["status"] == "ok"
+                yield json.dumps(line) + "\n"
+        
+        yield json.dumps({
+            "status": "done",
+            "total": len(sources),
+            "succeeded": succeeded,
+            "failed": len(sources) - succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }) + "\n"
+    finally:
+        # Client disconnected or batch finished: stop outstanding work
+        for task in pending:
+            task.cancel()
+        for archive in archives:
+            archive.close()
+
+@app.post("/analyze-batch")
+@limiter.limit("5/minute")
+async def analyze_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    user: dict = Depends(get_optional_user)
+):
+    """
+    Analyze many images in one request with the local model.
+    
+    Accepts multiple multipart ``files`` and/or zip archives of images.
+    Responds with NDJSON (``application/x-ndjson``): one line per image as
+    soon as its verdict is ready (``index``, ``filename``, ``status``,
+    ``result`` or ``error``), then a final ``{"status": "done", ...}`` line.
+    Saves each result if user is authenticated.
+    """
+    if not model_loader.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model is not ready ({model_loader.state}).",
+            headers={"Retry-After": "10"}
+        )
+    
+    sources, archives = collect_batch_sources(files)
+    if not sources:
+        for archive in archives:
+            archive.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No images found in upload")
+    
+    return StreamingResponse(
+        stream_batch_results(sources, archives, user, artifact_owner(request, user)),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Size": str(len(sources)), "Cache-Control": "no-store"}
+    )
+
+
+# How often each tier decided the ensemble verdict (see /internal/stats)
+cascade_counters = Counter()
+
+def cascade_outcome(decided_by: str, local_result: dict, gemini_result: dict) -> str:
+    """
+    Counter key for one ensemble verdict. A single-model verdict caused by
+    the other model failing is counted as ``<failed model>_timeout`` or
+    ``<failed model>_error``, so "local" only counts cascade short-circuits.
+    """
+    if decided_by == "ensemble":
+        return decided_by
+    other = gemini_result if decided_by == "local" else local_result
+    if decided_by == "local" and other.get("status") == "skipped":
+        return decided_by
+    failed = "gemini" if decided_by == "local" else "local"
+    return f"{failed}_timeout" if other.get("status") == "timeout" else f"{failed}_error"
+
+async def analyze_ensemble_contents(
+    contents: bytes,
+    mime_type: str,
+    filename: Optional[str],
+    deadline: float = ENSEMBLE_DEADLINE_SECONDS,
+    owner: Optional[str] = None
+) -> Tuple[dict, str]:
+    """
+    Local model + Gemini ensemble verdict for raw image bytes.
+    
+    Both models run concurrently within ``deadline`` seconds; a model that
+    misses it is reported with ``timed_out: true``. With ENSEMBLE_CASCADE
+    the local model runs first and Gemini is skipped when the local verdict
+    is outside the uncertain band (``decided_by: "local"``).
+    
+    The local model always runs on the upload. A near-duplicate's Gemini
+    verdict replaces the (cancelled) Gemini call only when the fresh local
+    score agrees with the one recorded for it (``reusable_gemini_verdict``).
+    ``owner`` (see ``artifact_owner``) may fetch the heatmap for the
+    returned ``content_id``. Returns ``(result, cache_status)`` where
+    cache_status is MISS, HIT or NEAR-HIT.
+    """
+    # Repeat uploads of the same bytes are served from the result cache
+    # (cascade verdicts are cached separately from full-ensemble verdicts)
+    ctx = AnalysisContext(contents, mime_type=mime_type, filename=filename)
+    digest = ctx.digest
+    cache_key = result_cache.make_key("ensemble-cascade" if ENSEMBLE_CASCADE else "ensemble", digest)
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        remember_artifacts(digest, owner)
+        return {**cached, "filename": filename}, "HIT"
+    
+    remember_artifacts(digest, owner, contents=contents)
+    
+    # Verdicts of a visually identical, recently analyzed image (a hint only)
+    phash, near_duplicate = await find_near_duplicate(ctx)
+    cache_status = "MISS"
+    
+    async def local_branch() -> dict:
+        # Batched ViT + pooled forensics, off the event loop
+        return await run_local_analysis(ctx)
+    
+    async def gemini_branch() -> dict:
+        return await analyze_with_gemini(contents, mime_type)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    if ENSEMBLE_CASCADE:
+        # Tier 1: local model alone; Tier 2: Gemini, only for the uncertain
+        # band and only if no near-duplicate verdict still applies
+        (local_result,) = await run_with_deadline(local_branch(), timeout=deadline)
+        local_fake = (local_result.get("probabilities") or {}).get("fake")
+        reused = reusable_gemini_verdict(near_duplicate, local_result)
+        if local_fake is not None and (local_fake >= CASCADE_FAKE_THRESHOLD or local_fake <= CASCADE_REAL_THRESHOLD):
+            gemini_result = {"status": "skipped", "message": "Local model was decisive"}
+        elif reused is not None:
+            gemini_result = reused
+            cache_status = "NEAR-HIT"
+        else:
+            remaining = max(0.0, deadline - (loop.time() - started))
+            (gemini_result,) = await run_with_deadline(gemini_branch(), timeout=remaining)
+    else:
+        # Run local model and Gemini (server-side, API key protected) concurrently
+        # under one deadline; a branch that misses it is dropped from the ensemble.
+        # A still-applicable near-duplicate verdict cancels the Gemini call.
+        gemini_task = asyncio.ensure_future(gemini_branch())
+        (local_result,) = await run_with_deadline(local_branch(), timeout=deadline)
+        reused = reusable_gemini_verdict(near_duplicate, local_result)
+        if reused is not None:
+            gemini_task.cancel()
+            gemini_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            gemini_result = reused
+            cache_status = "NEAR-HIT"
+        else:
+            remaining = max(0.0, deadline - (loop.time() - started))
+            (gemini_result,) = await run_with_deadline(gemini_task, timeout=remaining)
+    # A reused verdict stays keyed to the image Gemini actually saw
+    if cache_status != "NEAR-HIT":
+        remember_near_duplicate(phash, local_result, gemini_result)
+    gemini_ok = gemini_result.get("status") not in ("error", "timeout", "skipped")
+    gemini_skipped = gemini_result.get("status") == "skipped"
+    
+    # Calculate ensemble score
+    local_fake_score = 0
+    gemini_fake_score = 0
+    models_used = []
+    reasons = []
+    
+    # Process local result (reported under the loaded detectors' registry names)
+    local_used = bool(local_result.get("probabilities"))
+    if local_used:
+        local_fake_score = local_result["probabilities"].get("fake", 0)
+        models_used.extend(local_detectors.names)
+    
+    # Process Gemini result
+    gemini_used = gemini_result.get("confidence") is not None and gemini_ok
+    if gemini_used:
+        if gemini_result.get("is_fake"):
+            gemini_fake_score = gemini_result.get("confidence", 50)
+        else:
+            gemini_fake_score = 100 - gemini_result.get("confidence", 50)
+        models_used.append("Gemini Vision")
+        if gemini_result.get("reasons"):
+            reasons.extend(gemini_result["reasons"])
+    
+    # Calculate weighted ensemble
+    if local_used and gemini_used:
+        ensemble_fake_score = (local_fake_score * 0.4) + (gemini_fake_score * 0.6)
+    elif local_used or gemini_used:
+        ensemble_fake_score = local_fake_score if local_used else gemini_fake_score
+    else:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No models available for analysis")
+    
+    # Which tier produced the verdict: local (cascade short-circuit or Gemini
+    # unavailable), gemini (local unavailable) or ensemble (both)
+    if local_used and gemini_used:
+        decided_by = "ensemble"
+    else:
+        decided_by = "local" if local_used else "gemini"
+    cascade_counters[cascade_outcome(decided_by, local_result, gemini_result)] += 1
+    if gemini_skipped:
+        cascade_counters["gemini_skipped"] += 1
+    
+    ensemble_real_score = 100 - ensemble_fake_score
+    is_fake = ensemble_fake_score > 50
+    
+    # Determine consensus
+    local_says_fake = local_fake_score > 50 if local_result.get("probabilities") else None
+    gemini_says_fake = gemini_result.get("is_fake") if gemini_ok else None
+    
+    consensus = "unknown"
+    if local_says_fake is not None and gemini_says_fake is not None:
+        if local_says_fake == gemini_says_fake:
+            consensus = "agreement"
+        else:
+            consensus = "disagreement"
+    
+    result = {
+        "filename": filename,
+        "ensemble": {
+            "is_fake": is_fake,
+            "confidence": round(max(ensemble_fake_score, ensemble_real_score), 2),
+            "fake_probability": round(ensemble_fake_score, 2),
+            "real_probability": round(ensemble_real_score, 2),
+            "consensus": consensus,
+            "verdict": "LIKELY FAKE" if is_fake else "LIKELY AUTHENTIC"
+        },
+        "models": {
+            "local": {
+                "available": bool(local_result.get("probabilities")),
+                "fake_probability": round(local_fake_score, 2) if local_result.get("probabilities") else None,
+                "real_probability": round(100 - local_fake_score, 2) if local_result.get("probabilities") else None,
+                "timed_out": local_result.get("status") == "timeout"
+            },
+            "gemini": {
+                "available": gemini_ok,
+                "fake_probability": round(gemini_fake_score, 2) if gemini_ok else None,
+                "reasons": reasons[:5] if reasons else [],
+                "timed_out": gemini_result.get("status") == "timeout",
+                "skipped": gemini_skipped
+            }
+        },
+        "models_used": models_used,
+        "decided_by": decided_by,
+        "analysis_type": "ensemble",
+        "content_id": digest
+    }
+    
+    # Only cache complete verdicts - a degraded (timed out / failed) model is retried next time
+    if (local_used and gemini_used) or gemini_skipped:
+        await result_cache.set(cache_key, {k: v for k, v in result.items() if k != "filename"})
+    
+    return result, cache_status
+
 @app.post("/analyze-ensemble")
 @limiter.limit("20/minute")
 async def analyze_ensemble(
     request: Request,
+    response: Response,
     file: UploadFile = File(...),
     user: dict = Depends(get_optional_user)
 ):
     """
     Ensemble Analysis Endpoint with security hardening.
     Combines results from:
-    1. Local HuggingFace ViT Model
+    1. Local detectors (DETECTORS, by default the Hugging Face ViT)
     2. Gemini Vision API (server-side)
     
     Includes input validation for file size and MIME type.
+    Both models run concurrently within ENSEMBLE_DEADLINE_SECONDS; a model
+    that misses the deadline is reported with ``timed_out: true``.
     """
     # SECURITY: Validate MIME type BEFORE reading file
     validated_mime = validate_mime_type(file.content_type, file.filename)
@@ -947,86 +1846,15 @@ async def analyze_ensemble(
     contents = first_chunk
     
     try:
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        # Get local model result
-        local_result = analyze_with_local_model(image)
-        
-        # Get Gemini result (server-side, API key protected)
-        gemini_result = analyze_with_gemini(contents, validated_mime)
-        
-        # Calculate ensemble score
-        local_fake_score = 0
-        gemini_fake_score = 0
-        models_used = []
-        reasons = []
-        
-        # Process local result
-        if local_result.get("probabilities"):
-            local_fake_score = local_result["probabilities"].get("fake", 0)
-            models_used.append("HuggingFace ViT")
-        
-        # Process Gemini result
-        if gemini_result.get("confidence") is not None and gemini_result.get("status") != "error":
-            if gemini_result.get("is_fake"):
-                gemini_fake_score = gemini_result.get("confidence", 50)
-            else:
-                gemini_fake_score = 100 - gemini_result.get("confidence", 50)
-            models_used.append("Gemini Vision")
-            if gemini_result.get("reasons"):
-                reasons.extend(gemini_result["reasons"])
-        
-        # Calculate weighted ensemble
-        if len(models_used) == 2:
-            ensemble_fake_score = (local_fake_score * 0.4) + (gemini_fake_score * 0.6)
-        elif len(models_used) == 1:
-            ensemble_fake_score = local_fake_score if "HuggingFace" in models_used[0] else gemini_fake_score
-        else:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No models available for analysis")
-        
-        ensemble_real_score = 100 - ensemble_fake_score
-        is_fake = ensemble_fake_score > 50
-        
-        # Determine consensus
-        local_says_fake = local_fake_score > 50 if local_result.get("probabilities") else None
-        gemini_says_fake = gemini_result.get("is_fake") if gemini_result.get("status") != "error" else None
-        
-        consensus = "unknown"
-        if local_says_fake is not None and gemini_says_fake is not None:
-            if local_says_fake == gemini_says_fake:
-                consensus = "agreement"
-            else:
-                consensus = "disagreement"
-        
-        result = {
-            "filename": file.filename,
-            "ensemble": {
-                "is_fake": is_fake,
-                "confidence": round(max(ensemble_fake_score, ensemble_real_score), 2),
-                "fake_probability": round(ensemble_fake_score, 2),
-                "real_probability": round(ensemble_real_score, 2),
-                "consensus": consensus,
-                "verdict": "LIKELY FAKE" if is_fake else "LIKELY AUTHENTIC"
-            },
-            "models": {
-                "local": {
-                    "available": bool(local_result.get("probabilities")),
-                    "fake_probability": round(local_fake_score, 2) if local_result.get("probabilities") else None,
-                    "real_probability": round(100 - local_fake_score, 2) if local_result.get("probabilities") else None
-                },
-                "gemini": {
-                    "available": gemini_result.get("status") != "error",
-                    "fake_probability": round(gemini_fake_score, 2) if gemini_result.get("status") != "error" else None,
-                    "reasons": reasons[:5] if reasons else []
-                }
-            },
-            "models_used": models_used,
-            "analysis_type": "ensemble"
-        }
+        result, cache_status = await analyze_ensemble_contents(
+            contents, validated_mime, file.filename, owner=artifact_owner(request, user)
+        )
+        if cache_status != "MISS":
+            response.headers["X-Cache"] = cache_status
         
         # Save analysis to history if user is authenticated
         if user:
-            await save_analysis(user["_id"], {
+            await history_writer.submit(user["_id"], {
                 "type": "media",
                 "contentPreview": file.filename,
                 "result": result
@@ -1041,10 +1869,445 @@ async def analyze_ensemble(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to analyze image")
 
 
+# ============================================
+# Video Analysis
+# ============================================
 
+async def analyze_video_stream(source, deadline: float = VIDEO_DEADLINE_SECONDS) -> dict:
+    """
+    Stream-decode a video, sample frames adaptively and score them with the
+    local detectors until the verdict stabilizes.
+    
+    Sampled frames are pulled from a generator one model batch at a time;
+    the next batch is decoded while the current one is in the model, so at
+    most two batches of (downscaled) frames are in memory at once.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    
+    video_info = await run_in_inference_pool(probe_video, source)
+    source.seek(0)
+    
+    decode_stats = {}
+    frames = iter_sampled_frames(source, stats=decode_stats)
+    tracker = ConfidenceTracker()
+    timeline = []
+    stop_reason = "end_of_video"
+    
+    def next_batch():
+        return run_in_inference_pool(take_frames, frames, INFERENCE_MAX_BATCH_SIZE)
+    
+    pending = asyncio.ensure_future(next_batch())
+    try:
+        while True:
+            batch = await pending
+            pending = None
+            batch = batch[:tracker.max_frames - tracker.count]
+            if not batch:
+                break
+            
+            # Decode ahead while this batch goes through the inference scheduler
+            pending = asyncio.ensure_future(next_batch())
+            outputs = await asyncio.gather(*(inference_scheduler.submit(image) for _, _, image in batch))
+            for (timestamp, reason, _), output in zip(batch, outputs):
+                tracker.add(output["fake_probability"])
+                timeline.append({
+                    "t": round(timestamp, 2),
+                    "reason": reason,
+                    "fake_probability": round(output["fake_probability"] * 100, 2)
+                })
+            del batch, outputs
+            
+            if tracker.stable:
+                stop_reason = "stable"
+                break
+            if tracker.exhausted:
+                stop_reason = "max_frames"
+                break
+            if loop.time() - started > deadline:
+                stop_reason = "deadline"
+                break
+    finally:
+        # The generator must not be closed while a worker thread is advancing it
+        if pending is not None:
+            try:
+                await pending
+            except Exception:
+                pass
+        await run_in_inference_pool(frames.close)
+    
+    if tracker.count == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No decodable frames in video")
+    
+    fake_score = tracker.mean * 100
+    is_fake = fake_score > 50
+    return {
+        "is_fake": is_fake,
+        "confidence": round(fake_score if is_fake else 100 - fake_score, 2),
+        "probabilities": {
+            "real": round(100 - fake_score, 2),
+            "fake": round(fake_score, 2)
+        },
+        "video": video_info,
+        "frames_analyzed": tracker.count,
+        "frames_decoded": decode_stats.get("decoded", 0),
+        "stop_reason": stop_reason,
+        "confidence_interval": round(tracker.half_width * 100, 2) if tracker.count > 1 else None,
+        "frames": timeline,
+        "elapsed_ms": round((loop.time() - started) * 1000, 1),
+        "method": "video_local_v1"
+    }
 
+@app.post("/analyze-video")
+@limiter.limit("10/minute")
+async def analyze_video(
+    request: Request,
+    file: UploadFile = File(...),
+    user: dict = Depends(get_optional_user)
+):
+    """
+    Analyze a video upload server-side with the local detectors.
+    
+    Frames are decoded as a stream and sampled at scene changes (plus at
+    least one every VIDEO_SAMPLE_INTERVAL_SECONDS); analysis stops early once
+    the mean fake probability is stable. Saves result if user is authenticated.
+    """
+    if not PYAV_AVAILABLE:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Video analysis is not available on this server")
+    if not model_loader.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model is not ready ({model_loader.state}).",
+            headers={"Retry-After": "10"}
+        )
+    
+    mime = (file.content_type or "").split(";")[0].strip().lower()
+    if mime not in VIDEO_MIME_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported file type: {mime}. Allowed types: {', '.join(sorted(VIDEO_MIME_TYPES))}"
+        )
+    if file.size is not None and file.size > VIDEO_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {VIDEO_MAX_BYTES // (1024*1024)}MB"
+        )
+    
+    try:
+        # The multipart parser already spooled the upload; decode straight from it
+        result = await analyze_video_stream(file.file)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Video analysis error: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not decode video")
+    
+    result["filename"] = file.filename
+    if user:
+        try:
+            await history_writer.submit(user["_id"], {
+                "type": "media",
+                "contentPreview": file.filename,
+                "result": result
+            })
+        except Exception as e:
+            print(f"Failed to save analysis history: {e}")
+    
+    return result
 
+# ============================================
+# Background Analysis Jobs
+# ============================================
+
+# Jobs are not tied to an HTTP connection, so models get a longer budget
+JOB_ENSEMBLE_DEADLINE_SECONDS = float(os.environ.get("JOB_ENSEMBLE_DEADLINE_SECONDS", "60"))
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+JOB_POLL_INTERVAL_SECONDS = 2
+
+async def save_job_history(payload: dict, result: dict):
+    """Save a finished job's result for the user who submitted it."""
+    if not payload.get("user_id"):
+        return
+    try:
+        await history_writer.submit(payload["user_id"], {
+            "type": "media",
+            "contentPreview": payload["filename"],
+            "result": result
+        })
+    except Exception as e:
+        print(f"Failed to save analysis history: {e}")
+
+async def run_ensemble_job(payload: dict) -> dict:
+    result, _ = await analyze_ensemble_contents(
+        payload["contents"],
+        payload["mime_type"],
+        payload["filename"],
+        deadline=JOB_ENSEMBLE_DEADLINE_SECONDS,
+        owner=payload["artifact_owner"]
+    )
+    await save_job_history(payload, result)
+    return result
+
+async def run_local_job(payload: dict) -> dict:
+    result, _ = await analyze_local_contents(payload["contents"], payload["artifact_owner"])
+    await save_job_history(payload, result)
+    return result
+
+# Job state in memory (single worker) or MongoDB (JOB_STORE=mongo, any worker can answer polls)
+job_manager = JobManager(
+    create_job_store(get_database),
+    handlers={"ensemble": run_ensemble_job, "local": run_local_job}
+)
+
+def serialize_job(job: dict) -> dict:
+    """Public view of a job document."""
+    def iso(value):
+        return value.isoformat() + "Z" if value else None
+    return {
+        "job_id": job["_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "filename": job.get("filename"),
+        "created_at": iso(job.get("created_at")),
+        "started_at": iso(job.get("started_at")),
+        "finished_at": iso(job.get("finished_at")),
+        "result": job.get("result"),
+        "error": job.get("error")
+    }
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("20/minute")
+async def submit_job(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    mode: str = Form("ensemble"),
+    user: dict = Depends(get_optional_user)
+):
+    """
+    Queue an analysis and return a job id immediately.
+    
+    ``mode`` is ``ensemble`` (local model + Gemini) or ``local``. Poll
+    ``GET /jobs/{job_id}`` for status and result. Returns 503 when the
+    queue is full. Saves the result if user is authenticated.
+    """
+    if mode not in ("ensemble", "local"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="mode must be 'ensemble' or 'local'")
+    if mode == "local" and not model_loader.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model is not ready ({model_loader.state}).",
+            headers={"Retry-After": "10"}
+        )
+    
+    # SECURITY: Validate MIME type BEFORE reading file
+    validated_mime = validate_mime_type(file.content_type, file.filename)
+    
+    contents = await file.read(MAX_FILE_SIZE_BYTES + 1)
+    if len(contents) > MAX_FILE_SIZE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE_BYTES // (1024*1024)}MB"
+        )
+    
+    try:
+        job = await job_manager.submit(
+            mode,
+            {
+                "contents": contents,
+                "mime_type": validated_mime,
+                "filename": file.filename,
+                "user_id": user["_id"] if user else None,
+                "artifact_owner": artifact_owner(request, user)
+            },
+            owner=user["_id"] if user else None,
+            filename=file.filename
+        )
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        print(f"Job submit error: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job queue unavailable")
+    
+    poll_url = f"/jobs/{job['_id']}"
+    response.headers["Location"] = poll_url
+    response.headers["Retry-After"] = str(JOB_POLL_INTERVAL_SECONDS)
+    return {"job_id": job["_id"], "status": job["status"], "poll_url": poll_url}
+
+@app.get("/jobs/{job_id}")
+@limiter.limit("120/minute")
+async def get_job(
+    request: Request,
+    response: Response,
+    job_id: str,
+    user: dict = Depends(get_optional_user)
+):
+    """
+    Job status and, once finished, its result or error.
+    
+    Jobs submitted by a signed-in user are only visible to that user.
+    """
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    try:
+        job = await job_manager.get(job_id)
+    except Exception as e:
+        print(f"Job lookup error: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job store unavailable")
+    
+    # Same 404 for other users' jobs so ids cannot be probed
+    if job is None or (job.get("owner") and (not user or job["owner"] != user["_id"])):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    if job["status"] in (QUEUED, RUNNING):
+        response.headers["Retry-After"] = str(JOB_POLL_INTERVAL_SECONDS)
+    return serialize_job(job)
+
+# ============================================
+# ELA Heatmap Endpoints (Lazy, Streamed)
+# ============================================
+
+HEATMAP_CHUNK_SIZE = 64 * 1024
+CONTENT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+def validate_heatmap_params(max_dim: int, format: str) -> str:
+    """Validate heatmap size/format query parameters; returns the normalized format."""
+    fmt = format.lower()
+    if fmt not in HEATMAP_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported heatmap format: {format}. Allowed formats: {', '.join(HEATMAP_FORMATS)}"
+        )
+    if not 32 <= max_dim <= HEATMAP_MAX_DIM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"max_dim must be between 32 and {HEATMAP_MAX_DIM}"
+        )
+    return fmt
+
+async def build_ela_heatmap(
+    digest: str,
+    contents: Optional[bytes],
+    max_dim: int,
+    fmt: str,
+    owner: Optional[str] = None
+) -> bytes:
+    """
+    Render the ELA heatmap for ``digest``, reusing the cached ELA map when it
+    is at least as detailed as requested and computing it otherwise.
+    ``owner`` is recorded as an uploader of ``digest``.
+    """
+    artifacts = artifact_cache.get(digest) or {}
+    contents = contents if contents is not None else artifacts.get("contents")
+    ela_map = artifacts.get("ela_map")
+    
+    needs_detail = (
+        ela_map is not None and contents is not None
+        and max(ela_map.shape) < max_dim and max(image_size(contents)) > max(ela_map.shape)
+    )
+    if ela_map is None or needs_detail:
+        if contents is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No recent analysis for this content. Upload the image to /ela-heatmap instead."
+            )
+        try:
+            # Full-resolution decode happens only here, in the forensics pool
+            ela_map = await run_in_forensics_pool(
+                ela_map_from_bytes, contents, map_max_dim=max(max_dim, ELA_MAP_MAX_DIM)
+            )
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image data")
+        remember_artifacts(digest, owner, contents=contents, ela_map=ela_map)
+    elif owner is not None:
+        remember_artifacts(digest, owner)
+    
+    return await run_in_inference_pool(render_ela_heatmap, ela_map, max_dim, fmt)
+
+def stream_heatmap(data: bytes, fmt: str, digest: str) -> StreamingResponse:
+    """Stream encoded heatmap bytes in fixed-size chunks."""
+    def iter_chunks():
+        view = memoryview(data)
+        for offset in range(0, len(view), HEATMAP_CHUNK_SIZE):
+            yield bytes(view[offset:offset + HEATMAP_CHUNK_SIZE])
+    
+    _, media_type = HEATMAP_FORMATS[fmt]
+    return StreamingResponse(
+        iter_chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Length": str(len(data)),
+            "Cache-Control": "private, max-age=600",
+            "X-Content-Id": digest
+        }
+    )
+
+@app.get("/ela-heatmap/{content_id}")
+@limiter.limit("30/minute")
+async def ela_heatmap_for_content(
+    request: Request,
+    content_id: str,
+    max_dim: int = 512,
+    format: str = "png",
+    user: dict = Depends(get_optional_user)
+):
+    """
+    ELA heatmap for an image analyzed recently by this worker.
+    
+    ``content_id`` is the value returned by /analyze-image or
+    /analyze-ensemble. The cached upload bytes and ELA map are reused, so
+    only colorizing, downscaling and encoding happen here. Only the caller
+    who uploaded the image (same account, or same client IP when signed
+    out) can fetch it.
+    """
+    fmt = validate_heatmap_params(max_dim, format)
+    if not CONTENT_ID_PATTERN.match(content_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid content id")
+    
+    # Same 404 for other callers' uploads so content ids cannot be probed
+    artifacts = artifact_cache.get(content_id) or {}
+    if artifact_owner(request, user) not in artifacts.get("owners", ()):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No recent analysis for this content. Upload the image to /ela-heatmap instead."
+        )
+    
+    data = await build_ela_heatmap(content_id, None, max_dim, fmt)
+    return stream_heatmap(data, fmt, content_id)
 
+@app.post("/ela-heatmap")
+@limiter.limit("20/minute")
+async def ela_heatmap_for_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    max_dim: int = 512,
+    format: str = "png",
+    user: dict = Depends(get_optional_user)
+):
+    """
+    ELA heatmap for an uploaded image, returned as a PNG/WebP stream.
+    
+    Reuses cached artifacts when the same bytes were analyzed recently;
+    output is downscaled to at most ``max_dim`` pixels per side.
+    """
+    fmt = validate_heatmap_params(max_dim, format)
+    validate_mime_type(file.content_type, file.filename)
+    
+    contents = await file.read(MAX_FILE_SIZE_BYTES + 1)
+    if len(contents) > MAX_FILE_SIZE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE_BYTES // (1024*1024)}MB"
+        )
+    
+    digest = content_digest(contents)
+    data = await build_ela_heatmap(digest, contents, max_dim, fmt, artifact_owner(request, user))
+    return stream_heatmap(data, fmt, digest)
 
 
 # ============================================
@@ -1120,8 +2383,8 @@ def attach_spa(target_app: FastAPI):
             if response.status_code == 404 and request.method == "GET":
                 path = request.url.path
                 
-                # Don't intercept API or docs paths - they should stay 404
-                if path.startswith("/api") or path.startswith("/docs") or path.startswith("/openapi"):
+                # Don't intercept API, docs or backend-only paths - they should stay 404
+                if path.startswith(("/api", "/docs", "/openapi", "/internal", "/ela-heatmap", "/jobs/")):
                     return response
                 
                 # Don't intercept asset requests - they should stay 404
@@ -0,0 +1,278 @@
+"""
+Prometheus Metrics for DeFraudAI
+Request counts and latency per route, per-stage analysis timings and bridged
+runtime statistics (queues, caches, MongoDB), rendered in the Prometheus
+text exposition format by ``GET /metrics``.
+
+Each worker process aggregates into plain dicts (recorded from the event
+loop only, so no locks on the hot path). With several uvicorn workers, set
+METRICS_DIR to a directory shared by them: every worker periodically writes
+its snapshot there and a scrape of any worker merges all snapshots.
+Counters and histograms are summed across workers; gauges are reported per
+worker (``worker="<pid>"``) for live processes only. Clear the directory
+when the service is redeployed.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# ============================================
+# Configuration
+# ============================================
+
+# Shared directory for multi-worker aggregation (unset = this process only)
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUESTS = "http_requests_total"
+HTTP_DURATION = "http_request_duration_seconds"
+STAGE_DURATION = "analysis_stage_duration_seconds"
+
+Labels = Tuple[Tuple[str, str], ...]
+# A bridged sample from a collector: (kind, name, labels, value). kind is
+# "counter" or "gauge", or "histogram" with value = (bounds, cumulative
+# counts ending with the total, sum)
+Sample = Tuple[str, str, Dict[str, Any], Any]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# ============================================
+# Per-Worker Registry
+# ============================================
+
+class MetricsRegistry:
+    """
+    Counters and fixed-bucket histograms for one worker, plus collectors
+    that bridge existing ``stats()`` snapshots at scrape time.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_SECONDS):
+        self.buckets = buckets
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self.descriptions: Dict[str, str] = {
+            HTTP_REQUESTS: "HTTP requests by route, method and status",
+            HTTP_DURATION: "HTTP request latency by route and method",
+            STAGE_DURATION: "Time spent in each analysis stage",
+        }
+        self.collectors: List[Callable[[], List[Sample]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def describe(self, name: str, description: str):
+        self.descriptions[name] = description
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels(labels))
+        values = self.histograms.get(key)
+        if values is None:
+            values = self.histograms[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(self.buckets)] += 1
+        values[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block (awaits included)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def add_collector(self, collector: Callable[[], List[Sample]]):
+        """Register a function returning bridged samples at scrape time."""
+        self.collectors.append(collector)
+
+    # ----- snapshots -----
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state of this worker (own metrics + collectors)."""
+        samples = []
+        for (name, labels), value in self.counters.items():
+            samples.append(["counter", name, dict(labels), value])
+        for (name, labels), values in self.histograms.items():
+            cumulative, running = [], 0.0
+            for count in values[:-1]:
+                running += count
+                cumulative.append(running)
+            samples.append(["histogram", name, dict(labels), [list(self.buckets), cumulative, values[-1]]])
+        for collector in self.collectors:
+            try:
+                samples.extend([kind, name, labels, value] for kind, name, labels, value in collector())
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return {"pid": os.getpid(), "time": time.time(), "descriptions": self.descriptions, "samples": samples}
+
+    def write_snapshot(self, directory: str = METRICS_DIR):
+        """Atomically publish this worker's snapshot for the other workers."""
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _snapshots(self, directory: str) -> List[Dict[str, Any]]:
+        own = self.snapshot()
+        snapshots = [own]
+        if not directory or not os.path.isdir(directory):
+            return snapshots
+        for filename in os.listdir(directory):
+            if not (filename.startswith("worker-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("pid") != own["pid"]:
+                snapshots.append(snapshot)
+        return snapshots
+
+    # ----- exposition -----
+
+    def render(self, directory: str = METRICS_DIR) -> str:
+        """Prometheus text format, merged over all workers' snapshots."""
+        merged: Dict[str, Dict[Labels, Any]] = {}
+        kinds: Dict[str, str] = {}
+        descriptions: Dict[str, str] = {}
+
+        for snapshot in self._snapshots(directory):
+            alive = _pid_alive(snapshot["pid"])
+            descriptions.update(snapshot.get("descriptions", {}))
+            for kind, name, labels, value in snapshot["samples"]:
+                if kind == "gauge":
+                    if not alive:
+                        continue
+                    labels = {**labels, "worker": snapshot["pid"]}
+                kinds.setdefault(name, kind)
+                series = merged.setdefault(name, {})
+                key = _labels(labels)
+                if kind == "histogram":
+                    bounds, cumulative, total = value
+                    current = series.get(key)
+                    if current is None or current[0] != bounds:
+                        series[key] = [bounds, list(cumulative), total]
+                    else:
+                        current[1] = [a + b for a, b in zip(current[1], cumulative)]
+                        current[2] += total
+                else:
+                    series[key] = series.get(key, 0) + value
+
+        lines = []
+        for name in sorted(merged):
+            kind = kinds[name]
+            if name in descriptions:
+                lines.append(f"# HELP {name} {descriptions[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(merged[name].items()):
+                if kind == "histogram":
+                    bounds, cumulative, total = value
+                    for bound, count in zip(list(bounds) + ["+Inf"], cumulative):
+                        le = bound if bound == "+Inf" else _format_number(bound)
+                        lines.append(f"{name}_bucket{_render_labels(labels + (('le', le),))} {_format_number(count)}")
+                    lines.append(f"{name}_sum{_render_labels(labels)} {_format_number(total)}")
+                    lines.append(f"{name}_count{_render_labels(labels)} {_format_number(cumulative[-1])}")
+                else:
+                    lines.append(f"{name}{_render_labels(labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    # ----- lifecycle -----
+
+    async def start(self):
+        """Publish snapshots every METRICS_FLUSH_SECONDS (only with METRICS_DIR)."""
+        if METRICS_DIR and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="metrics-writer")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            self.write_snapshot()
+        except OSError as e:
+            print(f"Failed to write metrics snapshot: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"Failed to write metrics snapshot: {e}")
+            await asyncio.sleep(METRICS_FLUSH_SECONDS)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _render_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# ============================================
+# Bridging Helpers
+# ============================================
+
+def histogram_from_ms_snapshot(snapshot: Dict[str, Any]) -> Tuple[List[float], List[float], float]:
+    """Convert a mongo_monitoring.LatencyHistogram snapshot (ms) to seconds."""
+    buckets = snapshot["buckets"]
+    bounds = [float(bound) / 1000.0 for bound in buckets if bound != "+Inf"]
+    cumulative = [buckets[bound] for bound in buckets]
+    return bounds, cumulative, snapshot["sum_ms"] / 1000.0
+
+
+metrics = MetricsRegistry()
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record one analysis stage timing (call from the event loop)."""
+    metrics.observe(STAGE_DURATION, seconds, stage=stage)
+
+
+def stage_timer(stage: str):
+    """``with stage_timer("gemini"): ...`` records the block as an analysis stage."""
+    return metrics.timer(STAGE_DURATION, stage=stage)
@@ -0,0 +1,213 @@
+"""
+MongoDB Driver Instrumentation for DeFraudAI
+PyMongo event listeners (passed to the Motor client) that record command
+latency per command and per collection, log slow commands, and track
+connection-pool checkout waits.
+
+Listeners run on Motor's worker threads, so all state is lock-protected.
+Only command names, collections and timings are recorded: command bodies
+(which may contain user data) are never logged.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+# ============================================
+# Configuration
+# ============================================
+
+# Commands slower than this are logged (0 disables slow-command logging)
+MONGODB_SLOW_QUERY_MS = float(os.getenv("MONGODB_SLOW_QUERY_MS", "100"))
+
+# Histogram upper bounds in milliseconds (a final +Inf bucket is implicit)
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Driver-internal commands that would only add noise
+_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions"}
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus layout); not thread-safe."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float):
+        for i, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.count:
+            return None
+        target = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets_ms, self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets": cumulative,
+        }
+
+
+# ============================================
+# Command Latency
+# ============================================
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Per-command and per-collection latency histograms plus slow-command log."""
+
+    def __init__(self, slow_ms: float = MONGODB_SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        # (request_id, connection_id) -> collection, for commands in flight
+        self._in_flight: Dict[Tuple[int, Any], Optional[str]] = {}
+        self.by_command: Dict[str, LatencyHistogram] = {}
+        self.by_collection: Dict[str, LatencyHistogram] = {}
+        self.failures: Dict[str, int] = {}
+        self.slow_total = 0
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        collection = f"{event.database_name}.{target}" if isinstance(target, str) else None
+        with self._lock:
+            self._in_flight[(event.request_id, event.connection_id)] = collection
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        duration_ms = event.duration_micros / 1000.0
+        with self._lock:
+            collection = self._in_flight.pop((event.request_id, event.connection_id), None)
+            self.by_command.setdefault(event.command_name, LatencyHistogram()).observe(duration_ms)
+            if collection:
+                self.by_collection.setdefault(collection, LatencyHistogram()).observe(duration_ms)
+            if failed:
+                self.failures[event.command_name] = self.failures.get(event.command_name, 0) + 1
+            slow = self.slow_ms > 0 and duration_ms >= self.slow_ms
+            if slow:
+                self.slow_total += 1
+        if slow:
+            print(
+                f"🐢 Slow MongoDB {event.command_name} on {collection or event.database_name}: "
+                f"{duration_ms:.1f} ms{' (failed)' if failed else ''}"
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "slow_threshold_ms": self.slow_ms,
+                "slow_total": self.slow_total,
+                "failures": dict(self.failures),
+                "commands": {name: hist.snapshot() for name, hist in sorted(self.by_command.items())},
+                "collections": {name: hist.snapshot() for name, hist in sorted(self.by_collection.items())},
+            }
+
+
+# ============================================
+# Connection Pool
+# ============================================
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Checkout wait times, checkout failures and open-connection count."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = LatencyHistogram()
+        self.checkout_failures: Dict[str, int] = {}
+        self.connections_open = 0
+        self.connections_created = 0
+        self.checked_out = 0
+
+    def connection_checked_out(self, event):
+        # ``duration`` is reported by PyMongo >= 4.7
+        duration = getattr(event, "duration", None)
+        with self._lock:
+            self.checked_out += 1
+            if duration is not None:
+                self.checkout_wait.observe(duration * 1000.0)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures[str(event.reason)] = self.checkout_failures.get(str(event.reason), 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    # Events that carry nothing we report
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "checked_out": self.checked_out,
+                "checkout_failures": dict(self.checkout_failures),
+                "checkout_wait": self.checkout_wait.snapshot(),
+            }
+
+
+command_listener = CommandLatencyListener()
+pool_listener = PoolListener()
+
+
+def event_listeners() -> List[Any]:
+    """Listeners to pass to the Motor client (``event_listeners=...``)."""
+    return [command_listener, pool_listener]
+
+
+def mongo_stats() -> Dict[str, Any]:
+    return {"commands": command_listener.snapshot(), "pool": pool_listener.snapshot()}
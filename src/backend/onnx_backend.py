@@ -0,0 +1,246 @@
+"""
+ONNX Runtime Inference Backend for DeFraudAI
+Exports the Hugging Face ViT detector to ONNX (optionally with dynamic int8
+weight quantization) and serves it through ONNX Runtime on CPU, behind the
+same call interface as the transformers ``image-classification`` pipeline.
+
+onnx / onnxruntime are optional dependencies; they are imported lazily so
+the torch backend keeps working without them.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image
+
+# ============================================
+# Configuration
+# ============================================
+
+# torch | onnx | onnx-int8
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+ONNX_BACKENDS = ("onnx", "onnx-int8")
+
+ONNX_MODEL_DIR = os.getenv(
+    "ONNX_MODEL_DIR",
+    str(Path(__file__).resolve().parent / ".cache" / "onnx")
+)
+# 0 lets ONNX Runtime use every available core
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_OPSET = 17
+
+# Max absolute difference in class probability accepted by the parity check
+ONNX_PARITY_TOLERANCE = {
+    "onnx": float(os.getenv("ONNX_PARITY_TOLERANCE", "0.001")),
+    "onnx-int8": float(os.getenv("ONNX_INT8_PARITY_TOLERANCE", "0.05")),
+}
+
+
+def onnx_available() -> bool:
+    """True when onnxruntime (and the onnx package used for export) can be imported."""
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def model_paths(model_id: str, model_dir: str = ONNX_MODEL_DIR) -> Dict[str, Path]:
+    """Locations of the exported fp32 and int8 graphs for ``model_id``."""
+    base = Path(model_dir) / model_id.replace("/", "--")
+    return {"onnx": base / "model.onnx", "onnx-int8": base / "model.int8.onnx"}
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def synthetic_images(count: int, size: int = 224, seed: int = 0) -> List[Image.Image]:
+    """Deterministic noise images for warm-up, parity checks and benchmarks."""
+    rng = np.random.default_rng(seed)
+    return [
+        Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8), mode="RGB")
+        for _ in range(count)
+    ]
+
+
+# ============================================
+# Export & Quantization
+# ============================================
+
+def export_onnx(model_id: str, output_path: Path) -> Path:
+    """Trace the PyTorch model to ONNX with a dynamic batch dimension."""
+    import torch
+    from transformers import AutoModelForImageClassification
+
+    model = AutoModelForImageClassification.from_pretrained(model_id)
+    model.eval()
+
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, pixel_values):
+            return self.inner(pixel_values=pixel_values).logits
+
+    size = model.config.image_size
+    dummy = torch.zeros(1, model.config.num_channels, size, size)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output_path.with_suffix(".tmp.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            (dummy,),
+            str(tmp),
+            input_names=["pixel_values"],
+            output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+        )
+    os.replace(tmp, output_path)
+    print(f"📦 Exported {model_id} to {output_path}")
+    return output_path
+
+
+def quantize_onnx(source: Path, output_path: Path) -> Path:
+    """Dynamic int8 quantization of MatMul/Gemm weights (activations stay fp32)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp = output_path.with_suffix(".tmp.onnx")
+    quantize_dynamic(str(source), str(tmp), weight_type=QuantType.QInt8)
+    os.replace(tmp, output_path)
+    print(f"📦 Quantized {source.name} to {output_path}")
+    return output_path
+
+
+# ============================================
+# ONNX Runtime Classifier
+# ============================================
+
+class OnnxImageClassifier:
+    """
+    Callable drop-in for ``pipeline("image-classification")``.
+
+    ``classifier(image)`` returns ``[{"label", "score"}, ...]`` sorted by
+    score; ``classifier([images], batch_size=n)`` returns one such list per
+    image. Preprocessing uses the model's own image processor so inputs
+    match what the PyTorch pipeline feeds the network.
+    """
+
+    def __init__(self, model_id: str, onnx_path: Path, intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoImageProcessor
+
+        self.model_id = model_id
+        self.onnx_path = Path(onnx_path)
+        self.processor = AutoImageProcessor.from_pretrained(model_id)
+        config = AutoConfig.from_pretrained(model_id)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        # Requests are already batched by the scheduler; one graph runs at a time
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(str(self.onnx_path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_pixels(self, pixel_values: np.ndarray) -> np.ndarray:
+        """Class probabilities for already-normalized NCHW float32 input."""
+        (logits,) = self.session.run(None, {self.input_name: pixel_values})
+        return _softmax(logits)
+
+    def predict_proba(self, images: Sequence[Image.Image]) -> np.ndarray:
+        """Class probabilities, shape (len(images), num_labels)."""
+        rgb = [image if image.mode == "RGB" else image.convert("RGB") for image in images]
+        pixel_values = self.processor(images=rgb, return_tensors="np")["pixel_values"].astype(np.float32)
+        return self.predict_pixels(pixel_values)
+
+    def __call__(
+        self,
+        images: Union[Image.Image, Sequence[Image.Image]],
+        batch_size: Optional[int] = None,
+    ) -> Union[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+        single = isinstance(images, Image.Image)
+        batch = [images] if single else list(images)
+        step = batch_size or len(batch) or 1
+
+        results = []
+        for start in range(0, len(batch), step):
+            for probs in self.predict_proba(batch[start:start + step]):
+                order = np.argsort(-probs)
+                results.append([{"label": self.labels[i], "score": float(probs[i])} for i in order])
+        return results[0] if single else results
+
+
+# ============================================
+# Parity Check
+# ============================================
+
+def check_parity(candidate, reference, images: Sequence[Image.Image], tolerance: float) -> Dict[str, Any]:
+    """
+    Compare per-label scores of two pipeline-style classifiers.
+
+    Returns the max absolute score difference, top-label agreement and
+    whether the difference is within ``tolerance``.
+    """
+    expected = reference(list(images), batch_size=len(images))
+    actual = candidate(list(images), batch_size=len(images))
+    if len(images) == 1 and expected and isinstance(expected[0], dict):
+        expected = [expected]
+
+    max_diff = 0.0
+    agree = 0
+    for ref, got in zip(expected, actual):
+        ref_scores = {r["label"]: r["score"] for r in ref}
+        got_scores = {r["label"]: r["score"] for r in got}
+        max_diff = max(max_diff, max(abs(ref_scores[label] - got_scores.get(label, 0.0)) for label in ref_scores))
+        agree += ref[0]["label"] == got[0]["label"]
+
+    return {
+        "images": len(images),
+        "max_abs_diff": round(max_diff, 6),
+        "top_label_agreement": round(agree / len(images), 4) if images else None,
+        "tolerance": tolerance,
+        "passed": max_diff <= tolerance,
+    }
+
+
+def load_onnx_classifier(model_id: str, backend: str = "onnx", model_dir: str = ONNX_MODEL_DIR) -> OnnxImageClassifier:
+    """
+    Load the ONNX classifier for ``backend`` ("onnx" or "onnx-int8"),
+    exporting / quantizing on first use.
+
+    A freshly built graph is parity-checked against the PyTorch pipeline
+    and discarded (RuntimeError) if its scores drift beyond tolerance.
+    """
+    if backend not in ONNX_BACKENDS:
+        raise ValueError(f"Unknown ONNX backend: {backend}")
+
+    paths = model_paths(model_id, model_dir)
+    target = paths[backend]
+    if target.exists():
+        return OnnxImageClassifier(model_id, target)
+
+    if not paths["onnx"].exists():
+        export_onnx(model_id, paths["onnx"])
+    if backend == "onnx-int8":
+        quantize_onnx(paths["onnx"], target)
+
+    from transformers import pipeline
+
+    classifier = OnnxImageClassifier(model_id, target)
+    reference = pipeline("image-classification", model=model_id)
+    parity = check_parity(classifier, reference, synthetic_images(8), ONNX_PARITY_TOLERANCE[backend])
+    print(f"🔬 ONNX parity ({backend}): max_abs_diff={parity['max_abs_diff']}, top_label_agreement={parity['top_label_agreement']}")
+    if not parity["passed"]:
+        target.unlink(missing_ok=True)
+        raise RuntimeError(f"{backend} scores differ from PyTorch by {parity['max_abs_diff']} (tolerance {parity['tolerance']})")
+    return classifier
@@ -0,0 +1,276 @@
+"""
+Perceptual Hashing for DeFraudAI
+DCT-based 64-bit perceptual hashes and a bounded Hamming-distance index,
+used to reuse verdicts for recompressed, resized or EXIF-stripped reposts.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshot merges are not serialized across processes
+    fcntl = None
+
+import numpy as np
+from PIL import Image
+
+# ============================================
+# Configuration
+# ============================================
+
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "4"))  # bits out of 64
+PHASH_INDEX_SIZE = int(os.getenv("PHASH_INDEX_SIZE", "50000"))
+PHASH_TTL_SECONDS = int(os.getenv("PHASH_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+PHASH_INDEX_PATH = os.getenv(
+    "PHASH_INDEX_PATH",
+    str(Path(__file__).resolve().parent / ".cache" / "phash_index.npz")
+)
+
+HASH_SIZE = 8
+HIGHFREQ_FACTOR = 4
+_IMG_SIZE = HASH_SIZE * HIGHFREQ_FACTOR
+
+# Thumbnails with less contrast than this (grey-level std) carry no
+# structure: their hash would be noise, or 0 for a uniform image
+PHASH_MIN_CONTRAST = 2.0
+# A median-thresholded hash sets about half its bits; far fewer (or far
+# more) means most low-frequency coefficients tied, as for flat images
+PHASH_MIN_BITS = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis so the 2-D transform is two matrix products."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(_IMG_SIZE)
+_BIT_WEIGHTS = (np.uint64(1) << np.arange(HASH_SIZE * HASH_SIZE, dtype=np.uint64))
+
+# Popcount lookup for each byte value
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def compute_phash(image: Image.Image) -> int:
+    """
+    64-bit pHash: grayscale 32x32 thumbnail -> 2-D DCT -> top-left 8x8
+    low-frequency block compared against its median.
+
+    Flat or near-uniform images hash to 0; see ``is_informative``.
+    """
+    # reducing_gap lets PIL box-reduce large images cheaply before resampling
+    thumb = image.convert("L").resize((_IMG_SIZE, _IMG_SIZE), Image.BILINEAR, reducing_gap=2.0)
+    pixels = np.asarray(thumb, dtype=np.float32)
+    if pixels.std() < PHASH_MIN_CONTRAST:
+        return 0
+    dct = _DCT @ pixels @ _DCT.T
+    low = dct[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low)
+    return int(np.bitwise_or.reduce(_BIT_WEIGHTS[bits])) if bits.any() else 0
+
+
+def is_informative(phash: int) -> bool:
+    """
+    False for hashes of flat / low-variance images, which would otherwise
+    be "near duplicates" of every other such image.
+    """
+    bits = bin(phash).count("1")
+    return PHASH_MIN_BITS <= bits <= HASH_SIZE * HASH_SIZE - PHASH_MIN_BITS
+
+
+def hamming_distances(hashes: np.ndarray, query: int) -> np.ndarray:
+    """Bit distance between ``query`` and every entry of a uint64 array."""
+    xor = np.bitwise_xor(hashes, np.uint64(query))
+    return _POPCOUNT8[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+# ============================================
+# Hamming Index
+# ============================================
+
+class PerceptualHashIndex:
+    """
+    Bounded LRU index from perceptual hash to a cached verdict payload.
+
+    Hashes live in a contiguous uint64 array so a lookup is a single
+    vectorized XOR + popcount over every entry. Uninformative hashes (see
+    ``is_informative``) are never stored or matched. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        capacity: int = PHASH_INDEX_SIZE,
+        max_distance: int = PHASH_MAX_DISTANCE,
+        ttl_seconds: int = PHASH_TTL_SECONDS,
+    ):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._expires = np.zeros(capacity, dtype=np.float64)  # 0 = free slot
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        self._slot_by_hash: Dict[int, int] = {}
+        self._lru: "OrderedDict[int, None]" = OrderedDict()  # slots, oldest first
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self.uninformative = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_hash)
+
+    def lookup(self, phash: int) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Return ``(payload, distance)`` for the nearest live entry within range."""
+        with self._lock:
+            if not is_informative(phash):
+                self.uninformative += 1
+                return None
+            if not self._slot_by_hash:
+                self.misses += 1
+                return None
+            now = time.time()
+            distances = hamming_distances(self._hashes, phash)
+            distances[self._expires <= now] = 255
+            slot = int(np.argmin(distances))
+            distance = int(distances[slot])
+            if distance > self.max_distance:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(slot)
+            self.hits += 1
+            return self._payloads[slot], distance
+
+    def add(self, phash: int, payload: Dict[str, Any], merge: bool = True):
+        """Insert or update the entry for ``phash`` (payload keys are merged by default)."""
+        if not is_informative(phash):
+            return
+        with self._lock:
+            slot = self._slot_by_hash.get(phash)
+            if slot is None:
+                if not self._free:
+                    self._evict(next(iter(self._lru)))
+                slot = self._free.pop()
+                self._slot_by_hash[phash] = slot
+                self._hashes[slot] = np.uint64(phash)
+                self._payloads[slot] = {}
+            if merge:
+                self._payloads[slot].update(payload)
+            else:
+                self._payloads[slot] = dict(payload)
+            self._expires[slot] = time.time() + self.ttl_seconds
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def _evict(self, slot: int):
+        phash = int(self._hashes[slot])
+        self._slot_by_hash.pop(phash, None)
+        self._payloads.pop(slot, None)
+        self._lru.pop(slot, None)
+        self._expires[slot] = 0
+        self._free.append(slot)
+
+    # ----- Persistence -----
+
+    def _entries(self) -> List[Tuple[int, float, Dict[str, Any]]]:
+        """Live ``(phash, expires_at, payload)`` entries, least recently used first."""
+        with self._lock:
+            now = time.time()
+            return [
+                (int(self._hashes[slot]), float(self._expires[slot]), dict(self._payloads[slot]))
+                for slot in self._lru if self._expires[slot] > now
+            ]
+
+    def save(self, path: str = PHASH_INDEX_PATH):
+        """
+        Merge live entries into the .npz snapshot at ``path``.
+
+        Every worker saves on shutdown, so the file on disk is re-read under
+        an exclusive lock and combined with this worker's entries (the later
+        expiry wins per hash; the most recent ``capacity`` entries are kept).
+        Each process writes its own temporary file before the atomic rename.
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target.with_suffix(".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = {phash: (expires_at, payload) for phash, expires_at, payload in _read_snapshot(target)}
+            for phash, expires_at, payload in self._entries():
+                if phash not in merged or merged[phash][0] <= expires_at:
+                    merged[phash] = (expires_at, payload)
+            now = time.time()
+            entries = sorted(
+                ((phash, expires_at, payload) for phash, (expires_at, payload) in merged.items() if expires_at > now),
+                key=lambda entry: entry[1],
+            )[-self.capacity:]
+
+            with tempfile.NamedTemporaryFile(dir=target.parent, prefix=f"{target.stem}.", suffix=".tmp.npz", delete=False) as tmp:
+                np.savez_compressed(
+                    tmp,
+                    hashes=np.array([entry[0] for entry in entries], dtype=np.uint64),
+                    expires=np.array([entry[1] for entry in entries], dtype=np.float64),
+                    payloads=np.array(json.dumps([entry[2] for entry in entries], default=str)),
+                )
+            try:
+                os.replace(tmp.name, target)
+            except OSError:
+                os.unlink(tmp.name)
+                raise
+        print(f"🧷 Saved {len(entries)} perceptual hashes to {target}")
+
+    def load(self, path: str = PHASH_INDEX_PATH):
+        """Restore a snapshot written by ``save``; missing or corrupt files are ignored."""
+        target = Path(path)
+        loaded = 0
+        for phash, expires_at, payload in _read_snapshot(target):
+            if expires_at <= time.time() or not is_informative(phash):
+                continue
+            self.add(phash, payload, merge=False)
+            with self._lock:
+                self._expires[self._slot_by_hash[phash]] = expires_at
+            loaded += 1
+        if loaded:
+            print(f"🧷 Loaded {loaded} perceptual hashes from {target}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "uninformative": self.uninformative,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def _read_snapshot(target: Path) -> List[Tuple[int, float, Dict[str, Any]]]:
+    """Entries of an .npz snapshot; a missing or corrupt file reads as empty."""
+    if not target.exists():
+        return []
+    try:
+        with np.load(target, allow_pickle=False) as data:
+            hashes = data["hashes"]
+            expires = data["expires"]
+            payloads = json.loads(str(data["payloads"]))
+    except Exception as e:
+        print(f"⚠️  Could not read perceptual hash index {target}: {e}")
+        return []
+    return [
+        (int(phash), float(expires_at), payload)
+        for phash, expires_at, payload in zip(hashes.tolist(), expires.tolist(), payloads)
+    ]
@@ -0,0 +1,39 @@
+"""
+Shared pytest setup for the backend unit tests.
+
+The backend modules are flat (imported as ``database``, ``cache``...), so
+the backend directory goes on sys.path. Tests never touch MongoDB or the
+models: see fake_mongo.py for the in-memory collection stand-in.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# database.py refuses to import without a signing key
+os.environ.setdefault("JWT_SECRET_KEY", "test-only-secret")
+
+import database  # noqa: E402
+from fake_mongo import FakeDatabase  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """An empty in-memory database installed as ``database.db``."""
+    fake = FakeDatabase()
+    monkeypatch.setattr(database, "db", fake)
+    monkeypatch.setattr(database, "USER_STATS_MODE", "counters")
+    return fake
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop."""
+    return asyncio.run
@@ -0,0 +1,263 @@
+"""
+Minimal in-memory stand-in for the Motor collection methods database.py
+uses. Filters support equality, $in, $exists, comparisons, $not and $or;
+cursors support sort, skip and limit; projections and the $set, $inc,
+$unset and $setOnInsert updates work on dotted paths. An upsert whose filter misses an
+existing _id fails with a duplicate key, as in MongoDB. ``aggregate``
+applies a leading $match and hands the matched documents and the
+remaining stages to ``aggregate_handler`` (an async function the test
+provides).
+"""
+
+import copy
+import operator
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+_COMPARISONS = {"$lt": operator.lt, "$lte": operator.le, "$gt": operator.gt, "$gte": operator.ge}
+
+
+def _condition_holds(present: bool, value: Any, condition: Any) -> bool:
+    if not (isinstance(condition, dict) and any(key.startswith("$") for key in condition)):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$exists" and present != bool(operand):
+            return False
+        if op == "$not" and _condition_holds(present, value, operand):
+            return False
+        if op in _COMPARISONS and not (present and _COMPARISONS[op](value, operand)):
+            return False
+    return True
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+        elif not _condition_holds(field in document, document.get(field), condition):
+            return False
+    return True
+
+
+def _parent(document: Dict[str, Any], path: str):
+    *parents, leaf = path.split(".")
+    for name in parents:
+        document = document.setdefault(name, {})
+    return document, leaf
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(document)
+    if all(not include for include in projection.values()):
+        projected = copy.deepcopy(document)
+        for path in projection:
+            *parents, leaf = path.split(".")
+            parent = projected
+            for name in parents:
+                parent = parent.get(name) if isinstance(parent, dict) else None
+            if isinstance(parent, dict):
+                parent.pop(leaf, None)
+        return projected
+    projected = {"_id": copy.deepcopy(document["_id"])} if "_id" in document else {}
+    for path, include in projection.items():
+        if not include:
+            continue
+        source, target = document, projected
+        *parents, leaf = path.split(".")
+        for name in parents:
+            source = source.get(name)
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(name, {})
+        else:
+            if leaf in source:
+                target[leaf] = copy.deepcopy(source[leaf])
+    return projected
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class _Cursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self._documents.sort(key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self._documents = self._documents[count:]
+        return self
+
+    def limit(self, count):
+        self._documents = self._documents[:count]
+        return self
+
+    def __aiter__(self):
+        self._iterator = iter(self._documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        # Set to an exception to make the next insert_many raise it after writing
+        self.fail_after_insert: Optional[Exception] = None
+        self.aggregate_handler = None
+        # Fields behaving like single-field unique indexes (besides _id)
+        self.unique_fields: List[str] = []
+
+    def _conflicts(self, document) -> bool:
+        if document["_id"] in self.documents:
+            return True
+        return any(
+            field in document and any(other.get(field) == document[field] for other in self.documents.values())
+            for field in self.unique_fields
+        )
+
+    def _find(self, query):
+        return [doc for doc in self.documents.values() if _matches(doc, query)]
+
+    def _apply(self, document, update, inserting):
+        for path, value in update.get("$set", {}).items():
+            parent, leaf = _parent(document, path)
+            parent[leaf] = value
+        for path, value in update.get("$inc", {}).items():
+            parent, leaf = _parent(document, path)
+            parent[leaf] = parent.get(leaf, 0) + value
+        for path in update.get("$unset", {}):
+            parent, leaf = _parent(document, path)
+            parent.pop(leaf, None)
+        if inserting:
+            for path, value in update.get("$setOnInsert", {}).items():
+                parent, leaf = _parent(document, path)
+                parent[leaf] = value
+
+    def _update(self, query, update, upsert):
+        """The updated (or upserted) document, or None if nothing matched."""
+        found = self._find(query)
+        if found:
+            self._apply(found[0], update, inserting=False)
+            return found[0]
+        if not upsert:
+            return None
+        document = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        if document["_id"] in self.documents:
+            raise DuplicateKeyError("duplicate key", 11000)
+        self._apply(document, update, inserting=True)
+        self.documents[document["_id"]] = document
+        return document
+
+    async def insert_one(self, document):
+        document.setdefault("_id", ObjectId())
+        if self._conflicts(document):
+            raise DuplicateKeyError("duplicate key", 11000)
+        self.documents[document["_id"]] = copy.deepcopy(document)
+        return _Result(inserted_id=document["_id"])
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        for index, document in enumerate(documents):
+            if self._conflicts(document):
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.documents[document["_id"]] = copy.deepcopy(document)
+        if self.fail_after_insert is not None:
+            error, self.fail_after_insert = self.fail_after_insert, None
+            raise error
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+        return _Result(inserted_ids=[document["_id"] for document in documents])
+
+    def find(self, query=None, projection=None):
+        return _Cursor([_project(doc, projection) for doc in self._find(query or {})])
+
+    def aggregate(self, pipeline):
+        collection = self
+
+        async def rows():
+            stages = list(pipeline)
+            documents = [copy.deepcopy(doc) for doc in collection._find(stages.pop(0)["$match"])]
+            for row in await collection.aggregate_handler(documents, stages):
+                yield row
+
+        return rows()
+
+    async def find_one(self, query, projection=None):
+        found = self._find(query)
+        return _project(found[0], projection) if found else None
+
+    async def update_one(self, query, update, upsert=False):
+        matched = len(self._find(query)[:1])
+        document = self._update(query, update, upsert)
+        upserted_id = document["_id"] if document is not None and not matched else None
+        return _Result(matched_count=matched, upserted_id=upserted_id)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        found = self._find(query)
+        if not found and not upsert:
+            return _Result(matched_count=0)
+        _id = found[0]["_id"] if found else query["_id"]
+        self.documents[_id] = {"_id": _id, **copy.deepcopy(replacement)}
+        return _Result(matched_count=len(found[:1]))
+
+    async def bulk_write(self, requests, ordered=True):
+        errors = []
+        for index, request in enumerate(requests):
+            try:
+                self._update(request._filter, request._doc, request._upsert)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=ReturnDocument.BEFORE):
+        found = self._find(query)
+        before = copy.deepcopy(found[0]) if found else None
+        after = self._update(query, update, upsert)
+        return copy.deepcopy(after) if return_document == ReturnDocument.AFTER and after is not None else before
+
+    async def find_one_and_delete(self, query, projection=None):
+        found = self._find(query)
+        if not found:
+            return None
+        del self.documents[found[0]["_id"]]
+        return _project(found[0], projection)
+
+    async def delete_one(self, query):
+        found = self._find(query)
+        if found:
+            del self.documents[found[0]["_id"]]
+        return _Result(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query):
+        found = self._find(query)
+        for document in found:
+            del self.documents[document["_id"]]
+        return _Result(deleted_count=len(found))
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        collection = self[name] = FakeCollection()
+        return collection
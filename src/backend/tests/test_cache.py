@@ -0,0 +1,118 @@
+import pytest
+
+import cache
+from cache import LRUCache, content_digest, estimate_size
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for TTL tests."""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def sized(max_bytes=100, ttl=60, max_entries=None):
+    # Every value "weighs" its integer value, so byte budgets are easy to reason about
+    return LRUCache(max_bytes, ttl, max_entries=max_entries, sizeof=lambda value: value)
+
+
+def test_get_returns_stored_value_and_counts_hits_and_misses():
+    lru = sized()
+    lru.set("a", 10)
+
+    assert lru.get("a") == 10
+    assert lru.get("missing") is None
+    assert (lru.hits, lru.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted_when_over_budget():
+    lru = sized(max_bytes=30)
+    lru.set("a", 10)
+    lru.set("b", 10)
+    lru.set("c", 10)
+    lru.get("a")  # "b" is now the least recently used
+
+    lru.set("d", 10)
+
+    assert lru.get("b") is None
+    assert [lru.get(key) for key in ("a", "c", "d")] == [10, 10, 10]
+    assert lru.current_bytes == 30
+    assert lru.evictions == 1
+
+
+def test_max_entries_bounds_the_cache_independently_of_bytes():
+    lru = sized(max_bytes=10_000, max_entries=2)
+    for key in ("a", "b", "c"):
+        lru.set(key, 1)
+
+    assert len(lru) == 2
+    assert lru.get("a") is None
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    lru = sized(max_bytes=50)
+    lru.set("small", 10)
+    lru.set("huge", 51)
+
+    assert lru.get("huge") is None
+    assert lru.get("small") == 10
+
+
+def test_overwrite_replaces_size_accounting():
+    lru = sized()
+    lru.set("a", 40)
+    lru.set("a", 5)
+
+    assert lru.current_bytes == 5
+    assert len(lru) == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    lru = sized(ttl=10)
+    lru.set("default", 1)
+    lru.set("short", 1, ttl_seconds=2)
+
+    clock[0] += 5
+    assert lru.get("short") is None
+    assert lru.get("default") == 1
+
+    clock[0] += 6
+    assert lru.get("default") is None
+    assert lru.current_bytes == 0
+
+
+def test_delete_and_clear():
+    lru = sized()
+    lru.set("a", 1)
+    lru.set("b", 2)
+
+    lru.delete("a")
+    lru.delete("never-set")
+    assert lru.get("a") is None
+    assert lru.current_bytes == 2
+
+    lru.clear()
+    assert len(lru) == 0
+    assert lru.current_bytes == 0
+
+
+def test_stats_report_hit_rate():
+    lru = sized()
+    assert lru.stats()["hit_rate"] is None
+
+    lru.set("a", 1)
+    lru.get("a")
+    lru.get("b")
+    stats = lru.stats()
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 1
+
+
+def test_content_digest_is_sha256_hex():
+    assert content_digest(b"") == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+def test_estimate_size_handles_json_and_unserializable_values():
+    assert estimate_size({"a": 1}) == len('{"a": 1}')
+    assert estimate_size({"when": object()}) > 0
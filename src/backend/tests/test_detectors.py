@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import detectors
+from detectors import Detector, DetectorEnsemble
+
+
+class FallbackDetector(Detector):
+    """Configured for an accelerated backend; falls back to another on load."""
+
+    name = "fallback"
+    input_size = 8
+
+    def __init__(self, weight: float = 1.0):
+        super().__init__(weight)
+        self.backend = "onnx-int8"
+
+    @property
+    def version(self) -> str:
+        return f"fallback@{self.backend}"
+
+    def load(self):
+        self.backend = "torch"
+
+    def predict(self, pixels):
+        return np.full(len(pixels), 0.25)
+
+
+class BrokenDetector(Detector):
+    name = "broken"
+
+    def load(self):
+        raise OSError("weights missing")
+
+    def predict(self, pixels):
+        raise AssertionError("never loaded")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setitem(detectors.DETECTOR_REGISTRY, "fallback", FallbackDetector)
+    monkeypatch.setitem(detectors.DETECTOR_REGISTRY, "broken", BrokenDetector)
+
+
+def test_detectors_must_implement_load_and_predict():
+    class Incomplete(Detector):
+        def load(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_version_reflects_what_actually_loaded(registry):
+    ensemble = DetectorEnsemble(["fallback", "broken"], weights={})
+    assert ensemble.version == "fallback@onnx-int8+broken"
+
+    ensemble.load()
+
+    assert ensemble.version == "fallback@torch"
+    assert ensemble.names == ["fallback"]
+    assert ensemble.failed == {"broken": "weights missing"}
+
+
+def test_unknown_detector_names_are_rejected(registry):
+    with pytest.raises(ValueError, match="nope"):
+        DetectorEnsemble(["fallback", "nope"], weights={})
+
+
+def test_predict_reports_combined_and_per_detector_scores(registry):
+    ensemble = DetectorEnsemble(["fallback"], weights={}).load()
+
+    (result,) = ensemble.predict([Image.new("RGB", (16, 16))])
+
+    assert result == {"fake_probability": 0.25, "detectors": {"fallback": 0.25}}
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import forensics
+from forensics import compute_ela
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("90,75", (90, 75)),
+    (" 95 , 80,", (95, 80)),
+    ("", forensics.DEFAULT_ELA_QUALITIES),
+    (",", forensics.DEFAULT_ELA_QUALITIES),
+    ("high", forensics.DEFAULT_ELA_QUALITIES),
+    ("90,0", forensics.DEFAULT_ELA_QUALITIES),
+    ("101", forensics.DEFAULT_ELA_QUALITIES),
+])
+def test_ela_qualities_are_validated(raw, expected):
+    assert forensics._parse_qualities(raw) == expected
+
+
+def test_chroma_only_edit_raises_the_ela_score():
+    rng = np.random.default_rng(0)
+    base = Image.fromarray((rng.random((16, 16, 3)) * 255).astype(np.uint8)).resize((256, 256), Image.BILINEAR)
+    pixels = np.array(base)
+    # Swap red and blue in one block: luminance barely changes, colour does
+    pixels[96:160, 96:160] = pixels[96:160, 96:160, ::-1]
+    edited = Image.fromarray(pixels)
+
+    assert compute_ela(edited)["score"] > compute_ela(base)["score"]
+
+
+def test_ela_map_is_bounded_by_map_max_dim():
+    result = compute_ela(Image.new("RGB", (1024, 512), (120, 60, 30)), return_map=True, map_max_dim=128)
+
+    assert 0 <= result["score"] <= 100
+    assert max(result["map"].shape) <= 128
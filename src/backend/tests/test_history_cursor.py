@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+import database
+
+
+def seed_history(db, count, user_id="u1", same_timestamp=False):
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    documents = []
+    for i in range(count):
+        document = database.build_analysis_document(user_id, {"type": "media", "result": {"confidence": i}})
+        document["timestamp"] = start if same_timestamp else start + timedelta(minutes=i)
+        db["analysis_history"].documents[document["_id"]] = document
+        documents.append(document)
+    return documents
+
+
+async def all_pages(user_id, limit):
+    pages, cursor = [], None
+    while True:
+        analyses, cursor = await database.get_user_history_page(user_id, limit=limit, cursor=cursor)
+        pages.append([analysis["id"] for analysis in analyses])
+        if cursor is None:
+            return pages
+
+
+def newest_first(documents):
+    ordered = sorted(documents, key=lambda d: (d["timestamp"], d["_id"]), reverse=True)
+    return [str(document["_id"]) for document in ordered]
+
+
+# ----- token encoding -----
+
+def test_cursor_round_trips_timestamp_and_id():
+    document = {"timestamp": datetime(2026, 3, 4, 5, 6, 7, 891000), "_id": ObjectId()}
+
+    token = database.encode_history_cursor(document)
+
+    assert "=" not in token
+    assert database.decode_history_cursor(token) == (document["timestamp"], document["_id"])
+
+
+def test_cursor_accepts_a_stringified_id():
+    object_id = ObjectId()
+    token = database.encode_history_cursor({"timestamp": datetime(2026, 1, 1), "_id": str(object_id)})
+
+    assert database.decode_history_cursor(token)[1] == object_id
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    "bm9waXBl",  # "nopipe"
+    "MjAyNi0wMS0wMXxub3QtYW4taWQ",  # "2026-01-01|not-an-id"
+    "eWVzdGVyZGF5fDY1MDAwMDAwMDAwMDAwMDAwMDAwMDAwMA",  # "yesterday|6500..."
+    "YXxifGM",  # "a|b|c"
+])
+def test_malformed_cursors_raise_value_error(token):
+    with pytest.raises(ValueError):
+        database.decode_history_cursor(token)
+
+
+# ----- keyset paging -----
+
+def test_pages_cover_history_newest_first_without_gaps_or_repeats(db, run):
+    documents = seed_history(db, 7)
+
+    pages = run(all_pages("u1", limit=3))
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == newest_first(documents)
+
+
+def test_documents_sharing_a_timestamp_are_paged_by_id(db, run):
+    documents = seed_history(db, 5, same_timestamp=True)
+
+    pages = run(all_pages("u1", limit=2))
+
+    assert sum(pages, []) == newest_first(documents)
+
+
+def test_exact_multiple_of_the_page_size_has_no_empty_trailing_page(db, run):
+    seed_history(db, 4)
+
+    pages = run(all_pages("u1", limit=2))
+
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_pages_only_include_the_requesting_user(db, run):
+    mine = seed_history(db, 2, user_id="u1")
+    seed_history(db, 3, user_id="u2")
+
+    assert run(all_pages("u1", limit=10)) == [newest_first(mine)]
+
+
+def test_summary_pages_carry_only_the_verdict_fields(db, run):
+    (document,) = seed_history(db, 1)
+    document["result"].update({"is_fake": True, "trustScore": 12, "reasons": ["..."], "heatmap": "base64..."})
+
+    (summary,), _ = run(database.get_user_history_page("u1", limit=5))
+    (full,), _ = run(database.get_user_history_page("u1", limit=5, summary=False))
+
+    assert set(summary) == {"_id", "id", "user_id", "timestamp", "type", "content_preview", "result"}
+    assert summary["result"] == {"is_fake": True, "trustScore": 12, "confidence": 0}
+    assert full["result"] == document["result"]
+    assert "metadata" in full
+
+
+def test_page_with_malformed_cursor_raises_value_error(db, run):
+    with pytest.raises(ValueError):
+        run(database.get_user_history_page("u1", cursor="garbage"))
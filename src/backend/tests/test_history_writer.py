@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+import database
+import history_writer
+from history_writer import HistoryWriter
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(history_writer.asyncio, "sleep", lambda seconds: real_sleep(0))
+
+
+def analysis(user_id="u1"):
+    return database.build_analysis_document(user_id, {"type": "media", "result": {}})
+
+
+def total(db, user_id="u1"):
+    return db[database.USER_STATS_COLLECTION].documents.get(user_id, {}).get("total", 0)
+
+
+# ----- insert_analyses -----
+
+def test_insert_writes_and_counts_every_document(db, run):
+    documents = [analysis(), analysis()]
+
+    assert run(database.insert_analyses(documents)) == []
+    assert len(db["analysis_history"].documents) == 2
+    assert total(db) == 2
+
+
+def test_duplicates_from_an_earlier_attempt_count_as_written(db, run):
+    documents = [analysis(), analysis(), analysis()]
+    # Written by an attempt that raised before counting them
+    for document in documents[:2]:
+        db["analysis_history"].documents[document["_id"]] = dict(document)
+
+    assert run(database.insert_analyses(documents)) == []
+    assert total(db) == 3
+
+
+def test_partial_write_before_a_network_error_is_counted_on_retry(db, run):
+    documents = [analysis(), analysis()]
+    db["analysis_history"].fail_after_insert = AutoReconnect("connection reset")
+
+    with pytest.raises(AutoReconnect):
+        run(database.insert_analyses(documents))
+    assert total(db) == 0
+
+    assert run(database.insert_analyses(documents)) == []
+    assert total(db) == 2
+
+
+def test_non_duplicate_write_errors_are_returned_for_retry(db, run):
+    documents = [analysis(), analysis()]
+    db["analysis_history"].fail_after_insert = BulkWriteError({"writeErrors": [{"index": 1, "code": 91}]})
+
+    failed = run(database.insert_analyses(documents))
+
+    assert failed == [documents[1]]
+    assert total(db) == 1
+
+
+# ----- HistoryWriter -----
+
+async def _submit_all(writer, count):
+    await writer.start()
+    ids = [await writer.submit("u1", {"type": "media", "result": {}}) for _ in range(count)]
+    await writer.stop()
+    return ids
+
+
+def test_writer_batches_submissions_and_drains_on_stop(db, run):
+    writer = HistoryWriter(enabled=True, batch_size=10, flush_interval_ms=50)
+
+    ids = run(_submit_all(writer, 5))
+
+    assert sorted(ids) == sorted(str(_id) for _id in db["analysis_history"].documents)
+    stats = writer.stats()
+    assert stats["written_total"] == 5
+    assert stats["queue_depth"] == 0
+    assert total(db) == 5
+
+
+def test_writer_retries_after_a_failed_flush_without_double_counting(db, run):
+    db["analysis_history"].fail_after_insert = AutoReconnect("connection reset")
+    writer = HistoryWriter(enabled=True, batch_size=10, flush_interval_ms=10)
+
+    run(_submit_all(writer, 3))
+
+    assert writer.retries_total == 1
+    assert writer.written_total == 3
+    assert total(db) == 3
+
+
+def test_writer_drops_a_batch_after_max_attempts(db, monkeypatch, run):
+    async def always_fail(documents):
+        raise AutoReconnect("down")
+
+    monkeypatch.setattr(history_writer, "insert_analyses", always_fail)
+    writer = HistoryWriter(enabled=True, batch_size=10, flush_interval_ms=10)
+
+    run(_submit_all(writer, 2))
+
+    assert writer.dropped_total == 2
+    assert writer.retries_total == history_writer.HISTORY_MAX_ATTEMPTS - 1
+
+
+def test_full_queue_applies_backpressure(db, run):
+    writer = HistoryWriter(enabled=True, queue_size=2, batch_size=1, flush_interval_ms=0)
+
+    run(_submit_all(writer, 6))
+
+    assert writer.written_total == 6
+    assert writer.backpressure_waits > 0
+
+
+def test_disabled_writer_saves_inline(db, run):
+    writer = HistoryWriter(enabled=False)
+
+    (inserted_id,) = run(_submit_all(writer, 1))
+
+    assert inserted_id in {str(_id) for _id in db["analysis_history"].documents}
+    assert total(db) == 1
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference import BatchScheduler
+
+
+async def _with_scheduler(scheduler, body):
+    await scheduler.start()
+    try:
+        return await body()
+    finally:
+        await scheduler.stop()
+
+
+def test_concurrent_submits_share_one_batch(run):
+    batches = []
+
+    def predict(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=50)
+    results = run(_with_scheduler(scheduler, lambda: asyncio.gather(*(scheduler.submit(i) for i in range(5)))))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert scheduler.items_total == 5
+
+
+def test_batches_are_capped_at_max_batch_size(run):
+    batches = []
+
+    def predict(items):
+        batches.append(len(items))
+        return list(items)
+
+    scheduler = BatchScheduler(predict, max_batch_size=3, max_wait_ms=50)
+    results = run(_with_scheduler(scheduler, lambda: asyncio.gather(*(scheduler.submit(i) for i in range(7)))))
+
+    assert results == list(range(7))
+    assert max(batches) <= 3
+    assert sum(batches) == 7
+
+
+def test_lone_request_is_not_held_past_max_wait(run):
+    scheduler = BatchScheduler(lambda items: list(items), max_batch_size=8, max_wait_ms=20)
+
+    async def body():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await scheduler.submit("only")
+        return result, loop.time() - started
+
+    result, elapsed = run(_with_scheduler(scheduler, body))
+    assert result == "only"
+    assert elapsed < 1.0
+
+
+def test_prediction_error_fails_every_caller_in_the_batch(run):
+    def predict(items):
+        raise ValueError("bad batch")
+
+    scheduler = BatchScheduler(predict, max_batch_size=4, max_wait_ms=20)
+
+    async def body():
+        return await asyncio.gather(*(scheduler.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = run(_with_scheduler(scheduler, body))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert scheduler.errors_total == 1
+
+
+def test_output_count_mismatch_is_an_error(run):
+    scheduler = BatchScheduler(lambda items: [], max_batch_size=2, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="returned 0 results for 1 inputs"):
+        run(_with_scheduler(scheduler, lambda: scheduler.submit(1)))
+
+
+def test_submit_requires_a_running_scheduler(run):
+    scheduler = BatchScheduler(lambda items: list(items))
+
+    with pytest.raises(RuntimeError, match="not running"):
+        run(scheduler.submit(1))
+
+
+def test_stop_fails_requests_still_queued(run):
+    release = threading.Event()
+
+    def predict(items):
+        release.wait(5)
+        return list(items)
+
+    scheduler = BatchScheduler(predict, max_batch_size=1, max_wait_ms=0)
+
+    async def body():
+        await scheduler.start()
+        first = asyncio.ensure_future(scheduler.submit("running"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(scheduler.submit("queued"))
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        release.set()
+        return await asyncio.gather(first, queued, return_exceptions=True)
+
+    first, queued = run(body())
+    assert isinstance(first, RuntimeError)
+    assert isinstance(queued, RuntimeError)
+
+
+def test_stop_fails_requests_in_a_batch_still_being_collected(run):
+    scheduler = BatchScheduler(lambda items: list(items), max_batch_size=4, max_wait_ms=5000)
+
+    async def body():
+        await scheduler.start()
+        collecting = asyncio.ensure_future(scheduler.submit("waiting for company"))
+        await asyncio.sleep(0.05)
+        assert scheduler.queue_depth == 0  # taken off the queue by the collector
+        await scheduler.stop()
+        return await asyncio.wait_for(asyncio.gather(collecting, return_exceptions=True), 1)
+
+    (result,) = run(body())
+    assert isinstance(result, RuntimeError)
+
+
+def test_invalid_batch_size_is_rejected():
+    with pytest.raises(ValueError):
+        BatchScheduler(lambda items: items, max_batch_size=0)
@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+import metrics as metrics_module
+from metrics import MetricsRegistry, histogram_from_ms_snapshot
+from mongo_monitoring import LatencyHistogram
+
+OTHER_PID = 999_999
+
+
+def lines(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def other_worker(directory, samples, pid=OTHER_PID):
+    path = directory / f"worker-{pid}.json"
+    path.write_text(json.dumps({"pid": pid, "time": 0, "descriptions": {}, "samples": samples}))
+
+
+@pytest.fixture
+def alive(monkeypatch):
+    """Pids treated as live workers; everything else is dead."""
+    pids = {os.getpid(), OTHER_PID}
+    monkeypatch.setattr(metrics_module, "_pid_alive", lambda pid: pid in pids)
+    return pids
+
+
+# ----- single worker -----
+
+def test_counters_render_with_sorted_labels_and_help():
+    registry = MetricsRegistry()
+    registry.inc("http_requests_total", route="/b", method="GET", status=200)
+    registry.inc("http_requests_total", 2, route="/a", method="GET", status=200)
+
+    text = registry.render(directory="")
+
+    assert "# HELP http_requests_total HTTP requests by route, method and status" in text
+    assert "# TYPE http_requests_total counter" in text
+    assert lines(text) == [
+        'http_requests_total{method="GET",route="/a",status="200"} 2',
+        'http_requests_total{method="GET",route="/b",status="200"} 1',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry(buckets=(0.1, 1))
+    for seconds in (0.05, 0.5, 0.5, 3):
+        registry.observe("latency_seconds", seconds, stage="x")
+
+    assert lines(registry.render(directory="")) == [
+        'latency_seconds_bucket{stage="x",le="0.1"} 1',
+        'latency_seconds_bucket{stage="x",le="1"} 3',
+        'latency_seconds_bucket{stage="x",le="+Inf"} 4',
+        'latency_seconds_sum{stage="x"} 4.05',
+        'latency_seconds_count{stage="x"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("errors_total", reason='bad "quote"\\path\nnext')
+
+    assert lines(registry.render(directory="")) == [
+        'errors_total{reason="bad \\"quote\\"\\\\path\\nnext"} 1',
+    ]
+
+
+def test_collector_gauges_carry_the_worker_label_and_failures_are_skipped():
+    registry = MetricsRegistry()
+    registry.add_collector(lambda: [("gauge", "queue_depth", {"queue": "jobs"}, 3)])
+    registry.add_collector(lambda: 1 / 0)
+
+    assert lines(registry.render(directory="")) == [
+        f'queue_depth{{queue="jobs",worker="{os.getpid()}"}} 3',
+    ]
+
+
+# ----- multi-worker merge -----
+
+def test_counters_and_histograms_are_summed_across_workers(tmp_path, alive):
+    registry = MetricsRegistry(buckets=(1,))
+    registry.inc("jobs_total", 2, kind="a")
+    registry.observe("latency_seconds", 0.5)
+    other_worker(tmp_path, [
+        ["counter", "jobs_total", {"kind": "a"}, 5],
+        ["counter", "jobs_total", {"kind": "b"}, 1],
+        ["histogram", "latency_seconds", {}, [[1], [0, 2], 4.0]],
+    ])
+
+    assert lines(registry.render(directory=str(tmp_path))) == [
+        'jobs_total{kind="a"} 7',
+        'jobs_total{kind="b"} 1',
+        'latency_seconds_bucket{le="1"} 1',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 4.5",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_gauges_from_dead_workers_are_dropped_but_their_counters_kept(tmp_path, alive):
+    registry = MetricsRegistry()
+    other_worker(tmp_path, [["gauge", "queue_depth", {}, 9]], pid=OTHER_PID)
+    other_worker(tmp_path, [["gauge", "queue_depth", {}, 4], ["counter", "jobs_total", {}, 6]], pid=OTHER_PID + 1)
+
+    assert lines(registry.render(directory=str(tmp_path))) == [
+        "jobs_total 6",
+        f'queue_depth{{worker="{OTHER_PID}"}} 9',
+    ]
+
+
+def test_own_snapshot_file_is_not_counted_twice(tmp_path, alive):
+    registry = MetricsRegistry()
+    registry.inc("jobs_total")
+    registry.write_snapshot(str(tmp_path))
+
+    assert lines(registry.render(directory=str(tmp_path))) == ["jobs_total 1"]
+    assert [p.name for p in tmp_path.iterdir()] == [f"worker-{os.getpid()}.json"]
+
+
+def test_unreadable_snapshot_files_are_ignored(tmp_path, alive):
+    registry = MetricsRegistry()
+    registry.inc("jobs_total")
+    (tmp_path / "worker-123.json").write_text("{truncated")
+    (tmp_path / "unrelated.json").write_text("[]")
+
+    assert lines(registry.render(directory=str(tmp_path))) == ["jobs_total 1"]
+
+
+# ----- bridging -----
+
+def test_histogram_from_ms_snapshot_converts_to_seconds():
+    histogram = LatencyHistogram(buckets_ms=(5, 50))
+    for value_ms in (1, 20, 20, 400):
+        histogram.observe(value_ms)
+
+    bounds, cumulative, total = histogram_from_ms_snapshot(histogram.snapshot())
+
+    assert bounds == [0.005, 0.05]
+    assert cumulative == [1, 3, 4]
+    assert total == pytest.approx(0.441)
@@ -0,0 +1,187 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+import phash
+from phash import PerceptualHashIndex, compute_phash, hamming_distances, is_informative
+
+
+def textured_image(seed: int, size=(320, 240)) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    coarse = (rng.random((12, 16, 3)) * 255).astype(np.uint8)
+    return Image.fromarray(coarse).resize(size, Image.BILINEAR).filter(ImageFilter.GaussianBlur(3))
+
+
+def recompressed(image: Image.Image, scale: float, quality: int) -> Image.Image:
+    resized = image.resize((int(image.width * scale), int(image.height * scale)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, "JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def distance(a: int, b: int) -> int:
+    return int(hamming_distances(np.array([a], dtype=np.uint64), b)[0])
+
+
+def informative_hashes(count: int):
+    return [compute_phash(textured_image(seed)) for seed in range(count)]
+
+
+# ----- hashing -----
+
+def test_resized_and_recompressed_copy_hashes_within_default_distance():
+    original = textured_image(1)
+    copy = recompressed(original, 0.5, 60)
+
+    assert distance(compute_phash(original), compute_phash(copy)) <= phash.PHASH_MAX_DISTANCE
+
+
+def test_different_images_are_far_apart():
+    assert distance(compute_phash(textured_image(1)), compute_phash(textured_image(2))) > 10
+
+
+def test_flat_images_are_uninformative():
+    black = compute_phash(Image.new("RGB", (200, 200)))
+    grey = compute_phash(Image.new("RGB", (400, 100), (128, 128, 128)))
+    noisy_flat = Image.fromarray(
+        (128 + np.random.default_rng(0).integers(-1, 2, (200, 200))).astype(np.uint8)
+    )
+
+    assert black == grey == 0
+    assert not is_informative(black)
+    assert not is_informative(compute_phash(noisy_flat))
+    assert is_informative(compute_phash(textured_image(3)))
+
+
+def test_hamming_distances_counts_differing_bits():
+    hashes = np.array([0b1011, 0, (1 << 64) - 1], dtype=np.uint64)
+    assert hamming_distances(hashes, 0b0001).tolist() == [2, 1, 63]
+
+
+# ----- index -----
+
+def test_lookup_returns_nearest_entry_within_max_distance():
+    first, second = informative_hashes(2)
+    index = PerceptualHashIndex(capacity=10, max_distance=4)
+    index.add(first, {"verdict": "first"})
+    index.add(second, {"verdict": "second"})
+
+    payload, found_distance = index.lookup(first ^ 0b11)  # two bits off
+    assert payload == {"verdict": "first"}
+    assert found_distance == 2
+    assert index.lookup(first ^ 0b11111) is None  # five bits off
+
+
+def test_uninformative_hashes_are_neither_stored_nor_matched():
+    index = PerceptualHashIndex(capacity=10)
+    index.add(0, {"verdict": "flat"})
+
+    assert len(index) == 0
+    assert index.lookup(0) is None
+    assert index.stats()["uninformative"] == 1
+
+
+def test_add_merges_payloads_unless_told_otherwise():
+    (value,) = informative_hashes(1)
+    index = PerceptualHashIndex(capacity=10)
+    index.add(value, {"local": 1})
+    index.add(value, {"gemini": 2})
+    assert index.lookup(value)[0] == {"local": 1, "gemini": 2}
+
+    index.add(value, {"gemini": 3}, merge=False)
+    assert index.lookup(value)[0] == {"gemini": 3}
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity():
+    a, b, c = informative_hashes(3)
+    index = PerceptualHashIndex(capacity=2, max_distance=0)
+    index.add(a, {"id": "a"})
+    index.add(b, {"id": "b"})
+    index.lookup(a)  # "b" becomes the eviction candidate
+
+    index.add(c, {"id": "c"})
+
+    assert len(index) == 2
+    assert index.lookup(b) is None
+    assert index.lookup(a)[0] == {"id": "a"}
+
+
+def test_expired_entries_do_not_match(monkeypatch):
+    (value,) = informative_hashes(1)
+    now = [1000.0]
+    monkeypatch.setattr(phash.time, "time", lambda: now[0])
+    index = PerceptualHashIndex(capacity=4, ttl_seconds=10)
+    index.add(value, {"id": 1})
+
+    now[0] += 11
+    assert index.lookup(value) is None
+
+
+# ----- persistence -----
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "index.npz"
+    hashes = informative_hashes(3)
+    index = PerceptualHashIndex(capacity=10)
+    for i, value in enumerate(hashes):
+        index.add(value, {"id": i})
+
+    index.save(str(path))
+    restored = PerceptualHashIndex(capacity=10)
+    restored.load(str(path))
+
+    assert len(restored) == 3
+    assert [restored.lookup(value)[0]["id"] for value in hashes] == [0, 1, 2]
+
+
+def test_saves_from_several_workers_are_merged(tmp_path):
+    path = tmp_path / "index.npz"
+    a, b, c = informative_hashes(3)
+    worker_one = PerceptualHashIndex(capacity=10)
+    worker_one.add(a, {"from": "one"})
+    worker_one.add(b, {"from": "one"})
+    worker_two = PerceptualHashIndex(capacity=10)
+    worker_two.add(b, {"from": "two"})  # later expiry wins
+    worker_two.add(c, {"from": "two"})
+
+    worker_one.save(str(path))
+    worker_two.save(str(path))
+    restored = PerceptualHashIndex(capacity=10)
+    restored.load(str(path))
+
+    assert {value: restored.lookup(value)[0]["from"] for value in (a, b, c)} == {a: "one", b: "two", c: "two"}
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == ".npz") == ["index.npz"]
+
+
+def test_merged_snapshot_keeps_the_newest_capacity_entries(tmp_path, monkeypatch):
+    path = tmp_path / "index.npz"
+    now = [1000.0]
+    monkeypatch.setattr(phash.time, "time", lambda: now[0])
+    hashes = informative_hashes(3)
+    older = PerceptualHashIndex(capacity=2)
+    older.add(hashes[0], {"id": 0})
+    older.save(str(path))
+
+    now[0] += 1
+    newer = PerceptualHashIndex(capacity=2)
+    newer.add(hashes[1], {"id": 1})
+    newer.add(hashes[2], {"id": 2})
+    newer.save(str(path))
+
+    restored = PerceptualHashIndex(capacity=10)
+    restored.load(str(path))
+    assert len(restored) == 2
+    assert restored.lookup(hashes[0]) is None
+
+
+@pytest.mark.parametrize("contents", [None, b"not an npz file"])
+def test_missing_or_corrupt_snapshot_loads_nothing(tmp_path, contents):
+    path = tmp_path / "index.npz"
+    if contents is not None:
+        path.write_bytes(contents)
+
+    index = PerceptualHashIndex(capacity=4)
+    index.load(str(path))
+    assert len(index) == 0
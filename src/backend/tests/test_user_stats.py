@@ -0,0 +1,239 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+
+
+def analysis(user_id="u1", kind="media", **result):
+    return database.build_analysis_document(user_id, {"type": kind, "result": result})
+
+
+async def write(db, documents):
+    """Write history documents without counting them (pre-counter history)."""
+    for document in documents:
+        await db["analysis_history"].insert_one(document)
+
+
+def counters(db, user_id="u1"):
+    document = db[database.USER_STATS_COLLECTION].documents.get(user_id, {})
+    return {field: document.get(field, 0) for field in database._COUNTER_FIELDS}
+
+
+def days(db, user_id="u1"):
+    return db[database.USER_STATS_COLLECTION].documents.get(user_id, {}).get("days", {})
+
+
+# ----- per-document increments -----
+
+@pytest.mark.parametrize("document, expected", [
+    ({"type": "media", "result": {"is_fake": True}}, {"media": 1, "deepfakes": 1}),
+    ({"type": "text", "result": {"isOriginal": False, "trustScore": 20}}, {"text": 1, "deepfakes": 1, "suspicious": 1}),
+    ({"type": "text", "result": {"trustScore": 50}}, {"text": 1}),
+    # Booleans are not trust scores
+    ({"type": "text", "result": {"trustScore": False}}, {"text": 1}),
+    ({"type": "other", "result": None}, {}),
+])
+def test_stats_counts(document, expected):
+    zeros = {"total": 1, "media": 0, "text": 0, "deepfakes": 0, "suspicious": 0}
+    assert database._stats_counts(document) == {**zeros, **expected}
+
+
+# ----- save-time counting -----
+
+def test_saved_analyses_create_and_increment_counters(db, run):
+    documents = [analysis(is_fake=True), analysis(kind="text", trustScore=10)]
+    run(database.insert_analyses(documents))
+
+    assert counters(db) == {"total": 2, "media": 1, "text": 1, "deepfakes": 1, "suspicious": 1}
+    assert list(days(db).values()) == [2]
+    assert db[database.USER_STATS_COLLECTION].documents["u1"]["counted_from"] == documents[0]["timestamp"]
+
+
+def test_counting_leaves_history_documents_untouched(db, run):
+    document = analysis()
+    run(database.insert_analyses([document]))
+
+    assert db["analysis_history"].documents[document["_id"]] == document
+
+
+def test_old_analyses_count_in_totals_but_not_in_daily_buckets(db, run):
+    old = analysis()
+    old["timestamp"] = datetime.utcnow() - timedelta(days=database.USER_STATS_BUCKET_DAYS + 5)
+    run(write(db, [old]))
+
+    run(database._apply_stats_deltas([old], 1))
+
+    assert counters(db)["total"] == 1
+    assert days(db) == {}
+
+
+def test_counters_are_per_user(db, run):
+    run(database.insert_analyses([analysis("u1"), analysis("u2"), analysis("u2")]))
+
+    assert counters(db, "u1")["total"] == 1
+    assert counters(db, "u2")["total"] == 2
+
+
+def test_analyses_older_than_the_counters_are_left_to_seeding(db, run):
+    first, older = analysis(), analysis()
+    older["timestamp"] = first["timestamp"] - timedelta(seconds=1)
+
+    run(database.insert_analyses([first]))
+    run(database.insert_analyses([older]))
+
+    assert counters(db)["total"] == 1
+
+
+def test_aggregate_mode_leaves_counters_alone(db, monkeypatch, run):
+    monkeypatch.setattr(database, "USER_STATS_MODE", "aggregate")
+
+    run(database.insert_analyses([analysis()]))
+
+    assert db[database.USER_STATS_COLLECTION].documents == {}
+
+
+# ----- deletes -----
+
+def test_deleting_a_counted_analysis_decrements_its_counters(db, run):
+    document = analysis(is_fake=True)
+    run(database.insert_analyses([document]))
+
+    assert run(database.delete_analysis(str(document["_id"]), "u1")) is True
+
+    assert counters(db) == {"total": 0, "media": 0, "text": 0, "deepfakes": 0, "suspicious": 0}
+    assert list(days(db).values()) == [0]
+
+
+def test_deleting_an_uncounted_analysis_leaves_counters_alone(db, run):
+    counted, uncounted = analysis(), analysis()
+    uncounted["timestamp"] = counted["timestamp"] - timedelta(days=1)
+    run(write(db, [uncounted]))
+    run(database.insert_analyses([counted]))
+
+    run(database.delete_analysis(str(uncounted["_id"]), "u1"))
+
+    assert counters(db)["total"] == 1
+
+
+def test_delete_of_another_users_analysis_is_refused(db, run):
+    document = analysis("u1")
+    run(write(db, [document]))
+
+    assert run(database.delete_analysis(str(document["_id"]), "u2")) is False
+    assert document["_id"] in db["analysis_history"].documents
+
+
+# ----- seeding -----
+
+def facet_handler(during=None):
+    """Evaluate _seed_user_stats' $facet in Python; ``during`` runs mid-aggregation."""
+    async def handler(documents, stages):
+        if during is not None:
+            await during()
+        totals = {field: 0 for field in database._COUNTER_FIELDS}
+        daily = {}
+        first_day = stages[0]["$facet"]["daily"][0]["$match"]["timestamp"]["$gte"]
+        for document in documents:
+            for field, value in database._stats_counts(document).items():
+                totals[field] += value
+            if document["timestamp"] >= first_day:
+                day = f"{document['timestamp']:%Y-%m-%d}"
+                daily[day] = daily.get(day, 0) + 1
+        return [{
+            "totals": [totals] if documents else [],
+            "daily": [{"_id": day, "count": count} for day, count in daily.items()],
+        }]
+    return handler
+
+
+def test_first_stats_read_seeds_counters_from_existing_history(db, run):
+    # Written before counters existed: never counted at save time
+    run(write(db, [analysis(is_fake=True), analysis(kind="text")]))
+    db["analysis_history"].aggregate_handler = facet_handler()
+
+    stats = run(database.get_user_stats("u1"))
+
+    assert stats["totalAnalyses"] == 2
+    assert stats["deepfakesDetected"] == 1
+    assert stats["thisWeek"] == stats["thisMonth"] == 2
+    assert "seeded_at" in db[database.USER_STATS_COLLECTION].documents["u1"]
+
+
+def test_save_during_seeding_is_counted_exactly_once(db, run):
+    run(write(db, [analysis(), analysis()]))
+
+    async def concurrent_save():
+        # Lands after the seed fixed its cutoff, before its $inc
+        await database.insert_analyses([analysis()])
+
+    db["analysis_history"].aggregate_handler = facet_handler(during=concurrent_save)
+    stats = run(database.get_user_stats("u1"))
+
+    assert stats["totalAnalyses"] == 3
+    assert stats["thisWeek"] == 3
+    # Already seeded: the next read does not aggregate again
+    db["analysis_history"].aggregate_handler = None
+    assert run(database.get_user_stats("u1"))["totalAnalyses"] == 3
+
+
+def test_concurrent_first_reads_seed_once(db, run):
+    run(write(db, [analysis(), analysis()]))
+    nested = []
+
+    async def concurrent_read():
+        if not nested:
+            nested.append(None)
+            nested[0] = await database.get_user_stats("u1")
+
+    db["analysis_history"].aggregate_handler = facet_handler(during=concurrent_read)
+    stats = run(database.get_user_stats("u1"))
+
+    assert stats["totalAnalyses"] == nested[0]["totalAnalyses"] == 2
+
+
+def test_counters_created_by_saves_are_still_seeded_with_older_history(db, run):
+    run(write(db, [analysis()]))
+    run(database.insert_analyses([analysis()]))
+    assert "seeded_at" not in db[database.USER_STATS_COLLECTION].documents["u1"]
+
+    db["analysis_history"].aggregate_handler = facet_handler()
+    assert run(database.get_user_stats("u1"))["totalAnalyses"] == 2
+
+
+def test_expired_daily_buckets_are_pruned_on_read(db, run):
+    run(database.insert_analyses([analysis()]))
+    db["analysis_history"].aggregate_handler = facet_handler()
+    run(database.get_user_stats("u1"))
+    stale = f"{datetime.utcnow() - timedelta(days=database.USER_STATS_BUCKET_DAYS + 2):%Y-%m-%d}"
+    days(db)[stale] = 7
+
+    stats = run(database.get_user_stats("u1"))
+
+    assert stats["thisMonth"] == 1
+    assert stale not in days(db)
+
+
+# ----- clearing -----
+
+def test_clear_resets_counters_and_the_next_read_recounts(db, run):
+    run(database.insert_analyses([analysis(), analysis()]))
+
+    assert run(database.clear_user_history("u1")) == 2
+
+    db["analysis_history"].aggregate_handler = facet_handler()
+    stats = run(database.get_user_stats("u1"))
+    assert stats["totalAnalyses"] == stats["thisMonth"] == 0
+
+
+def test_saves_in_flight_during_clear_are_counted_once(db, run):
+    deleted_by_clear, survives_clear = analysis(), analysis()
+    run(write(db, [deleted_by_clear]))
+
+    run(database.clear_user_history("u1"))
+    # Both were submitted before the clear; their writes finish after it
+    run(database._apply_stats_deltas([deleted_by_clear], 1))
+    run(database.insert_analyses([survives_clear]))
+
+    db["analysis_history"].aggregate_handler = facet_handler()
+    assert run(database.get_user_stats("u1"))["totalAnalyses"] == 1
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def users(db):
+    collection = db["users"]
+    collection.unique_fields = ["email"]
+    return collection
+
+
+def test_create_user_stores_a_lowercased_email_without_returning_the_hash(users, run):
+    user = run(database.create_user("Ada@Example.com", "correct horse", "Ada"))
+
+    assert user["email"] == "ada@example.com"
+    assert "password_hash" not in user
+    assert len(users.documents) == 1
+
+
+def test_existing_email_is_refused(users, run):
+    run(database.create_user("ada@example.com", "correct horse", "Ada"))
+
+    assert run(database.create_user("ADA@example.com", "battery staple", "Ada")) is None
+
+
+def test_concurrent_registrations_of_one_email_create_one_user(users, run):
+    async def register_twice():
+        # Both pass the find_one check while the first hashes its password
+        return await asyncio.gather(
+            database.create_user("ada@example.com", "correct horse", "Ada"),
+            database.create_user("ada@example.com", "battery staple", "Ada"),
+        )
+
+    results = run(register_twice())
+
+    assert sum(result is not None for result in results) == 1
+    assert len(users.documents) == 1
@@ -0,0 +1,185 @@
+"""
+Video Frame Sampling for DeFraudAI
+Streams frames out of an uploaded video with PyAV, samples them adaptively
+(scene changes plus a minimum rate) and tracks when the per-frame verdict
+has stabilized so analysis can stop early.
+
+Frames are produced by a generator, so memory stays flat regardless of video
+length. PyAV is an optional dependency.
+"""
+
+import math
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    av = None
+    PYAV_AVAILABLE = False
+
+# ============================================
+# Configuration
+# ============================================
+
+VIDEO_MAX_BYTES = int(float(os.getenv("VIDEO_MAX_MB", "100")) * 1024 * 1024)
+VIDEO_MAX_DURATION_SECONDS = float(os.getenv("VIDEO_MAX_DURATION_SECONDS", "600"))
+# Frames sent to the model: always at least MIN, never more than MAX
+VIDEO_MIN_FRAMES = int(os.getenv("VIDEO_MIN_FRAMES", "8"))
+VIDEO_MAX_FRAMES = int(os.getenv("VIDEO_MAX_FRAMES", "64"))
+# Sample at least one frame per interval even without scene changes
+VIDEO_SAMPLE_INTERVAL_SECONDS = float(os.getenv("VIDEO_SAMPLE_INTERVAL_SECONDS", "2.0"))
+# Mean absolute difference (0-1) of 32x32 thumbnails that counts as a cut
+VIDEO_SCENE_THRESHOLD = float(os.getenv("VIDEO_SCENE_THRESHOLD", "0.12"))
+# Stop once the 95% confidence interval of the mean fake probability is this narrow
+VIDEO_STABLE_TOLERANCE = float(os.getenv("VIDEO_STABLE_TOLERANCE", "0.05"))
+# Wall-clock budget per video; the verdict so far is returned when it runs out
+VIDEO_DEADLINE_SECONDS = float(os.getenv("VIDEO_DEADLINE_SECONDS", "60"))
+# Sampled frames are scaled down in the decoder (detectors resize to ~224 anyway)
+VIDEO_FRAME_MAX_DIM = 448
+
+VIDEO_MIME_TYPES = {
+    "video/mp4",
+    "video/webm",
+    "video/quicktime",
+    "video/x-matroska",
+    "video/x-msvideo",
+}
+
+_THUMB_SIZE = 32
+
+
+def probe_video(source: BinaryIO) -> Dict[str, Any]:
+    """Container/stream metadata without decoding frames."""
+    container = av.open(source)
+    try:
+        stream = container.streams.video[0]
+        duration = float(stream.duration * stream.time_base) if stream.duration else (
+            container.duration / 1_000_000 if container.duration else None
+        )
+        return {
+            "format": container.format.name,
+            "codec": stream.codec_context.name,
+            "width": stream.codec_context.width,
+            "height": stream.codec_context.height,
+            "fps": float(stream.average_rate) if stream.average_rate else None,
+            "duration_seconds": round(duration, 2) if duration else None,
+        }
+    finally:
+        container.close()
+
+
+def iter_sampled_frames(
+    source: BinaryIO,
+    interval_seconds: float = VIDEO_SAMPLE_INTERVAL_SECONDS,
+    scene_threshold: float = VIDEO_SCENE_THRESHOLD,
+    max_duration: float = VIDEO_MAX_DURATION_SECONDS,
+    frame_max_dim: int = VIDEO_FRAME_MAX_DIM,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[float, str, Image.Image]]:
+    """
+    Decode ``source`` frame by frame and yield ``(timestamp, reason, image)``
+    for sampled frames only.
+
+    A frame is sampled when its 32x32 grayscale thumbnail differs from the
+    last sampled one by more than ``scene_threshold`` (reason
+    ``scene_change``), or when ``interval_seconds`` have passed since the
+    last sample (``interval``). The first frame is always sampled. Only
+    sampled frames are converted to RGB, downscaled in swscale.
+    ``stats["decoded"]`` counts decoded frames.
+    """
+    container = av.open(source)
+    try:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        width = stream.codec_context.width or frame_max_dim
+        height = stream.codec_context.height or frame_max_dim
+        scale = min(1.0, frame_max_dim / max(width, height))
+        out_width = max(2, int(width * scale) // 2 * 2)
+        out_height = max(2, int(height * scale) // 2 * 2)
+
+        last_thumb = None
+        last_time = -math.inf
+        for frame in container.decode(stream):
+            if stats is not None:
+                stats["decoded"] = stats.get("decoded", 0) + 1
+            timestamp = float(frame.time) if frame.time is not None else 0.0
+            if timestamp > max_duration:
+                break
+
+            thumb = frame.reformat(width=_THUMB_SIZE, height=_THUMB_SIZE, format="gray").to_ndarray()
+            if last_thumb is None:
+                reason = "first"
+            elif np.abs(thumb.astype(np.int16) - last_thumb).mean() / 255.0 > scene_threshold:
+                reason = "scene_change"
+            elif timestamp - last_time >= interval_seconds:
+                reason = "interval"
+            else:
+                continue
+
+            last_thumb = thumb.astype(np.int16)
+            last_time = timestamp
+            image = frame.reformat(width=out_width, height=out_height, format="rgb24").to_image()
+            yield timestamp, reason, image
+    finally:
+        container.close()
+
+
+def take_frames(frames: Iterator[Tuple[float, str, Image.Image]], count: int) -> List[Tuple[float, str, Image.Image]]:
+    """Next ``count`` sampled frames (fewer at end of stream); runs in a worker thread."""
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) >= count:
+            break
+    return batch
+
+
+# ============================================
+# Verdict Stabilization
+# ============================================
+
+class ConfidenceTracker:
+    """
+    Running mean of per-frame fake probabilities (Welford) with an
+    early-stop rule: once ``min_frames`` are in, stop when the 95%
+    confidence interval half-width of the mean is within ``tolerance``.
+    """
+
+    def __init__(
+        self,
+        min_frames: int = VIDEO_MIN_FRAMES,
+        max_frames: int = VIDEO_MAX_FRAMES,
+        tolerance: float = VIDEO_STABLE_TOLERANCE,
+    ):
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.tolerance = tolerance
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, probability: float):
+        self.count += 1
+        delta = probability - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (probability - self.mean)
+
+    @property
+    def half_width(self) -> float:
+        if self.count < 2:
+            return math.inf
+        std = math.sqrt(self._m2 / (self.count - 1))
+        return 1.96 * std / math.sqrt(self.count)
+
+    @property
+    def stable(self) -> bool:
+        return self.count >= self.min_frames and self.half_width <= self.tolerance
+
+    @property
+    def exhausted(self) -> bool:
+        return self.count >= self.max_frames